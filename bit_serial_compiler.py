@@ -8,33 +8,46 @@ Date: 2024-09-20
 """
 
 import argparse
+import fcntl
+import hashlib
+import importlib.util
 import os
 import sys
+import shutil
 import subprocess
 import textwrap
+import traceback
 import re
 
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'src'))
+from stage_cache import StageCache
+
 
 class bitSerialCompiler:
     """
     Bit-Serial Compiler
     """
 
+    # In-process Python stage modules, shared by all compiler instances of a process
+    python_stage_modules = {}
+
     def __init__(self, args=[]):
         """ Init """
         self.args = args.copy()
         self.verilog = []
-        self.genlib = ''
+        self.genlib = []
         self.aig = ''
         self.blif = ''
         self.c = ''
         self.asm = ''
+        self.pim_ir1 = ''
         self.output = ''
         self.outdir = ''
         self.num_regs = 0
         self.from_stage = ''
         self.to_stage = ''
-        self.stages = {'verilog':1, 'blif':2, 'c':3, 'asm':4, 'pim':5, 'test':6}
+        # Note: pim_ir1 is an alternative to c, generated together with c by the BLIF translator
+        self.stages = {'verilog':1, 'blif':2, 'c':3, 'pim_ir1':3, 'asm':4, 'pim':5, 'test':6}
         self.abc_path = ''
         self.yosys_path = ''
         self.clang_path = ''
@@ -47,6 +60,18 @@ class bitSerialCompiler:
         self.gen_pim_ir1 = False
         self.pim_mode = ''
         self.impl_type = None
+        self.cache_dir = ''
+        self.cache_link = False
+        self.stage_cache = None
+        self.last_stage_cache_hit = False
+        self.use_subprocess = False
+        self.yosys_blif = ''
+        self.yosys_only = False
+        self.yosys_store = ''
+        self.scheduler = 'llvm'
+        self.equiv_check = False
+        self.tck_ns = None
+        self.energy_table = ''
         self.parser = self.create_argparse()
         self.hbar = "============================================================"
 
@@ -67,13 +92,15 @@ class bitSerialCompiler:
             return False
         if not self.locate_yosys_path():
             return False
-        if not self.locate_clang_path():
+        if self.scheduler == 'llvm' and not self.locate_clang_path():
             return False
 
         self.report_params()
 
         if not self.create_outdir_if_needed():
             return False
+        if not self.create_stage_cache_if_needed():
+            return False
 
         if self.stages[self.from_stage] <= self.stages['verilog'] and self.stages[self.to_stage] >= self.stages['blif']:
             success = self.run_verilog_to_blif()
@@ -85,12 +112,18 @@ class bitSerialCompiler:
             if not success:
                 return False
 
-        if self.stages[self.from_stage] <= self.stages['c'] and self.stages[self.to_stage] >= self.stages['asm']:
+        if self.from_stage == 'pim_ir1':
+            success = self.run_pim_ir1_to_pim()
+            if not success:
+                return False
+
+        # Note: The native scheduler generates PIM API directly in the BLIF to C stage
+        if self.scheduler == 'llvm' and self.stages[self.from_stage] <= self.stages['c'] and self.stages[self.to_stage] >= self.stages['asm']:
             success = self.run_c_to_asm()
             if not success:
                 return False
 
-        if self.stages[self.from_stage] <= self.stages['asm'] and self.stages[self.to_stage] >= self.stages['pim']:
+        if self.scheduler == 'llvm' and self.stages[self.from_stage] <= self.stages['asm'] and self.stages[self.to_stage] >= self.stages['pim']:
             success = self.run_asm_to_pim()
             if not success:
                 return False
@@ -109,22 +142,28 @@ class bitSerialCompiler:
         extra_help_msg = textwrap.dedent("""
         how to use:
           Input requirements:
-            --from-stage verilog    require --verilog and --genlib
+            --from-stage verilog    require --verilog and --genlib, or --yosys-blif and --genlib
+            --yosys-only            require --verilog, stop after yosys
+            multiple --genlib       require --to-stage blif, map once per genlib in a single ABC session
             --from-stage blif       require --blif
             --from-stage c          require --c
             --from-stage asm        require --asm
+            --from-stage pim_ir1    require --pim-ir1 and --to-stage pim or test, imply --scheduler native
+            --scheduler native      schedule PIM IR-1 natively in the BLIF to C stage, skip clang and ASM parser,
+                                    cannot start from stage c or asm
         """)
         parser = argparse.ArgumentParser(epilog=extra_help_msg, formatter_class=argparse.RawTextHelpFormatter)
         parser.add_argument('--verilog', metavar='[files]', type=str, default='', help='Input Verilog files', nargs='+')
-        parser.add_argument('--genlib', metavar='[file]', type=str, default='', help='Input GenLib file')
+        parser.add_argument('--genlib', metavar='[files]', type=str, default=[], help='Input GenLib files', nargs='+')
         parser.add_argument('--blif', metavar='[file]', type=str, default='', help='Input BLIF file')
         parser.add_argument('--c', metavar='[file]', type=str, default='', help='Input C file')
         parser.add_argument('--asm', metavar='[file]', type=str, default='', help='Input ASM file')
+        parser.add_argument('--pim-ir1', metavar='[file]', type=str, default='', help='Input PIM IR-1 file')
         parser.add_argument('--num-regs', metavar='N', type=int, default=4, help='Number of registers 2~19', choices=range(2, 20))
         parser.add_argument('--output', metavar='[filename]', type=str, default='tmp', help='Output filename without suffix')
         parser.add_argument('--outdir', metavar='[path]', type=str, default='.', help='Output location, default current dir')
         parser.add_argument('--from-stage', metavar='[stage]', type=str,
-                help='From stage: verilog (default), blif, c, asm, pim',
+                help='From stage: verilog (default), blif, c, pim_ir1, asm, pim',
                 choices=self.stages, default='verilog')
         parser.add_argument('--to-stage', metavar='[stage]', type=str,
                 help='To stage: verilog, blif, c, asm, pim (default)',
@@ -139,6 +178,16 @@ class bitSerialCompiler:
         parser.add_argument('--pim-mode', type=str, default='digital', choices=['digital', 'analog'], help='The PIM architecture mode (analog/digital).')
         parser.add_argument('--impl-type', type=int, help='Override the IMPL_TYPE Verilog parameter')
         parser.add_argument('--golden-function-path', '-g', type=str, default=None, help='The path to the golden function file hpp file.')
+        parser.add_argument('--cache-dir', metavar='[path]', type=str, default='', help='Content-addressed stage cache location, default disabled')
+        parser.add_argument('--cache-link', action='store_true', help='Hardlink cached outputs instead of copying them')
+        parser.add_argument('--subprocess', action='store_true', help='Run Python stages as subprocesses instead of in-process')
+        parser.add_argument('--yosys-blif', metavar='[file]', type=str, default='', help='Input Tech-Independent-BLIF file, skip yosys')
+        parser.add_argument('--yosys-only', action='store_true', help='Only run yosys to generate Tech-Independent-BLIF')
+        parser.add_argument('--scheduler', type=str, default='llvm', choices=['llvm', 'native'], help='Instruction scheduler and register allocator: llvm (default), native')
+        parser.add_argument('--equiv-check', action='store_true', help='Prove BLIF translation preserves the circuit function with a SAT solver')
+        parser.add_argument('--tck-ns', type=float, default=None, help='DRAM tCK in ns for latency estimation, default from the PIM target description')
+        parser.add_argument('--energy-table', metavar='[file]', type=str, default='', help='JSON file of per-opcode energy in pJ for energy estimation')
+        parser.add_argument('--yosys-store', metavar='[path]', type=str, default='', help='Shared Tech-Independent-BLIF store location, default disabled')
         return parser
 
     def parse_args(self):
@@ -149,13 +198,22 @@ class bitSerialCompiler:
         self.blif = args.blif
         self.c = args.c
         self.asm = args.asm
+        self.pim_ir1 = args.pim_ir1
+        self.yosys_blif = args.yosys_blif
+        self.yosys_only = args.yosys_only
+        self.yosys_store = args.yosys_store
         for file in self.verilog:
             if not self.sanity_check_input_file(file, 'Verilog'):
                 return False
-        if (not self.sanity_check_input_file(self.genlib, 'GenLib')
-                or not self.sanity_check_input_file(self.blif, 'BLIF')
+        for file in self.genlib:
+            if not self.sanity_check_input_file(file, 'GenLib'):
+                return False
+        if (not self.sanity_check_input_file(self.blif, 'BLIF')
                 or not self.sanity_check_input_file(self.c, 'C')
-                or not self.sanity_check_input_file(self.asm, 'ASM')):
+                or not self.sanity_check_input_file(self.asm, 'ASM')
+                or not self.sanity_check_input_file(self.pim_ir1, 'PIM IR-1')
+                or not self.sanity_check_input_file(self.yosys_blif, 'Tech-Independent-BLIF')
+                or not self.sanity_check_input_file(args.energy_table, 'energy table')):
             return False
         self.output = args.output
         if not self.output or ' ' in self.output:
@@ -166,14 +224,43 @@ class bitSerialCompiler:
         self.to_stage = args.to_stage
         self.num_tests = args.num_tests
         # from/to rule checks
+        if self.yosys_only:
+            if self.from_stage != 'verilog' or self.yosys_blif:
+                print("Error: --yosys-only requires --from-stage verilog and conflicts with --yosys-blif")
+                return False
+            self.to_stage = 'blif'
+        if self.yosys_blif and self.from_stage != 'verilog':
+            print("Error: --yosys-blif requires --from-stage verilog")
+            return False
+        if self.yosys_blif and self.yosys_store:
+            print("Error: --yosys-blif conflicts with --yosys-store")
+            return False
+        if len(self.genlib) > 1:
+            if self.to_stage != 'blif':
+                print("Error: Multiple --genlib files require --to-stage blif")
+                return False
+            genlib_names = [self.get_genlib_name(file) for file in self.genlib]
+            if len(set(genlib_names)) != len(genlib_names):
+                print("Error: Multiple --genlib files must have distinct file names")
+                return False
+        self.scheduler = args.scheduler
+        if self.from_stage == 'pim_ir1':
+            if self.stages[self.to_stage] < self.stages['pim']:
+                print("Error: --from-stage pim_ir1 requires --to-stage pim or test")
+                return False
+            self.scheduler = 'native'
+        if self.scheduler == 'native' and self.from_stage in ['c', 'asm']:
+            print("Error: --scheduler native cannot start from stage %s" % (self.from_stage))
+            return False
         if self.stages[self.from_stage] >= self.stages[self.to_stage]:
             print("Error: Invalid from-to range: %s -> %s" % (self.from_stage, self.to_stage))
             return False
-        if (not self.sanity_check_from_to(self.verilog, 'verilog')
-                or not self.sanity_check_from_to(self.genlib, 'genlib', 'verilog')
+        if (not self.sanity_check_from_to(self.verilog, 'verilog', is_used=not self.yosys_blif)
+                or not self.sanity_check_from_to(self.genlib, 'genlib', 'verilog', is_used=not self.yosys_only)
                 or not self.sanity_check_from_to(self.blif, 'blif')
                 or not self.sanity_check_from_to(self.c, 'c')
-                or not self.sanity_check_from_to(self.asm, 'asm')):
+                or not self.sanity_check_from_to(self.asm, 'asm')
+                or not self.sanity_check_from_to(self.pim_ir1, 'pim_ir1')):
             return False
         self.num_regs = args.num_regs
         self.clang_g = args.clang_g
@@ -185,6 +272,15 @@ class bitSerialCompiler:
         self.pim_mode = args.pim_mode
         self.impl_type = args.impl_type
         self.golden_function_path = args.golden_function_path
+        self.cache_dir = args.cache_dir
+        self.cache_link = args.cache_link
+        self.use_subprocess = args.subprocess
+        self.equiv_check = args.equiv_check
+        self.tck_ns = args.tck_ns
+        if self.tck_ns is not None and self.tck_ns <= 0:
+            print("Error: Invalid --tck-ns %s" % (self.tck_ns))
+            return False
+        self.energy_table = args.energy_table
         return True
 
     def sanity_check_input_file(self, input_file, tag):
@@ -194,20 +290,22 @@ class bitSerialCompiler:
             return False
         return True
 
-    def sanity_check_from_to(self, input_file, arg_name, req_stage=''):
+    def sanity_check_from_to(self, input_file, arg_name, req_stage='', is_used=True):
         """ Sanity check for an input file given from-to range """
         is_required = False
         if not req_stage:
             req_stage = arg_name # stage name same as arg name
-        if isinstance(req_stage, str):
+        if not is_used:
+            is_required = False
+        elif isinstance(req_stage, str):
             is_required = (self.from_stage == req_stage)
         else:
             is_required = (self.stages[self.from_stage] <= self.stages[req_stage[0]] and self.stages[self.to_stage] >= self.stages[req_stage[1]])
         if not input_file and is_required:
-            print("Error: Missing required input parameter --%s" % (arg_name))
+            print("Error: Missing required input parameter --%s" % (arg_name.replace("_", "-")))
             return False
         elif input_file and not is_required:
-            print("Warning: Ignored input parameter --%s %s" % (arg_name, input_file))
+            print("Warning: Ignored input parameter --%s %s" % (arg_name.replace("_", "-"), input_file))
         return True
 
     def locate_abc_path(self):
@@ -246,14 +344,18 @@ class bitSerialCompiler:
         print("From-to Stage: %s -> %s" % (self.from_stage, self.to_stage))
         if self.verilog:
             print("Input Verilog Files:", self.verilog)
+        if self.yosys_blif:
+            print("Input Tech-Independent-BLIF File:", self.yosys_blif)
         if self.genlib:
-            print("Input GenLib File:", self.genlib)
+            print("Input GenLib Files:", self.genlib)
         if self.blif:
             print("Input BLIF File:", self.blif)
         if self.c:
             print("Input C File:", self.c)
         if self.asm:
             print("Input ASM File:", self.asm)
+        if self.pim_ir1:
+            print("Input PIM IR-1 File:", self.pim_ir1)
         if self.output:
             print("Output Filename (without suffix):", self.output)
         if self.outdir:
@@ -264,6 +366,18 @@ class bitSerialCompiler:
         if self.llvm_args:
             print("LLVM args:", self.llvm_args)
         print("Number of Registers:", self.num_regs)
+        print("Scheduler:", self.scheduler)
+        if self.equiv_check:
+            print("Equivalence Check: enabled")
+        if self.tck_ns is not None:
+            print("DRAM tCK (ns):", self.tck_ns)
+        if self.energy_table:
+            print("Energy Table File:", self.energy_table)
+        if self.cache_dir:
+            print("Stage Cache Directory:", self.cache_dir)
+        if self.yosys_store:
+            print("Yosys Store Directory:", self.yosys_store)
+        print("Python Stages:", "subprocess" if self.use_subprocess else "in-process")
         print(self.hbar)
 
     def create_outdir_if_needed(self):
@@ -282,6 +396,103 @@ class bitSerialCompiler:
             return False
         return True
 
+    def create_stage_cache_if_needed(self):
+        """ Create the stage cache if enabled """
+        if not self.cache_dir:
+            return True
+        self.stage_cache = StageCache(self.cache_dir, link=self.cache_link)
+        return self.stage_cache.create_cache_dir_if_needed()
+
+    def run_cmd(self, cmd, runner=None):
+        """ Run a stage in-process if a runner is available, otherwise as a subprocess """
+        if runner is not None and not self.use_subprocess:
+            return runner()
+        sys.stdout.flush()
+        return subprocess.run(cmd).returncode == 0
+
+    def load_python_stage(self, main_file):
+        """ Load the main.py module of a Python stage """
+        if main_file in self.python_stage_modules:
+            return self.python_stage_modules[main_file]
+        stage_dir = os.path.dirname(main_file)
+        # Stage modules import their siblings and util by plain module name
+        for path in [os.path.dirname(stage_dir), stage_dir]:
+            if path not in sys.path:
+                sys.path.insert(0, path)
+        module_name = os.path.basename(stage_dir).replace('-', '_') + '_main'
+        spec = importlib.util.spec_from_file_location(module_name, main_file)
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        self.python_stage_modules[main_file] = module
+        return module
+
+    def run_python_stage(self, main_file, class_name, args, tag):
+        """ Run a Python stage in-process by calling <class_name>().run(args) of its main.py """
+        try:
+            module = self.load_python_stage(main_file)
+            getattr(module, class_name)().run(args)
+        except SystemExit as e:
+            # argparse exits on invalid arguments
+            if e.code:
+                print(f"Error: {tag} failed with exit code {e.code}")
+                return False
+        except Exception as e:
+            traceback.print_exc()
+            print(f"Error: {tag} failed: {e}")
+            return False
+        return True
+
+    def run_stage_cmd(self, stage, cmd, input_files, tool_hashes, flags, outputs, runner=None):
+        """ Run a stage command, or restore its outputs from the stage cache
+            outputs: dict of output suffix -> output file path
+            runner: optional in-process equivalent of cmd
+        """
+        self.last_stage_cache_hit = False
+        if self.stage_cache is None:
+            return self.run_cmd(cmd, runner)
+        key = self.stage_cache.make_key(stage, input_files, tool_hashes, flags)
+        if self.stage_cache.restore(stage, key, outputs):
+            print("INFO: Stage cache hit for %s (key %s)" % (stage, key[:16]))
+            self.last_stage_cache_hit = True
+            return True
+        print("INFO: Stage cache miss for %s (key %s)" % (stage, key[:16]))
+        self.stage_cache.remove_outputs(outputs)
+        if not self.run_cmd(cmd, runner):
+            return False
+        self.stage_cache.store(stage, key, outputs, flags)
+        return True
+
+    def get_tool_hash(self, path):
+        """ Get the hash of a tool binary, or of a Python tool source directory """
+        if os.path.isdir(path):
+            return self.stage_cache.hash_tool_dir(path)
+        return self.stage_cache.hash_tool(path)
+
+    def get_tool_hashes(self, paths):
+        """ Get tool hashes if stage cache is enabled """
+        if self.stage_cache is None:
+            return []
+        return [self.get_tool_hash(path) for path in paths]
+
+    def get_python_stage_hashes(self, main_file):
+        """ Get tool hashes of a Python stage directory and the shared modules under src/ """
+        src_dir = os.path.dirname(os.path.dirname(main_file))
+        shared_files = sorted(os.path.join(src_dir, name) for name in os.listdir(src_dir) if name.endswith('.py'))
+        return self.get_tool_hashes([os.path.dirname(main_file)] + shared_files)
+
+    def get_cost_estimation_args(self):
+        """ Get cost estimation arguments passed through to Python stages """
+        args = []
+        if self.tck_ns is not None:
+            args += ['--tck-ns', str(self.tck_ns)]
+        if self.energy_table:
+            args += ['--energy-table', self.energy_table]
+        return args
+
+    def get_cost_estimation_inputs(self):
+        """ Get cost estimation input files, which are part of stage cache keys """
+        return [self.energy_table] if self.energy_table else []
+
     def generate_run_script(self, cmd, filename):
         """ Generate run script """
         if not self.gen_run_sh:
@@ -329,20 +540,70 @@ class bitSerialCompiler:
 
     def run_verilog_to_blif_yosys(self):
         """ Compile Verilog to BLIF using yosys verilog frontend and abc tech mapper """
-        print("INFO: Creating yosys script (Verilog->Tech-Independent-BLIF)")
-        yosys_blif_file = os.path.join(self.outdir, self.output + '.yosys.blif')
-        # determine top module
-        top_module_opt = ''
+        if self.yosys_blif:
+            print("INFO: Using Tech-Independent-BLIF file:", self.yosys_blif)
+            yosys_blif_file = self.yosys_blif
+        elif self.yosys_store:
+            yosys_blif_file = self.run_yosys_with_store()
+            if not yosys_blif_file:
+                return False
+        else:
+            yosys_blif_file = os.path.join(self.outdir, self.output + '.yosys.blif')
+            if not self.run_yosys(yosys_blif_file):
+                return False
+        if self.yosys_only:
+            return True
+        return self.run_abc(yosys_blif_file)
+
+    def get_top_module_opt(self):
+        """ Determine the yosys top module option """
         if self.top_module:
-            top_module_opt = '-top ' + self.top_module
+            return '-top ' + self.top_module
         elif len(self.verilog) > 1: # use the last file name as top module if not specified
-            top_module_opt = '-top ' + os.path.splitext(os.path.basename(self.verilog[-1]))[0]
-        else:
-            top_module_opt = '-auto-top'
-        print("INFO: Identified Verilog top module as:", top_module_opt)
+            return '-top ' + os.path.splitext(os.path.basename(self.verilog[-1]))[0]
+        return '-auto-top'
+
+    def run_yosys_with_store(self):
+        """ Get Tech-Independent-BLIF from the shared yosys store, running yosys on a miss.
+            Return the stored file path, or empty string on failure
+        """
+        # Note: yosys output only depends on Verilog files, top module and IMPL_TYPE, not on genlib
+        store = StageCache(self.yosys_store)
+        if not store.create_cache_dir_if_needed():
+            return ''
+        yosys_blif_file = os.path.join(self.outdir, self.output + '.yosys.blif')
+        key = store.make_key('yosys', self.verilog, [store.hash_tool(self.yosys_path)],
+                             [self.get_top_module_opt(), self.get_impl_type_config(),
+                              self.get_script_flag(self.get_yosys_script(yosys_blif_file), self.verilog + [yosys_blif_file])])
+        stored_file = os.path.join(self.yosys_store, key + '.yosys.blif')
+        # Hold a per-key lock so that concurrent compilations run yosys only once
+        with open(os.path.join(self.yosys_store, key + '.lock'), 'w') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            if os.path.isfile(stored_file):
+                print("INFO: Using shared Tech-Independent-BLIF file:", stored_file)
+                return stored_file
+            if not self.run_yosys(yosys_blif_file):
+                return ''
+            tmp_file = '%s.tmp.%d' % (stored_file, os.getpid())
+            shutil.copyfile(yosys_blif_file, tmp_file)
+            os.replace(tmp_file, stored_file)
+            print("INFO: Stored shared Tech-Independent-BLIF file:", stored_file)
+        return stored_file
+
+    @staticmethod
+    def get_script_flag(script, paths):
+        """ Get a stage cache flag of a generated tool script. File paths are replaced by
+            placeholders, so that cached outputs can be restored under any output name
+        """
+        for idx, path in sorted(enumerate(paths), key=lambda item: -len(item[1])):
+            script = script.replace(path, '<file%d>' % idx)
+        return 'script=' + hashlib.sha256(script.encode()).hexdigest()
+
+    def get_yosys_script(self, yosys_blif_file):
+        """ Get the yosys script to synthesize Verilog to Tech-Independent-BLIF """
+        top_module_opt = self.get_top_module_opt()
         impl_type_config = self.get_impl_type_config()
-        print("INFO: Identified Verilog IMPL_TYPE config as:", impl_type_config)
-        yosys_tmpl = textwrap.dedent("""
+        return textwrap.dedent("""
             # Auto Generated by Bit-Serial Compiler: Verilog to Tech-Independent-BLIF
             log "INFO: Read Verilog"
             read -sv %s
@@ -368,6 +629,15 @@ class bitSerialCompiler:
             stat
             write_blif %s
         """ % (" ".join(self.verilog), top_module_opt, impl_type_config, yosys_blif_file))
+
+    def run_yosys(self, yosys_blif_file):
+        """ Synthesize Verilog to Tech-Independent-BLIF using yosys """
+        print("INFO: Creating yosys script (Verilog->Tech-Independent-BLIF)")
+        top_module_opt = self.get_top_module_opt()
+        print("INFO: Identified Verilog top module as:", top_module_opt)
+        impl_type_config = self.get_impl_type_config()
+        print("INFO: Identified Verilog IMPL_TYPE config as:", impl_type_config)
+        yosys_tmpl = self.get_yosys_script(yosys_blif_file)
         yosys_file = os.path.join(self.outdir, self.output + '.yosys')
         with open(yosys_file, 'w') as file:
             file.write(yosys_tmpl)
@@ -377,29 +647,66 @@ class bitSerialCompiler:
         yosys_log_file = os.path.join(self.outdir, self.output + '.yosys.log')
         cmd = [self.yosys_path, '-s', yosys_file, '-l', yosys_log_file]
         self.generate_run_script(cmd, self.output + '.run_yosys.sh')
-        result = subprocess.run(cmd)
-        if result.returncode != 0:
+        success = self.run_stage_cmd('yosys', cmd,
+                input_files=self.verilog,
+                tool_hashes=self.get_tool_hashes([self.yosys_path]),
+                flags=[top_module_opt, impl_type_config,
+                       self.get_script_flag(yosys_tmpl, self.verilog + [yosys_blif_file])],
+                outputs={'.yosys.blif': yosys_blif_file})
+        if not success:
             print('Error: yosys synthesizer failed.')
             return False
         print("INFO: Generated Tech-Independent-BLIF file:", yosys_blif_file)
 
         print(self.hbar)
+        return True
+
+    @staticmethod
+    def get_genlib_name(genlib_file):
+        """ Get the name of a genlib file without directory and suffix """
+        return os.path.splitext(os.path.basename(genlib_file))[0]
+
+    def get_mapped_blif_suffix(self, genlib_file):
+        """ Get the output BLIF suffix of a genlib: .blif, or .<genlib>.blif in batch mode """
+        if len(self.genlib) > 1:
+            return '.' + self.get_genlib_name(genlib_file) + '.blif'
+        return '.blif'
+
+    def get_abc_map_script(self):
+        """ Get the ABC script to tech-map a strashed AIG with each genlib, and the output BLIF files """
+        abc_tmpl = ''
+        if len(self.genlib) > 1:
+            # Batch mode: strash once, then map the same AIG with each genlib
+            abc_tmpl += "backup\n"
+        outputs = {}
+        for idx, genlib in enumerate(self.genlib):
+            suffix = self.get_mapped_blif_suffix(genlib)
+            outputs[suffix] = os.path.join(self.outdir, self.output + suffix)
+            if idx > 0:
+                abc_tmpl += "restore\n"
+            abc_tmpl += textwrap.dedent("""
+                echo "INFO: Reading GenLib %s"
+                read_genlib %s
+                echo "INFO: Tech Mapping"
+                map -v
+                print_stats
+                echo "INFO: Writing BLIF"
+                write_blif %s
+            """ % (genlib, genlib, outputs[suffix]))
+        return abc_tmpl, outputs
+
+    def run_abc(self, yosys_blif_file):
+        """ Tech-map Tech-Independent-BLIF to BLIF using ABC """
         print("INFO: Creating ABC script (Tech-Independent-BLIF->BLIF)")
-        blif_file = os.path.join(self.outdir, self.output + '.blif')
         abc_tmpl = textwrap.dedent("""
             # Auto Generated by Bit-Serial Compiler: Tech-Independent-BLIF to BLIF
             echo "INFO: Reading Tech-Independent-BLIF"
             read_blif %s
             echo "INFO: Structural Hashing"
             strash
-            echo "INFO: Reading GenLib"
-            read_genlib %s
-            echo "INFO: Tech Mapping"
-            map -v
-            print_stats
-            echo "INFO: Writing BLIF"
-            write_blif %s
-        """ % (yosys_blif_file, self.genlib, blif_file))
+        """ % (yosys_blif_file))
+        map_tmpl, outputs = self.get_abc_map_script()
+        abc_tmpl += map_tmpl
         abc_file = os.path.join(self.outdir, self.output + '.abc')
         with open(abc_file, 'w') as file:
             file.write(abc_tmpl)
@@ -408,11 +715,17 @@ class bitSerialCompiler:
         print("INFO: Running ABC to synthesize Tech-Independent-BLIF to BLIF")
         cmd = [self.abc_path, '-f', abc_file]
         self.generate_run_script(cmd, self.output + '.run_abc.sh')
-        result = subprocess.run(cmd)
-        if result.returncode != 0:
+        success = self.run_stage_cmd('abc', cmd,
+                input_files=[yosys_blif_file] + self.genlib,
+                tool_hashes=self.get_tool_hashes([self.abc_path]),
+                flags=list(outputs.keys()) + [self.get_script_flag(abc_tmpl,
+                       [yosys_blif_file] + self.genlib + list(outputs.values()))],
+                outputs=outputs)
+        if not success:
             print('Error: ABC synthesizer failed.')
             return False
-        print("INFO: Generated BLIF file:", blif_file)
+        for blif_file in outputs.values():
+            print("INFO: Generated BLIF file:", blif_file)
 
         print(self.hbar)
         return True
@@ -420,20 +733,15 @@ class bitSerialCompiler:
     def run_verilog_to_blif_abc(self):
         """ Compile Verilog to BLIF using abc verilog frontend """
         print("INFO: Creating ABC script (Verilog->BLIF)")
-        blif_file = os.path.join(self.outdir, self.output + '.blif')
         abc_tmpl = textwrap.dedent("""
             # Auto Generated by Bit-Serial Compiler: Verilog to BLIF
             echo "INFO: Reading Verilog"
             read_verilog %s
             echo "INFO: Structural Hashing"
             strash
-            echo "INFO: Reading GenLib"
-            read_genlib %s
-            echo "INFO: Tech Mapping"
-            map -v
-            echo "INFO: Writing BLIF"
-            write_blif %s
-        """ % (" ".join(self.verilog), self.genlib, blif_file))
+        """ % (" ".join(self.verilog)))
+        map_tmpl, outputs = self.get_abc_map_script()
+        abc_tmpl += map_tmpl
         abc_file = os.path.join(self.outdir, self.output + '.abc')
         with open(abc_file, 'w') as file:
             file.write(abc_tmpl)
@@ -444,7 +752,8 @@ class bitSerialCompiler:
         if result.returncode != 0:
             print('Error: ABC synthesizer failed.')
             return False
-        print("INFO: Generated BLIF file:", blif_file)
+        for blif_file in outputs.values():
+            print("INFO: Generated BLIF file:", blif_file)
 
         print(self.hbar)
         return True
@@ -457,19 +766,45 @@ class bitSerialCompiler:
         blif_translator = os.path.join(script_location, 'src/blif-translator/main.py')
         blif_file = self.blif if self.blif else os.path.join(self.outdir, self.output + '.blif')
         output_file_prefix = os.path.join(self.outdir, self.output)
-        formats = ['asm']
+        formats = ['native'] if self.scheduler == 'native' else ['asm']
         if self.gen_bitwise:
             formats.append('bitwise')
         if self.gen_pim_ir1:
             formats.append('pim_ir1')
         output_formats = ','.join(formats)
         cmd = ['python3', blif_translator, '-f', output_formats, '-i', blif_file, '-m', self.output, '-o', output_file_prefix, '-r', str(self.num_regs), '-p', self.pim_mode]
+        flags = [output_formats, self.output, str(self.num_regs), self.pim_mode]
+        if self.equiv_check:
+            cmd.append('--equiv-check')
+            flags.append('equiv-check')
+        input_files = [blif_file]
+        if self.scheduler == 'native':
+            cmd += self.get_cost_estimation_args()
+            flags += self.get_cost_estimation_args()
+            input_files += self.get_cost_estimation_inputs()
         self.generate_run_script(cmd, self.output + '.run_blif2c.sh')
-        result = subprocess.run(cmd)
-        if result.returncode != 0:
+        if self.scheduler == 'native':
+            outputs = {'.hpp': output_file_prefix + '.hpp'}
+        else:
+            outputs = {'.c': output_file_prefix + '.c'}
+        if self.gen_bitwise:
+            outputs['.bitwise.c'] = output_file_prefix + '.bitwise.c'
+        if self.gen_pim_ir1:
+            outputs['.pim_ir1'] = output_file_prefix + '.pim_ir1'
+        success = self.run_stage_cmd('blif2c', cmd,
+                input_files=input_files,
+                tool_hashes=self.get_python_stage_hashes(blif_translator),
+                flags=flags,
+                outputs=outputs,
+                runner=lambda: self.run_python_stage(blif_translator, 'BlifTranslator', cmd[2:], 'BLIF translation'))
+        if not success:
             print('Error: BLIF to C parser failed.')
             return False
-        print("INFO: Generated C file:", self.output + '.c')
+        if self.scheduler == 'native':
+            self.report_cached_stats(output_file_prefix + '.hpp')
+            print("INFO: Generated C++ file:", self.output + '.hpp')
+        else:
+            print("INFO: Generated C file:", self.output + '.c')
         print("INFO: Allowed number of registers:", self.num_regs)
         if self.gen_bitwise:
             print("INFO: Generated bit-wise C file:", self.output + '.bitwise.c')
@@ -479,6 +814,32 @@ class bitSerialCompiler:
         print(self.hbar)
         return True
 
+    def run_pim_ir1_to_pim(self):
+        """ Compile PIM IR-1 to PIM with native scheduling """
+        print("INFO: Compiling PIM IR-1 to PIM API ...")
+
+        script_location = os.path.dirname(os.path.abspath(__file__))
+        blif_translator = os.path.join(script_location, 'src/blif-translator/main.py')
+        output_file_prefix = os.path.join(self.outdir, self.output)
+        cpp_file = output_file_prefix + '.hpp'
+        cmd = ['python3', blif_translator, '-f', 'native', '-i', self.pim_ir1, '-m', self.output, '-o', output_file_prefix, '-r', str(self.num_regs), '-p', self.pim_mode]
+        cmd += self.get_cost_estimation_args()
+        self.generate_run_script(cmd, self.output + '.run_ir12pim.sh')
+        success = self.run_stage_cmd('ir12pim', cmd,
+                input_files=[self.pim_ir1] + self.get_cost_estimation_inputs(),
+                tool_hashes=self.get_python_stage_hashes(blif_translator),
+                flags=[self.output, str(self.num_regs), self.pim_mode] + self.get_cost_estimation_args(),
+                outputs={'.hpp': cpp_file},
+                runner=lambda: self.run_python_stage(blif_translator, 'BlifTranslator', cmd[2:], 'PIM IR-1 translation'))
+        if not success:
+            print('Error: PIM IR-1 to PIM API translation failed.')
+            return False
+        self.report_cached_stats(cpp_file)
+        print("INFO: Generated C++ file:", self.output + '.hpp')
+
+        print(self.hbar)
+        return True
+
     def run_c_to_asm(self):
         """ Compile C to ASM """
         print("INFO: Compiling C to RISC-V ASM ...")
@@ -491,8 +852,12 @@ class bitSerialCompiler:
         if self.llvm_args:
             cmd += self.llvm_args.split()
         self.generate_run_script(cmd, self.output + '.run_clang.sh')
-        result = subprocess.run(cmd)
-        if result.returncode != 0:
+        success = self.run_stage_cmd('clang', cmd,
+                input_files=[c_file],
+                tool_hashes=self.get_tool_hashes([self.clang_path]),
+                flags=[str(self.clang_g), self.llvm_args],
+                outputs={'.s': asm_file})
+        if not success:
             print('Error: CLANG/LLVM failed.')
             return False
         print("INFO: Generated ASM file:", self.output + '.s')
@@ -509,16 +874,33 @@ class bitSerialCompiler:
         asm_file = os.path.join(self.outdir, self.output + '.s')
         cpp_file = os.path.join(self.outdir, self.output + '.hpp')
         cmd = ['python3', asm_translator, '-f', 'cpp', '-i', asm_file, '-m', self.output, '-o', cpp_file, '-r', str(self.num_regs), '-p', self.pim_mode]
+        cmd += self.get_cost_estimation_args()
         self.generate_run_script(cmd, self.output + '.run_asm2pim.sh')
-        result = subprocess.run(cmd)
-        if result.returncode != 0:
+        success = self.run_stage_cmd('asm2pim', cmd,
+                input_files=[asm_file] + self.get_cost_estimation_inputs(),
+                tool_hashes=self.get_python_stage_hashes(asm_translator),
+                flags=[self.output, str(self.num_regs), self.pim_mode] + self.get_cost_estimation_args(),
+                outputs={'.hpp': cpp_file},
+                runner=lambda: self.run_python_stage(asm_translator, 'AsmToPimTranslator', cmd[2:], 'ASM translation'))
+        if not success:
             print('Error: CLANG/LLVM failed.')
             return False
+        self.report_cached_stats(cpp_file)
         print("INFO: Generated C++ file:", self.output + '.hpp')
 
         print(self.hbar)
         return True
 
+    def report_cached_stats(self, cpp_file):
+        """ Report #R/#W/#L stats of a C++ file restored from the stage cache """
+        if not self.last_stage_cache_hit:
+            return
+        with open(cpp_file, 'r') as file:
+            first_line = file.readline().strip()
+        # Note: Regression scripts grep the stats line printed by the ASM translator
+        if first_line.startswith('//#R/#W/#L'):
+            print("Info: ", first_line[2:])
+
     def run_pim_to_test(self):
         """Generate PIMeval test"""
         print("INFO: Generating Test for PIM API ...")
@@ -529,8 +911,9 @@ class bitSerialCompiler:
         if not self.golden_function_path is None:
             cmd.extend(['-g', self.golden_function_path])
         self.generate_run_script(cmd, self.output + '.run_test_gen.sh')
-        result = subprocess.run(cmd)
-        if result.returncode != 0:
+        success = self.run_cmd(cmd,
+                runner=lambda: self.run_python_stage(test_gen, 'TestCodeGenerator', cmd[2:], 'Test Generation'))
+        if not success:
             print('Error: Test Gen failed.')
 
         print(self.hbar)
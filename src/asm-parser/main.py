@@ -11,72 +11,122 @@ Date: 2024-09-27
 import sys
 import argparse
 import os
+import traceback
 from parser import Parser
 from asm_translator import AsmTranslator
+
+# Shared modules in the parent directory
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from util import *
 from stats_generator import StatsGenerator
+from cost_estimator import CostEstimator
 from code_gen_pimeval_digital import PimEvalAPIDigitalCodeGenerator
 from code_gen_pimeval_analog import PimEvalAPIAnalogCodeGenerator
 
-sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
-from util import *
 
+class AsmToPimTranslator:
+    """ Bit-serial code generator from RISC-V assembly to bit-serial assembly or PIMeval API """
 
-if __name__ == "__main__":
-    # Set up argument parser with optional arguments
-    parser = argparse.ArgumentParser(description='Parse RISV assembly and generate either bit-serial assembly or PIMeval API function.')
-    parser.add_argument('--input-file', '-i', type=str, required=True, help='The input assembly file.')
-    parser.add_argument('--output-file', '-o', type=str, required=True, help='The output C++ file.')
-    parser.add_argument('--module-name', '-m', type=str, required=True, help='The name of the module to parse.')
-    parser.add_argument('--output-format', '-f', type=str, required=True, help='Output format: asm or cpp.')
-    parser.add_argument('--pim-mode', '-p', type=str, default='digital', help='The PIM architecture mode (analog/digital).')
-    parser.add_argument('--num-regs', '-r', type=int, default=4, choices=range(2, 16), help='Number of registers (2-16).')
-
-    # Parse the arguments
-    args = parser.parse_args()
-
-    # Read the file content as lines
-    lines = getFileLines(args.input_file)
-
-    # Parser ctor
-    parser = Parser(moduleName=args.module_name)
-
-    # Parse the circuit representation
-    parser.parse(lines)
-    riscvStatementList = parser.statementList
-    inputList = list(set(parser.inputList))
-    outputList = list(set(parser.outputList))
-
-    debugLevel = 0
-
-    # Transrom the riscv assembly to bit-serial assembly
-    asmTranslator = AsmTranslator(riscvStatementList, inputList, outputList, pimMode=args.pim_mode, numRegs=args.num_regs, debugLevel=debugLevel)
-    asmTranslator.translate()
-    asmTranslator.post_translation_optimization()
-    bitSerialAsm = asmTranslator.getBitSerialAsm()
-
-    statsGenerator = StatsGenerator(bitSerialAsm)
-    stats = statsGenerator.generateStats()
-
-    print("Info: ", stats)
-
-    if args.output_format == "asm":
-        # Generate bit-serial assembly code
-        generator = bitSerialAsmCodeGenerator(bitSerialAsm)
-        code = "#" + stats + "\n"
-        code += generator.generateCode()
-    elif args.output_format == "cpp":
-        generatorClassMap = {
-            "analog": PimEvalAPIAnalogCodeGenerator,
-            "digital": PimEvalAPIDigitalCodeGenerator,
-        }
-        if args.pim_mode not in generatorClassMap:
-            raise ValueError(f"Error: Unsupported PIM mode: {args.pim_mode}")
-        generatorClass = generatorClassMap[args.pim_mode]
-        codeGenerator = generatorClass(bitSerialAsm, args.module_name, asmTranslator.ports)
-        code = f"//{stats}\n" + codeGenerator.generateCode()
-    else:
-        raise ValueError(f"Error: Unknown output format {args.output_format}")
-
-    # Write the generated ASM/C++ code into a file
-    writeToFile(args.output_file, code)
+    def __init__(self):
+        """ Init """
+        self.input_file = ''
+        self.output_file = ''
+        self.module_name = ''
+        self.output_format = ''
+        self.pim_mode = ''
+        self.num_regs = 0
+        self.tck_ns = 0
+        self.energy_table = ''
+        self.stats = ''
+
+    def parse_args(self, input_args):
+        """ Parse command line arguments """
+        # Set up argument parser with optional arguments
+        parser = argparse.ArgumentParser(description='Parse RISV assembly and generate either bit-serial assembly or PIMeval API function.')
+        parser.add_argument('--input-file', '-i', type=str, required=True, help='The input assembly file.')
+        parser.add_argument('--output-file', '-o', type=str, required=True, help='The output C++ file.')
+        parser.add_argument('--module-name', '-m', type=str, required=True, help='The name of the module to parse.')
+        parser.add_argument('--output-format', '-f', type=str, required=True, help='Output format: asm or cpp.')
+        parser.add_argument('--pim-mode', '-p', type=str, default='digital', help='The PIM architecture mode (analog/digital).')
+        parser.add_argument('--num-regs', '-r', type=int, default=4, choices=range(2, 16), help='Number of registers (2-16).')
+        parser.add_argument('--tck-ns', type=float, default=CostEstimator.DEFAULT_TCK_NS, help='DRAM tCK in ns for cost estimation.')
+        parser.add_argument('--energy-table', type=str, default='', help='JSON file of per-opcode energy in pJ for cost estimation.')
+
+        # Parse the arguments
+        args = parser.parse_args(input_args)
+
+        self.input_file = args.input_file
+        self.output_file = args.output_file
+        self.module_name = args.module_name
+        self.output_format = args.output_format
+        self.pim_mode = args.pim_mode
+        self.num_regs = args.num_regs
+        self.tck_ns = args.tck_ns
+        self.energy_table = args.energy_table
+
+    def run(self, input_args):
+        """ Translate RISC-V assembly and write the generated code. Return the stats string """
+        self.parse_args(input_args)
+
+        # Read the file content as lines
+        lines = getFileLines(self.input_file)
 
+        # Parser ctor
+        parser = Parser(moduleName=self.module_name)
+
+        # Parse the circuit representation
+        parser.parse(lines)
+        riscvStatementList = parser.statementList
+        inputList = list(set(parser.inputList))
+        outputList = list(set(parser.outputList))
+
+        debugLevel = 0
+
+        # Transrom the riscv assembly to bit-serial assembly
+        asmTranslator = AsmTranslator(riscvStatementList, inputList, outputList, pimMode=self.pim_mode, numRegs=self.num_regs, debugLevel=debugLevel)
+        asmTranslator.translate()
+        asmTranslator.post_translation_optimization()
+        bitSerialAsm = asmTranslator.getBitSerialAsm()
+
+        statsGenerator = StatsGenerator(bitSerialAsm)
+        stats = statsGenerator.generateStats()
+        self.stats = stats
+
+        print("Info: ", stats)
+
+        energyTable = CostEstimator.load_energy_table(self.energy_table) if self.energy_table else None
+        CostEstimator(bitSerialAsm, self.pim_mode, self.tck_ns, energyTable).estimate().report()
+
+        if self.output_format == "asm":
+            # Generate bit-serial assembly code
+            generator = bitSerialAsmCodeGenerator(bitSerialAsm)
+            code = "#" + stats + "\n"
+            code += generator.generateCode()
+        elif self.output_format == "cpp":
+            generatorClassMap = {
+                "analog": PimEvalAPIAnalogCodeGenerator,
+                "digital": PimEvalAPIDigitalCodeGenerator,
+            }
+            if self.pim_mode not in generatorClassMap:
+                raise ValueError(f"Error: Unsupported PIM mode: {self.pim_mode}")
+            generatorClass = generatorClassMap[self.pim_mode]
+            codeGenerator = generatorClass(bitSerialAsm, self.module_name, asmTranslator.ports)
+            code = f"//{stats}\n" + codeGenerator.generateCode()
+        else:
+            raise ValueError(f"Error: Unknown output format {self.output_format}")
+
+        # Write the generated ASM/C++ code into a file
+        writeToFile(self.output_file, code)
+        return stats
+
+
+# Main entry point
+if __name__ == "__main__":
+    asm_to_pim_translator = AsmToPimTranslator()
+    try:
+        asm_to_pim_translator.run(sys.argv[1:])
+        sys.exit(0)
+    except Exception as e:
+        traceback.print_exc()
+        print(f"Error: ASM translation failed: {e}")
+        sys.exit(1)
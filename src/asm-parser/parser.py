@@ -9,10 +9,10 @@ Date: 2024-09-27
 """
 
 import re
-
-class Statement:
-    def __init__(self, line):
-        self.line = line
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from asm_instruction import Statement, Instruction
 
 class Directive(Statement):
     def __init__(self, val, line):
@@ -22,52 +22,6 @@ class Directive(Statement):
     def __str__(self):
         return f"{self.val:<32} | Line {self.line:<5})"
 
-class Instruction(Statement):
-    def __init__(self, opCode, operandsList, line):
-        super().__init__(line)
-        self.opCode = opCode
-        self.operandsList = operandsList
-
-    def __str__(self):
-        operandsListStr = ', '.join(self.operandsList)
-        return f"{self.opCode:<10} {operandsListStr:<32} | Line {self.line})"
-
-    def isLoadInstruction(self):
-        if "lw" in self.opCode:
-            return True
-        else:
-            return False
-
-    def isStoreInstruction(self):
-        if "sw" in self.opCode:
-            return True
-        else:
-            return False
-
-    def isMoveInstruction(self):
-        if "mv" in self.opCode:
-            return True
-        else:
-            return False
-
-    def isReadInstruction(self):
-        if "read" in self.opCode:
-            return True
-        else:
-            return False
-
-    def isWriteInstruction(self):
-        if "write" in self.opCode:
-            return True
-        else:
-            return False
-
-    def getOpCode(self):
-        return self.opCode
-
-    def getOperandsList(self):
-        return self.operandsList
-
 class PortInfo(Statement):
     def __init__(self, varName, line):
         super().__init__(line)
@@ -0,0 +1,135 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+File: asm_instruction.py
+Description: Instruction classes of RISC-V assembly and bit-serial code, shared by the ASM parser and the native scheduler
+Author: Mohammadhosein Gholamrezaei <uab9qt@virginia.edu>
+Author: Deyuan Guo <guodeyuan@gmail.com> - Analog PIM support
+Date: 2024-09-27
+"""
+
+class Statement:
+    def __init__(self, line):
+        self.line = line
+
+class Instruction(Statement):
+    def __init__(self, opCode, operandsList, line):
+        super().__init__(line)
+        self.opCode = opCode
+        self.operandsList = operandsList
+
+    def __str__(self):
+        operandsListStr = ', '.join(self.operandsList)
+        return f"{self.opCode:<10} {operandsListStr:<32} | Line {self.line})"
+
+    def isLoadInstruction(self):
+        if "lw" in self.opCode:
+            return True
+        else:
+            return False
+
+    def isStoreInstruction(self):
+        if "sw" in self.opCode:
+            return True
+        else:
+            return False
+
+    def isMoveInstruction(self):
+        if "mv" in self.opCode:
+            return True
+        else:
+            return False
+
+    def isReadInstruction(self):
+        if "read" in self.opCode:
+            return True
+        else:
+            return False
+
+    def isWriteInstruction(self):
+        if "write" in self.opCode:
+            return True
+        else:
+            return False
+
+    def getOpCode(self):
+        return self.opCode
+
+    def getOperandsList(self):
+        return self.operandsList
+
+class LinkedInstruction(Instruction):
+    def __init__(self, opCode, operandsList, line, sourceInstructionList = None, suspended = False):
+        super().__init__(opCode, operandsList, line)
+        self.sourceInstructionList = sourceInstructionList
+        self.suspended = suspended
+
+    def __str__(self):
+        operandsListStr = ', '.join(self.operandsList)
+        sourceInstructionLinesStr = "X" if self.sourceInstructionList is None else \
+            ', '.join(str(instr.line) if instr is not None else "-" for instr in self.sourceInstructionList)
+        return f"{self.opCode:<10} {operandsListStr:<32} | Line {self.line}, SrcLines [{sourceInstructionLinesStr}], Suspended: {self.suspended}"
+
+    def unsuspend(self):
+        self.suspended = False
+
+    def get_opcode(self):
+        return self.opCode
+
+    def get_src_operands(self):
+        return self.get_src_operands_from_opcode(self.opCode, self.operandsList)
+
+    def get_dest_operands(self):
+        return self.get_dest_operands_from_opcode(self.opCode, self.operandsList)
+
+    @staticmethod
+    def get_src_operands_from_opcode(opcode, operands_list):
+        if opcode == "write":
+            return [operands_list[0]]
+        elif opcode.startswith("maj3"):
+            return operands_list[-3:]
+        elif opcode in ["copy", "mv"]:
+            return operands_list[-1:]
+        elif opcode in ["zero", "one"]:
+            return []
+        else:
+            return operands_list[1:]
+
+    @staticmethod
+    def get_dest_operands_from_opcode(opcode, operands_list):
+        """ Get all destination operands based on opCode and operandsList """
+        # In analog PIM, there can be multiple dest operands for maj/copy/mv/zero/one
+        if opcode == "write":
+            return [operands_list[1]]
+        elif opcode.startswith("maj3"):
+            return operands_list[:-3]
+        elif opcode in ["copy", "mv"]:
+            return operands_list[:-1]
+        elif opcode in ["zero", "one"]:
+            return operands_list
+        else:
+            return [operands_list[0]]
+
+
+class TempManager:
+    def __init__(self):
+        self.isAllocated = []  # Example: [True, True, False, True]
+
+    def newTemp(self):
+        # Find the first False and set it to True, then return the index
+        for i, allocated in enumerate(self.isAllocated):
+            if not allocated:
+                self.isAllocated[i] = True
+                return i
+        # If no False is found, append a new True and return its index
+        self.isAllocated.append(True)
+        return len(self.isAllocated) - 1
+
+    def freeTemp(self, tempStr):
+        # Assumption: tempStr is in format temp%d
+        index = int(tempStr[4:])
+        # Set the element at the specified index to False
+        if 0 <= index < len(self.isAllocated):
+            self.isAllocated[index] = False
+        else:
+            raise IndexError("Index out of bounds")
@@ -8,20 +8,19 @@ Author: Deyaun Guo <guodeyuan@gmail.com>
 Date: 2025-05-28
 """
 
-import json
 import copy
 from collections import defaultdict, deque
-from networkx.readwrite import json_graph
-from pyvis.network import Network
 import networkx as nx
 from blif_dag_verification import DagVerifier
+from blif_dag_snapshot import DagSnapshot
 import blif_dag_topo_sort
 
 
 class DAG:
     """ Directed Acyclic Graph (DAG) representation of a circuit """
 
-    def __init__(self, module_name='', in_ports=None, out_ports=None, gate_info_list=None, pim_mode='digital', debug_level=0):
+    def __init__(self, module_name='', in_ports=None, out_ports=None, gate_info_list=None, pim_mode='digital', debug_level=0,
+                 verifier_options=None):
         """
         DAG description:
         * Node
@@ -43,11 +42,14 @@ class DAG:
             - APIs:
                 - graph.add_edge(fanin_gate_id, gate_id): Add an edge from fanin gate to gate
                 - graph[fanin_gate_id][gate_id]: Access edge information dictionary by fanin and fanout gate IDs
+            - Wire index: wire_name -> (fanin gate IDs, fanout gate IDs)
+                - Maintained by add_wire, remove_wire and rename_wire. Do not modify edges directly
         * Input parameters:
             - module_name: Name of the module
             - in_ports: List of input ports. Each port has a gate and a wire of the same name
             - out_ports: List of output ports. Each port has a gate and a wire of the same name
             - gate_info_list: List of gate info from BlifParser to initialize the DAG
+            - verifier_options: Keyword arguments of DagVerifier, e.g. mode, budget and seed
         """
         self.graph = nx.DiGraph()
         self.module_name = module_name
@@ -55,10 +57,16 @@ class DAG:
         self.__out_ports = []  # To preserve order of output ports
         self.pim_mode = pim_mode
         self.debug_level = debug_level
+        self.verifier_options = dict(verifier_options or {})
         self.wire_segment_marker = '_$'
         self.topo_sort_algorithm = 1
+        self.__wire_index = {}  # wire_name -> (set of fanin gate IDs, set of fanout gate IDs)
+        self.__gate_id_counters = {}  # gate ID prefix -> last used suffix
+        self.__wire_name_counters = {}  # wire name prefix -> last used suffix
+        self.__version = 0  # bumped on every structural change
+        self.__topo_cache = None  # (version, algorithm, topo sorted gate ID list)
         self.initialize(in_ports, out_ports, gate_info_list)
-        self.verifier = DagVerifier(dag=self, debug_level=debug_level)
+        self.verifier = DagVerifier(dag=self, debug_level=debug_level, **self.verifier_options)
 
     def raise_exception(self, message):
         """ Helper function to raise an exception with a message """
@@ -72,12 +80,50 @@ class DAG:
         """ Create a deep copy of the DAG """
         new_dag = DAG(module_name=self.module_name,
                       in_ports=[], out_ports=[], gate_info_list=[],
-                      debug_level=self.debug_level)
+                      debug_level=self.debug_level, verifier_options=self.verifier_options)
         new_dag.graph = copy.deepcopy(self.graph, memo)
         new_dag.__in_ports = self.get_in_ports()
         new_dag.__out_ports = self.get_out_ports()
+        new_dag.__gate_id_counters = self.__gate_id_counters.copy()
+        new_dag.__wire_name_counters = self.__wire_name_counters.copy()
+        new_dag.rebuild_wire_index()
+        new_dag.mark_modified()
         return new_dag
 
+    def mark_modified(self):
+        """ Mark the DAG as modified to invalidate cached analysis such as topological order """
+        self.__version += 1
+
+    def get_version(self):
+        """ Get the DAG version, which changes whenever the DAG is modified """
+        return self.__version
+
+    def rebuild_wire_index(self):
+        """ Rebuild the wire index from graph edges """
+        self.__wire_index = {}
+        for from_gate_id, to_gate_id, edge_data in self.graph.edges(data=True):
+            self.add_wire_to_index(edge_data.get('wire_name', None), from_gate_id, to_gate_id)
+
+    def add_wire_to_index(self, wire_name, fanin_gate_id, fanout_gate_id):
+        """ Add a wire edge to the wire index """
+        fanins, fanouts = self.__wire_index.setdefault(wire_name, (set(), set()))
+        fanins.add(fanin_gate_id)
+        fanouts.add(fanout_gate_id)
+
+    def remove_wire_from_index(self, wire_name, fanin_gate_id, fanout_gate_id):
+        """ Remove a wire edge from the wire index """
+        fanins, fanouts = self.__wire_index[wire_name]
+        # Note: The edge is already removed or renamed. Keep the index exact even if a fanin or
+        #       fanout gate still connects to the same wire name through other edges
+        if not any(self.graph[fanin_gate_id][gate_id]['wire_name'] == wire_name
+                   for gate_id in self.graph.successors(fanin_gate_id)):
+            fanins.discard(fanin_gate_id)
+        if not any(self.graph[gate_id][fanout_gate_id]['wire_name'] == wire_name
+                   for gate_id in self.graph.predecessors(fanout_gate_id)):
+            fanouts.discard(fanout_gate_id)
+        if not fanins and not fanouts:
+            del self.__wire_index[wire_name]
+
     def initialize(self, in_ports, out_ports, gate_info_list):
         """ Initialize DAG nodes and edges """
         if in_ports is None or out_ports is None or gate_info_list is None:
@@ -98,17 +144,18 @@ class DAG:
             gate_outputs = gate_info.outputs
             self.add_gate(gate_id=gate_id, gate_func=gate_func, inputs=gate_inputs, outputs=gate_outputs)
         # Connect wires
-        wire_fanins = defaultdict(set)
-        wire_fanouts = defaultdict(set)
+        # Note: Use dicts as ordered sets, so that edge order does not depend on string hashing
+        wire_fanins = defaultdict(dict)
+        wire_fanouts = defaultdict(dict)
         for gate_info in gate_info_list:
             gate_id = gate_info.gate_id
             gate_inputs = gate_info.inputs
             gate_outputs = gate_info.outputs
             for wire in gate_inputs:
-                wire_fanouts[wire].add(gate_id)
+                wire_fanouts[wire][gate_id] = None
             for wire in gate_outputs:
-                wire_fanins[wire].add(gate_id)
-        for wire in set(wire_fanins.keys()).union(wire_fanouts.keys()):
+                wire_fanins[wire][gate_id] = None
+        for wire in dict.fromkeys(list(wire_fanins.keys()) + list(wire_fanouts.keys())):
             fanins = wire_fanins.get(wire, [])
             fanouts = wire_fanouts.get(wire, [])
             #if not fanins and not fanouts:
@@ -124,7 +171,7 @@ class DAG:
                     self.add_wire(wire_name=wire, fanin_gate_id=fanin_gate_id, fanout_gate_id=gate_id)
             else:
                 if len(fanins) != 1:
-                    self.raise_exception(f"Wire '{wire}' has multiple fanins: {fanins}. Expected a single fanin.")
+                    self.raise_exception(f"Wire '{wire}' has multiple fanins: {list(fanins)}. Expected a single fanin.")
                 fanin_gate_id = next(iter(fanins))
                 # Special case: If wire is with an output port name, connect it to the port gate first
                 # It is legal to use such wire as inputs of internal logic, so it can have multiple fanouts
@@ -150,6 +197,7 @@ class DAG:
                             inputs=inputs.copy(),
                             outputs=outputs.copy(),
                             inverted=set())
+        self.mark_modified()
         if self.debug_level >= 4:
             print(f"INFO: Added gate '{gate_id}' with function '{gate_func}' | Inputs: {inputs} | Outputs: {outputs}")
 
@@ -164,6 +212,7 @@ class DAG:
                 print(f'Edge: {u} -> {v} | Attr: {edge_data}')
             self.raise_exception(f"Cannot remove gate '{gate_id}': it has connected wires.")
         self.graph.remove_node(gate_id)
+        self.mark_modified()
         if self.debug_level >= 4:
             print(f"INFO: Removed gate '{gate_id}' from the DAG")
 
@@ -174,6 +223,8 @@ class DAG:
         if self.graph.has_edge(fanin_gate_id, fanout_gate_id):
             self.raise_exception(f"Wire '{wire_name}' already exists between {fanin_gate_id} and {fanout_gate_id}.")
         self.graph.add_edge(fanin_gate_id, fanout_gate_id, wire_name=wire_name)
+        self.add_wire_to_index(wire_name, fanin_gate_id, fanout_gate_id)
+        self.mark_modified()
         if self.debug_level >= 4:
             print(f"INFO: Added wire '{wire_name}' from {fanin_gate_id} to {fanout_gate_id}")
 
@@ -183,9 +234,30 @@ class DAG:
             self.raise_exception(f"Wire does not exist between {fanin_gate_id} and {fanout_gate_id}.")
         wire_name = self.graph[fanin_gate_id][fanout_gate_id]['wire_name']
         self.graph.remove_edge(fanin_gate_id, fanout_gate_id)
+        self.remove_wire_from_index(wire_name, fanin_gate_id, fanout_gate_id)
+        self.mark_modified()
         if self.debug_level >= 4:
             print(f"INFO: Removed wire '{wire_name}' from {fanin_gate_id} to {fanout_gate_id}")
 
+    def rename_wire(self, fanin_gate_id, fanout_gate_id, new_wire_name):
+        """ Rename a wire (single edge only) without changing gate inputs/outputs """
+        if not self.graph.has_edge(fanin_gate_id, fanout_gate_id):
+            self.raise_exception(f"Wire does not exist between {fanin_gate_id} and {fanout_gate_id}.")
+        wire_name = self.graph[fanin_gate_id][fanout_gate_id]['wire_name']
+        self.graph[fanin_gate_id][fanout_gate_id]['wire_name'] = new_wire_name
+        self.remove_wire_from_index(wire_name, fanin_gate_id, fanout_gate_id)
+        self.add_wire_to_index(new_wire_name, fanin_gate_id, fanout_gate_id)
+        if self.debug_level >= 4:
+            print(f"INFO: Renamed wire '{wire_name}' to '{new_wire_name}' from {fanin_gate_id} to {fanout_gate_id}")
+
+    def set_gate_func(self, gate_id, gate_func):
+        """ Change the function of a gate """
+        if not self.graph.has_node(gate_id):
+            self.raise_exception(f"Gate ID '{gate_id}' does not exist in the DAG.")
+        self.graph.nodes[gate_id]['gate_func'] = gate_func
+        # Scheduling heuristics depend on gate functions
+        self.mark_modified()
+
     def replace_output_wire(self, gate_id, old_wire_name, new_wire_name):
         """ Replace an output wire of a gate with a new wire name """
         if not self.graph.has_node(gate_id):
@@ -224,7 +296,7 @@ class DAG:
             wire_name = edge_data.get('wire_name', None)
             if self.is_same_wire(wire_name, old_wire_name):
                 next_wire_name = self.generate_unique_wire_segment_name(new_wire_name)
-                self.graph[gate_id][to_gate_id]['wire_name'] = next_wire_name
+                self.rename_wire(gate_id, to_gate_id, next_wire_name)
                 self.replace_input_wire(to_gate_id, wire_name, next_wire_name)
 
     def invert_input_wire(self, gate_id, target_wire_name):
@@ -254,21 +326,20 @@ class DAG:
 
     def uniqufy_gate_id(self, new_gate_id):
         """ Ensure the new gate ID is unique by appending a suffix """
-        suffix = 1
+        # Per-prefix counter. Still probe the graph in case a gate with the same name was added directly
+        suffix = self.__gate_id_counters.get(new_gate_id, 0) + 1
         while f"{new_gate_id}_{suffix}" in self.graph:
             suffix += 1
+        self.__gate_id_counters[new_gate_id] = suffix
         return f"{new_gate_id}_{suffix}"
 
     def uniqufy_wire_name(self, new_wire_name):
         """ Ensure the new wire name is unique by appending a suffix """
-        # TODO: Improve efficiency
-        wire_names = set()
-        for _, _, edge_data in self.graph.edges(data=True):
-            wire_name = edge_data.get('wire_name', None)
-            wire_names.add(wire_name)
-        suffix = 1
-        while f'{new_wire_name}_{suffix}' in wire_names:
+        # Per-prefix counter. Still probe the wire index in case a wire with the same name was added directly
+        suffix = self.__wire_name_counters.get(new_wire_name, 0) + 1
+        while f'{new_wire_name}_{suffix}' in self.__wire_index:
             suffix += 1
+        self.__wire_name_counters[new_wire_name] = suffix
         if self.debug_level >= 4:
             print(f"INFO: Generated unique wire name: {new_wire_name}_{suffix}")
         return f"{new_wire_name}_{suffix}"
@@ -359,19 +430,15 @@ class DAG:
 
     def get_wire_fanin_gate_ids(self, wire_name):
         """ Get the fanin gate IDs for a given wire name """
-        gate_ids = set()
-        for from_gate_id, _, edge_data in self.graph.edges(data=True):
-            if wire_name == edge_data.get('wire_name', None):
-                gate_ids.add(from_gate_id)
-        return sorted(list(gate_ids))
+        if wire_name not in self.__wire_index:
+            return []
+        return sorted(self.__wire_index[wire_name][0])
 
     def get_wire_fanout_gate_ids(self, wire_name):
         """ Get the fanout gate IDs for a given wire name """
-        gate_ids = set()
-        for _, to_gate_id, edge_data in self.graph.edges(data=True):
-            if wire_name == edge_data.get('wire_name', None):
-                gate_ids.add(to_gate_id)
-        return sorted(list(gate_ids))
+        if wire_name not in self.__wire_index:
+            return []
+        return sorted(self.__wire_index[wire_name][1])
 
     def get_wire_name(self, from_gate_id, to_gate_id):
         """ Get the wire name connecting two gates """
@@ -381,11 +448,17 @@ class DAG:
 
     def get_topo_sorted_gate_id_list(self):
         """ Get a list of all gates in topological order """
-        return blif_dag_topo_sort.get_topo_sorted_gate_id_list(self)
+        # Reuse the cached order until the DAG or the sorting algorithm changes
+        cache = self.__topo_cache
+        if cache is None or cache[0] != self.__version or cache[1] != self.topo_sort_algorithm:
+            order = blif_dag_topo_sort.get_topo_sorted_gate_id_list(self)
+            cache = (self.__version, self.topo_sort_algorithm, order)
+            self.__topo_cache = cache
+        return cache[2].copy()
 
     def get_wire_name_list(self, skip_port=True, merge_segments=True):
         """ Get a list of internal wires in sorted gate order """
-        wire_names = set()
+        wire_names = {}  # Note: Use a dict as an ordered set
         gate_ids = self.get_topo_sorted_gate_id_list()
         for gate_id in gate_ids:
             for _, _, edge_data in self.graph.out_edges(gate_id, data=True):
@@ -396,7 +469,7 @@ class DAG:
                     wire_name = self.get_wire_base_name(wire_name)
                 if skip_port and (self.is_in_port(wire_name) or self.is_out_port(wire_name)):
                     continue  # skip ports
-                wire_names.add(wire_name)
+                wire_names[wire_name] = None
         return list(wire_names)
 
     def get_reusable_inout_wires(self, gate_id):
@@ -472,11 +545,17 @@ class DAG:
                 self.raise_exception(f"Edge without wire_name found between {from_gate_id} and {to_gate_id}.")
             wire_fanins.setdefault(wire_name, set()).add(from_gate_id)
             wire_fanouts.setdefault(wire_name, set()).add(to_gate_id)
+        # Check the wire index against graph edges
+        if len(self.__wire_index) != len(wire_fanins):
+            self.raise_exception(f"Wire index has {len(self.__wire_index)} wires, expected {len(wire_fanins)}.")
+        for wire_name, (fanins, fanouts) in self.__wire_index.items():
+            if fanins != wire_fanins.get(wire_name) or fanouts != wire_fanouts.get(wire_name):
+                self.raise_exception(f"Wire index of '{wire_name}' is out of sync with graph edges.")
         for wire_name in set(wire_fanins.keys()).union(wire_fanouts.keys()):
             fanins = wire_fanins.get(wire_name, set())
             fanouts = wire_fanouts.get(wire_name, set())
             if len(fanins) != 1:
-                self.raise_exception(f"Wire '{wire_name}' has multiple fanins: {fanins}. Expected a single fanin.")
+                self.raise_exception(f"Wire '{wire_name}' has multiple fanins: {list(fanins)}. Expected a single fanin.")
             if not fanouts:
                 self.raise_exception(f"Wire '{wire_name}' has no fanouts: {fanouts}. Expected at least one fanout.")
         # Check wire segments branching
@@ -569,22 +648,15 @@ class DAG:
     @staticmethod
     def save_dag_as_json(dag, file_path):
         """ Save the DAG as a JSON file """
-        # Export graph with embedded attributes
-        dag = copy.deepcopy(dag)  # Avoid modifying the original DAG
-        for node, data in dag.graph.nodes(data=True):
-            # Ensure all attributes are serializable
-            data['inverted'] = list(data.get('inverted', set()))
-        data = json_graph.node_link_data(dag.graph, edges="links")
-        with open(file_path, "w") as f:
-            json.dump(data, f, indent=2)
+        import blif_dag_export
+        blif_dag_export.save_graph_as_json(dag.graph, file_path)
 
     @staticmethod
-    def load_dag_from_json(file_path):
+    def load_dag_from_json(file_path, verifier_options=None):
         """ Load a DAG from a JSON file """
-        with open(file_path) as f:
-            data = json.load(f)
-        dag = DAG()
-        dag.graph = json_graph.node_link_graph(data, edges="links")
+        import blif_dag_export
+        dag = DAG(in_ports=[], out_ports=[], gate_info_list=[], verifier_options=verifier_options)
+        dag.graph = blif_dag_export.load_graph_from_json(file_path)
 
         # Note: in_ports and out_port are not in exact order as in the original DAG
         for node, data in dag.graph.nodes(data=True):
@@ -592,36 +664,47 @@ class DAG:
                 dag.__in_ports.append(node)
             elif data.get('gate_func') == 'out_port':
                 dag.__out_ports.append(node)
-            dag.graph.nodes[node]['inverted'] = set(data.get('inverted', []))
+        dag.rebuild_wire_index()
+        dag.mark_modified()
 
         return dag
 
+    @staticmethod
+    def save_dag_snapshot(dag, file_path, checkpoint_tag=''):
+        """ Save the DAG as a binary snapshot with a checkpoint tag, see DagSnapshot """
+        state = {
+            'checkpoint_tag': checkpoint_tag,
+            'module_name': dag.module_name,
+            'pim_mode': dag.pim_mode,
+            'wire_segment_marker': dag.wire_segment_marker,
+            'topo_sort_algorithm': dag.topo_sort_algorithm,
+            'in_ports': dag.get_in_ports(),
+            'out_ports': dag.get_out_ports(),
+            'gate_id_counters': dag.__gate_id_counters,
+            'wire_name_counters': dag.__wire_name_counters,
+        }
+        DagSnapshot().write(file_path, dag.graph, state)
+
+    @staticmethod
+    def load_dag_snapshot(file_path, debug_level=0, verifier_options=None):
+        """ Load a DAG from a binary snapshot with exact port order. Return the DAG and checkpoint tag """
+        graph = nx.DiGraph()
+        state = DagSnapshot().read(file_path, graph)
+        dag = DAG(module_name=state['module_name'], in_ports=[], out_ports=[], gate_info_list=[],
+                  pim_mode=state['pim_mode'], debug_level=debug_level, verifier_options=verifier_options)
+        dag.graph = graph
+        dag.wire_segment_marker = state['wire_segment_marker']
+        dag.topo_sort_algorithm = state['topo_sort_algorithm']
+        dag.__in_ports = state['in_ports']
+        dag.__out_ports = state['out_ports']
+        dag.__gate_id_counters = state['gate_id_counters']
+        dag.__wire_name_counters = state['wire_name_counters']
+        dag.rebuild_wire_index()
+        dag.mark_modified()
+        return dag, state['checkpoint_tag']
+
     @staticmethod
     def draw_interactive_circuit(dag, output_file="circuit.html"):
         """ Draw an interactive circuit using PyVis """
-        network = Network(height='800px', width='100%', directed=True, notebook=False, filter_menu=True, cdn_resources='remote')
-
-        for gate_id, data in dag.graph.nodes(data=True):
-            gate_func = data.get('gate_func', 'unknown')
-            if gate_func == 'in_port':
-                label = f"{gate_id} ({gate_func[:-5]})"
-                color = "#F9E79F"
-            elif gate_func == 'out_port':
-                label = f"{gate_id} ({gate_func[:-5]})"
-                color = "#F5B7B1"
-            elif gate_func == 'copy':
-                label = f"{gate_id} ({gate_func})"
-                color = "#A9DFBF"
-            else:
-                label = f"{gate_id} ({gate_func})"
-                color = "#AED6F1"
-            network.add_node(gate_id, label=label, shape="box", color=color)
-
-        for u, v, edge_data in dag.graph.edges(data=True):
-            label = edge_data.get('wire_name', 'unknown')
-            network.add_edge(u, v, label=label)
-
-        network.show_buttons(filter_=['physics'])
-        # Save to html file instead of popup with show()
-        network.save_graph(output_file)
-        print(f"Interactive graph saved to: {output_file}")
+        import blif_dag_export
+        blif_dag_export.draw_interactive_circuit(dag.graph, output_file)
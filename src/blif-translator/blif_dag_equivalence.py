@@ -0,0 +1,484 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+File: blif_dag_equivalence.py
+Description: Formal equivalence check of DAG transformation with a built-in SAT solver
+Author: Deyuan Guo <guodeyuan@gmail.com>
+Date: 2026-10-17
+"""
+
+import heapq
+
+
+class SatSolver:
+    """ A small self-contained CDCL SAT solver
+
+    Variables are 1..N and literals are non-zero integers in DIMACS convention. The solver
+    uses two watched literals, first-UIP clause learning, VSIDS variable activities, phase
+    saving and Luby restarts. Clauses can be added between incremental solve calls, and
+    assumptions are decided before any other variable.
+    """
+
+    RESTART_BASE = 100
+    ACTIVITY_DECAY = 0.95
+
+    def __init__(self):
+        self.num_vars = 0
+        self.ok = True  # False if clauses are unsatisfiable without assumptions
+        self.values = [0]  # var -> 1 true, -1 false, 0 unassigned
+        self.levels = [0]
+        self.reasons = [None]
+        self.phases = [-1]
+        self.activities = [0.0]
+        self.watches = {}  # literal -> clauses watching the literal
+        self.trail = []
+        self.trail_lim = []
+        self.qhead = 0
+        self.var_inc = 1.0
+        self.order_heap = []
+        self.num_conflicts = 0
+        self.model = []
+
+    def new_var(self):
+        """ Create a new variable and return it as a positive literal """
+        self.num_vars += 1
+        var = self.num_vars
+        self.values.append(0)
+        self.levels.append(0)
+        self.reasons.append(None)
+        self.phases.append(-1)
+        self.activities.append(0.0)
+        self.watches[var] = []
+        self.watches[-var] = []
+        heapq.heappush(self.order_heap, (0.0, var))
+        return var
+
+    def value(self, lit):
+        """ Get literal value: 1 true, -1 false, 0 unassigned """
+        value = self.values[abs(lit)]
+        return value if lit > 0 else -value
+
+    def add_clause(self, lits):
+        """ Add a clause at decision level 0 """
+        if not self.ok:
+            return
+        self.backtrack(0)
+        clause = []
+        for lit in lits:
+            value = self.value(lit)
+            if value == 1 or -lit in clause:
+                return  # Satisfied or tautology
+            if value == 0 and lit not in clause:
+                clause.append(lit)
+        if not clause:
+            self.ok = False
+        elif len(clause) == 1:
+            self.assign(clause[0], None)
+            self.ok = self.propagate() is None
+        else:
+            self.watches[clause[0]].append(clause)
+            self.watches[clause[1]].append(clause)
+
+    def assign(self, lit, reason):
+        """ Assign a literal to true """
+        var = abs(lit)
+        self.values[var] = 1 if lit > 0 else -1
+        self.levels[var] = len(self.trail_lim)
+        self.reasons[var] = reason
+        self.trail.append(lit)
+
+    def propagate(self):
+        """ Unit propagation. Return a conflict clause or None """
+        values = self.values
+        watches = self.watches
+        trail = self.trail
+        while self.qhead < len(trail):
+            false_lit = -trail[self.qhead]
+            self.qhead += 1
+            watch_list = watches[false_lit]
+            num_watches = len(watch_list)
+            i = j = 0
+            while i < num_watches:
+                clause = watch_list[i]
+                i += 1
+                # Keep the false literal at position 1
+                if clause[0] == false_lit:
+                    clause[0], clause[1] = clause[1], false_lit
+                first = clause[0]
+                first_value = values[first] if first > 0 else -values[-first]
+                if first_value == 1:
+                    watch_list[j] = clause
+                    j += 1
+                    continue
+                # Look for a new literal to watch
+                for k in range(2, len(clause)):
+                    lit = clause[k]
+                    if (values[lit] if lit > 0 else -values[-lit]) != -1:
+                        clause[1], clause[k] = lit, false_lit
+                        watches[lit].append(clause)
+                        break
+                else:
+                    watch_list[j] = clause
+                    j += 1
+                    if first_value == -1:
+                        while i < num_watches:
+                            watch_list[j] = watch_list[i]
+                            j += 1
+                            i += 1
+                        del watch_list[j:]
+                        return clause
+                    self.assign(first, clause)
+            del watch_list[j:]
+        return None
+
+    def analyze(self, conflict):
+        """ First-UIP conflict analysis. Return the learnt clause and the backjump level """
+        levels = self.levels
+        level = len(self.trail_lim)
+        learnt = [0]
+        seen = set()
+        counter = 0
+        index = len(self.trail) - 1
+        clause = conflict
+        start = 0
+        while True:
+            for lit in clause[start:]:
+                var = abs(lit)
+                if var not in seen and levels[var] > 0:
+                    seen.add(var)
+                    self.bump_activity(var)
+                    if levels[var] == level:
+                        counter += 1
+                    else:
+                        learnt.append(lit)
+            while abs(self.trail[index]) not in seen:
+                index -= 1
+            lit = self.trail[index]
+            index -= 1
+            counter -= 1
+            if counter == 0:
+                break
+            clause = self.reasons[abs(lit)]
+            start = 1  # Skip the implied literal
+        learnt[0] = -lit
+
+        backjump_level = 0
+        if len(learnt) > 1:
+            # Watch the literal with the highest level at position 1
+            k = max(range(1, len(learnt)), key=lambda k: levels[abs(learnt[k])])
+            learnt[1], learnt[k] = learnt[k], learnt[1]
+            backjump_level = levels[abs(learnt[1])]
+        return learnt, backjump_level
+
+    def bump_activity(self, var):
+        """ Bump VSIDS activity of a variable """
+        self.activities[var] += self.var_inc
+        if self.activities[var] > 1e100:
+            self.activities = [activity * 1e-100 for activity in self.activities]
+            self.var_inc *= 1e-100
+            self.order_heap = [(-self.activities[v], v) for v in range(1, self.num_vars + 1) if not self.values[v]]
+            heapq.heapify(self.order_heap)
+        elif not self.values[var]:
+            heapq.heappush(self.order_heap, (-self.activities[var], var))
+
+    def backtrack(self, level):
+        """ Backtrack to a decision level """
+        if len(self.trail_lim) <= level:
+            return
+        start = self.trail_lim[level]
+        for lit in self.trail[start:]:
+            var = abs(lit)
+            self.phases[var] = self.values[var]
+            self.values[var] = 0
+            self.reasons[var] = None
+            heapq.heappush(self.order_heap, (-self.activities[var], var))
+        del self.trail[start:]
+        del self.trail_lim[level:]
+        self.qhead = start
+
+    def pick_branch_var(self):
+        """ Pick an unassigned variable with the highest activity """
+        while self.order_heap:
+            activity, var = heapq.heappop(self.order_heap)
+            if not self.values[var] and -activity == self.activities[var]:
+                return var
+        return 0
+
+    @staticmethod
+    def luby(i):
+        """ Luby sequence 1, 1, 2, 1, 1, 2, 4, ... """
+        size, seq = 1, 0
+        while size < i + 1:
+            seq += 1
+            size = 2 * size + 1
+        while size - 1 != i:
+            size = (size - 1) >> 1
+            seq -= 1
+            i = i % size
+        return 1 << seq
+
+    def solve(self, assumptions=(), conflict_limit=0):
+        """ Solve under assumptions. Return True (SAT), False (UNSAT) or None (conflict limit reached)
+
+        A satisfying assignment is stored in self.model, indexed by variable.
+        """
+        if not self.ok:
+            return False
+        self.backtrack(0)
+        if self.propagate() is not None:
+            self.ok = False
+            return False
+        num_restarts = 0
+        restart_limit = self.RESTART_BASE * self.luby(num_restarts)
+        conflicts = 0
+        while True:
+            conflict = self.propagate()
+            if conflict is not None:
+                self.num_conflicts += 1
+                conflicts += 1
+                if not self.trail_lim:
+                    self.ok = False
+                    return False
+                learnt, backjump_level = self.analyze(conflict)
+                self.backtrack(backjump_level)
+                if len(learnt) == 1:
+                    self.assign(learnt[0], None)
+                else:
+                    self.watches[learnt[0]].append(learnt)
+                    self.watches[learnt[1]].append(learnt)
+                    self.assign(learnt[0], learnt)
+                self.var_inc /= self.ACTIVITY_DECAY
+                continue
+
+            if conflict_limit and conflicts >= conflict_limit:
+                self.backtrack(0)
+                return None
+            if conflicts >= restart_limit:
+                num_restarts += 1
+                restart_limit = conflicts + self.RESTART_BASE * self.luby(num_restarts)
+                self.backtrack(0)
+
+            # Decide assumptions first, then the most active variable
+            level = len(self.trail_lim)
+            if level < len(assumptions):
+                lit = assumptions[level]
+                value = self.value(lit)
+                if value == -1:
+                    self.backtrack(0)
+                    return False
+                self.trail_lim.append(len(self.trail))
+                if value == 0:
+                    self.assign(lit, None)
+                continue
+            var = self.pick_branch_var()
+            if not var:
+                self.model = list(self.values)
+                self.backtrack(0)
+                return True
+            self.trail_lim.append(len(self.trail))
+            self.assign(var if self.phases[var] == 1 else -var, None)
+
+
+class DagEquivChecker:
+    """ Prove that a transformed DAG computes the same outputs as a reference DAG
+
+    Both DAGs are encoded into one CNF by symbolic simulation with structural hashing, so
+    gates unchanged by transformations share variables. Inverted wires are negated literals,
+    and majority gates are normalized under input negation. For each output pair that is not
+    structurally equal, a miter output is solved with SatSolver.
+    """
+
+    CONFLICT_LIMIT = 100000  # Per-output conflict limit
+
+    def __init__(self, debug_level=0):
+        self.debug_level = debug_level
+        self.solver = SatSolver()
+        self.true_lit = self.solver.new_var()
+        self.solver.add_clause([self.true_lit])
+        self.input_lits = {}  # in_port -> literal
+        self.gate_table = {}  # (gate type, input literals) -> output literal
+        self.reference_outputs = None
+
+    def add_reference(self, dag, pim_mode='digital'):
+        """ Encode the reference DAG, e.g. the initial DAG before transformations """
+        self.reference_outputs = self.encode_dag(dag, pim_mode)
+
+    def check(self, dag, pim_mode='digital'):
+        """ Prove the DAG is equivalent to the reference DAG. Raise ValueError on mismatch """
+        if self.reference_outputs is None:
+            raise ValueError("Equivalence-Check: Reference DAG is not encoded")
+        outputs = self.encode_dag(dag, pim_mode)
+        out_ports = dag.get_out_ports()
+        if len(outputs) != len(self.reference_outputs):
+            raise ValueError(f"Equivalence-Check: Number of outputs changed from {len(self.reference_outputs)} to {len(outputs)}")
+
+        num_structural = 0
+        num_proved = 0
+        undecided = []
+        for out_port, ref_lit, lit in zip(out_ports, self.reference_outputs, outputs):
+            miter_lit = self.encode_xor(ref_lit, lit)
+            if miter_lit == -self.true_lit:
+                num_structural += 1
+                continue
+            result = self.solver.solve([miter_lit], self.CONFLICT_LIMIT)
+            if result is False:
+                num_proved += 1
+                # The miter output is constant false from now on
+                self.solver.add_clause([-miter_lit])
+            elif result is None:
+                undecided.append(out_port)
+            else:
+                model = self.solver.model
+                inputs = {port: int(model[abs(lit)] == (1 if lit > 0 else -1)) for port, lit in self.input_lits.items()}
+                print(f"Equivalence-Check: Counterexample at output {out_port}, Inputs: {inputs}")
+                raise ValueError(f"Equivalence-Check failed at output {out_port}")
+
+        summary = f"{num_structural} structurally, {num_proved} by SAT, {self.solver.num_vars} variables, {self.solver.num_conflicts} conflicts"
+        if undecided:
+            print(f"Warning: Equivalence-Check: Undecided outputs after {self.CONFLICT_LIMIT} conflicts: {undecided}")
+            print(f"Equivalence-Check: Proved {len(outputs) - len(undecided)} of {len(outputs)} outputs ({summary})")
+        else:
+            print(f"Equivalence-Check: Proved {len(outputs)} outputs ({summary})")
+
+    def encode_dag(self, dag, pim_mode):
+        """ Symbolically simulate a DAG and return output literals """
+        false_lit = -self.true_lit
+        symbol_table = {}
+        for in_port in dag.get_in_ports():
+            if in_port not in self.input_lits:
+                self.input_lits[in_port] = self.solver.new_var()
+            symbol_table[in_port] = self.input_lits[in_port]
+        get_wire_base_name = dag.get_wire_base_name
+        nodes = dag.graph.nodes
+        is_analog = pim_mode == 'analog'
+        for gate_id in dag.get_topo_sorted_gate_id_list():
+            gate = nodes[gate_id]
+            gate_func = gate['gate_func']
+
+            # Get input literals
+            inverted_wires = gate['inverted']
+            input_variables = []
+            input_inverted = []
+            lits = []
+            for wire in gate['inputs']:
+                input_var = get_wire_base_name(wire)
+                if input_var not in symbol_table:
+                    raise ValueError(f"Variable '{input_var}' not found in symbol table.")
+                inverted = wire in inverted_wires
+                input_variables.append(input_var)
+                input_inverted.append(inverted)
+                lits.append(-symbol_table[input_var] if inverted else symbol_table[input_var])
+
+            # Encode the gate function
+            if gate_func == 'in_port':
+                output_lit = symbol_table[gate_id]
+            elif gate_func in ['out_port', 'copy', 'copy_inout']:
+                output_lit = lits[0]
+            elif gate_func == 'inv1':
+                output_lit = -lits[0]
+            elif gate_func == 'and2':
+                output_lit = self.encode_and(lits[0], lits[1])
+            elif gate_func == 'nand2':
+                output_lit = -self.encode_and(lits[0], lits[1])
+            elif gate_func == 'or2':
+                output_lit = -self.encode_and(-lits[0], -lits[1])
+            elif gate_func == 'nor2':
+                output_lit = self.encode_and(-lits[0], -lits[1])
+            elif gate_func == 'xor2':
+                output_lit = self.encode_xor(lits[0], lits[1])
+            elif gate_func == 'xnor2':
+                output_lit = -self.encode_xor(lits[0], lits[1])
+            elif gate_func == 'mux2':
+                sel = lits[0]
+                output_lit = -self.encode_and(-self.encode_and(sel, lits[2]), -self.encode_and(-sel, lits[1]))
+            elif gate_func == 'maj3':
+                output_lit = self.encode_maj(lits[0], lits[1], lits[2])
+            elif gate_func == 'zero':
+                output_lit = false_lit
+            elif gate_func == 'one':
+                output_lit = self.true_lit
+            else:
+                raise ValueError(f"Unsupported gate function: {gate_func}")
+
+            # Update output variables
+            for output_wire in gate['outputs']:
+                symbol_table[get_wire_base_name(output_wire)] = output_lit
+
+            # Update input variables for analog PIM
+            if is_analog and gate_func in ['and2', 'or2', 'maj3']:
+                for input_var, inverted in zip(input_variables, input_inverted):
+                    symbol_table[input_var] = -output_lit if inverted else output_lit
+
+        outputs = []
+        for output_port in dag.get_out_ports():
+            if output_port not in symbol_table:
+                raise ValueError(f"Output port '{output_port}' not found in symbol table.")
+            outputs.append(symbol_table[output_port])
+        return outputs
+
+    def encode_and(self, a, b):
+        """ Encode AND of two literals with constant folding and structural hashing """
+        true_lit = self.true_lit
+        if a == -true_lit or b == -true_lit or a == -b:
+            return -true_lit
+        if a == true_lit or a == b:
+            return b
+        if b == true_lit:
+            return a
+        key = ('and', a, b) if abs(a) < abs(b) else ('and', b, a)
+        lit = self.gate_table.get(key)
+        if lit is None:
+            lit = self.solver.new_var()
+            self.solver.add_clause([-lit, a])
+            self.solver.add_clause([-lit, b])
+            self.solver.add_clause([lit, -a, -b])
+            self.gate_table[key] = lit
+        return lit
+
+    def encode_xor(self, a, b):
+        """ Encode XOR of two literals with constant folding and structural hashing """
+        true_lit = self.true_lit
+        negate = (a < 0) != (b < 0)
+        a, b = abs(a), abs(b)
+        if a == b:
+            lit = -true_lit
+        elif a == true_lit:
+            lit = -b
+        elif b == true_lit:
+            lit = -a
+        else:
+            key = ('xor', a, b) if a < b else ('xor', b, a)
+            lit = self.gate_table.get(key)
+            if lit is None:
+                lit = self.solver.new_var()
+                self.solver.add_clause([-lit, a, b])
+                self.solver.add_clause([-lit, -a, -b])
+                self.solver.add_clause([lit, -a, b])
+                self.solver.add_clause([lit, a, -b])
+                self.gate_table[key] = lit
+        return -lit if negate else lit
+
+    def encode_maj(self, a, b, c):
+        """ Encode MAJ of three literals with constant folding and structural hashing """
+        true_lit = self.true_lit
+        for x, y, z in [(a, b, c), (b, c, a), (c, a, b)]:
+            if x == y:
+                return x
+            if x == -y:
+                return z
+            if abs(x) == true_lit:
+                # MAJ(1, y, z) = y | z, MAJ(0, y, z) = y & z
+                return self.encode_and(y, z) if x == -true_lit else -self.encode_and(-y, -z)
+        # Self-duality: MAJ(!a, !b, !c) = !MAJ(a, b, c)
+        negate = (a < 0) + (b < 0) + (c < 0) >= 2
+        if negate:
+            a, b, c = -a, -b, -c
+        key = ('maj',) + tuple(sorted((a, b, c), key=abs))
+        lit = self.gate_table.get(key)
+        if lit is None:
+            lit = self.solver.new_var()
+            for x, y in [(a, b), (a, c), (b, c)]:
+                self.solver.add_clause([-lit, x, y])
+                self.solver.add_clause([lit, -x, -y])
+            self.gate_table[key] = lit
+        return -lit if negate else lit
@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+File: blif_dag_export.py
+Description: JSON export/import and interactive visualization of DAG
+Author: Deyuan Guo <guodeyuan@gmail.com>
+Date: 2026-10-17
+"""
+
+import json
+from networkx.readwrite import json_graph
+
+# Note: Import pyvis only when drawing, to keep it out of the translator startup path
+
+
+def save_graph_as_json(graph, file_path):
+    """ Save a DAG graph as a node-link JSON file """
+    graph = graph.copy()
+    for _, data in graph.nodes(data=True):
+        # Ensure all attributes are serializable
+        data['inverted'] = list(data.get('inverted', set()))
+    data = json_graph.node_link_data(graph, edges="links")
+    with open(file_path, "w") as f:
+        json.dump(data, f, indent=2)
+
+
+def load_graph_from_json(file_path):
+    """ Load a DAG graph from a node-link JSON file """
+    with open(file_path) as f:
+        data = json.load(f)
+    graph = json_graph.node_link_graph(data, edges="links")
+    for _, data in graph.nodes(data=True):
+        data['inverted'] = set(data.get('inverted', []))
+    return graph
+
+
+def draw_interactive_circuit(graph, output_file="circuit.html"):
+    """ Draw an interactive circuit using PyVis """
+    from pyvis.network import Network
+    network = Network(height='800px', width='100%', directed=True, notebook=False, filter_menu=True, cdn_resources='remote')
+
+    for gate_id, data in graph.nodes(data=True):
+        gate_func = data.get('gate_func', 'unknown')
+        if gate_func == 'in_port':
+            label = f"{gate_id} ({gate_func[:-5]})"
+            color = "#F9E79F"
+        elif gate_func == 'out_port':
+            label = f"{gate_id} ({gate_func[:-5]})"
+            color = "#F5B7B1"
+        elif gate_func == 'copy':
+            label = f"{gate_id} ({gate_func})"
+            color = "#A9DFBF"
+        else:
+            label = f"{gate_id} ({gate_func})"
+            color = "#AED6F1"
+        network.add_node(gate_id, label=label, shape="box", color=color)
+
+    for u, v, edge_data in graph.edges(data=True):
+        label = edge_data.get('wire_name', 'unknown')
+        network.add_edge(u, v, label=label)
+
+    network.show_buttons(filter_=['physics'])
+    # Save to html file instead of popup with show()
+    network.save_graph(output_file)
+    print(f"Interactive graph saved to: {output_file}")
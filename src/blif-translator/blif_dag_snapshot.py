@@ -0,0 +1,252 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+File: blif_dag_snapshot.py
+Description: Binary snapshot format of DAG for fast save and restore between stages
+Author: Deyuan Guo <guodeyuan@gmail.com>
+Date: 2026-10-17
+"""
+
+import array
+import struct
+import sys
+import zlib
+
+
+class DagSnapshot:
+    """ Binary DAG snapshot writer and reader
+
+    File layout, little-endian:
+        header: magic, format version, number of sections, CRC32 of all bytes after the header
+        section table: (tag, offset, size in bytes) of each section
+        sections: uint32 arrays at 8-byte aligned offsets, can be cast from a buffer or mmap directly
+    Sections:
+        STRS: string table, count and (count + 1) offsets of UTF-8 strings, followed by the bytes
+        META: string IDs of module name, PIM mode and wire segment marker, topo sort algorithm,
+              string ID of the checkpoint tag
+        PORT: input and output port counts, followed by port string IDs in port order
+        CNTR: gate ID and wire name counter counts, followed by (prefix ID, suffix) pairs
+        GATE: (gate ID, gate func, #inputs, #outputs, #inverted) of each gate in node order
+        GREF: string IDs of inputs, outputs and inverted wires of all gates
+        SUCC: out-degree of each gate, followed by (gate index, wire name ID) of successors
+        PRED: in-degree of each gate, followed by gate index of predecessors
+    Successor and predecessor orders are both kept, so that traversal orders of the restored
+    graph and the generated code are exactly the same as before saving.
+    """
+
+    MAGIC = b'PIMDAG\0\0'
+    VERSION = 1
+    HEADER = struct.Struct('<8sIII')
+    SECTION = struct.Struct('<4sQQ')
+    SECTION_TAGS = [b'STRS', b'META', b'PORT', b'CNTR', b'GATE', b'GREF', b'SUCC', b'PRED']
+
+    def __init__(self):
+        """ Init """
+        self.strings = []
+        self.string_ids = {}
+
+    def get_string_id(self, string):
+        """ Intern a string into the string table """
+        string_id = self.string_ids.get(string)
+        if string_id is None:
+            string_id = len(self.strings)
+            self.string_ids[string] = string_id
+            self.strings.append(string)
+        return string_id
+
+    @staticmethod
+    def new_array(values=()):
+        """ Create a uint32 array """
+        return array.array('I' if array.array('I').itemsize == 4 else 'L', values)
+
+    def write(self, file_path, graph, state):
+        """ Write a DAG graph and DAG state to a snapshot file """
+        sid = self.get_string_id
+        meta = self.new_array([sid(state['module_name']), sid(state['pim_mode']),
+                               sid(state['wire_segment_marker']), state['topo_sort_algorithm'],
+                               sid(state['checkpoint_tag'])])
+        ports = self.new_array([len(state['in_ports']), len(state['out_ports'])])
+        ports.extend(sid(port) for port in state['in_ports'])
+        ports.extend(sid(port) for port in state['out_ports'])
+        counters = self.new_array([len(state['gate_id_counters']), len(state['wire_name_counters'])])
+        for prefix, suffix in list(state['gate_id_counters'].items()) + list(state['wire_name_counters'].items()):
+            counters.extend([sid(prefix), suffix])
+
+        gates = self.new_array()
+        gate_refs = self.new_array()
+        gate_index = {}
+        for gate_id, data in graph.nodes(data=True):
+            gate_index[gate_id] = len(gate_index)
+            inputs = data.get('inputs', [])
+            outputs = data.get('outputs', [])
+            inverted = list(data.get('inverted', set()))
+            gates.extend([sid(gate_id), sid(data.get('gate_func', '')), len(inputs), len(outputs), len(inverted)])
+            gate_refs.extend(sid(wire_name) for wire_name in inputs)
+            gate_refs.extend(sid(wire_name) for wire_name in outputs)
+            gate_refs.extend(sid(wire_name) for wire_name in inverted)
+
+        succ_degrees = self.new_array()
+        succ_edges = self.new_array()
+        pred_degrees = self.new_array()
+        pred_edges = self.new_array()
+        for gate_id in gate_index:
+            succ = graph[gate_id]
+            succ_degrees.append(len(succ))
+            for fanout_gate_id in succ:
+                succ_edges.extend([gate_index[fanout_gate_id], sid(succ[fanout_gate_id]['wire_name'])])
+            fanin_gate_ids = list(graph.predecessors(gate_id))
+            pred_degrees.append(len(fanin_gate_ids))
+            pred_edges.extend(gate_index[fanin_gate_id] for fanin_gate_id in fanin_gate_ids)
+
+        # String table is complete after all sections are interned
+        encoded = [string.encode('utf-8') for string in self.strings]
+        string_offsets = self.new_array([len(encoded), 0])
+        end = 0
+        for data in encoded:
+            end += len(data)
+            string_offsets.append(end)
+
+        sections = [
+            (b'STRS', [string_offsets, b''.join(encoded)]),
+            (b'META', [meta]),
+            (b'PORT', [ports]),
+            (b'CNTR', [counters]),
+            (b'GATE', [gates]),
+            (b'GREF', [gate_refs]),
+            (b'SUCC', [succ_degrees, succ_edges]),
+            (b'PRED', [pred_degrees, pred_edges]),
+        ]
+        payload = bytearray()
+        table = []
+        offset = self.HEADER.size + self.SECTION.size * len(sections)
+        for tag, chunks in sections:
+            padding = -(offset + len(payload)) % 8
+            payload += b'\0' * padding
+            start = offset + len(payload)
+            for chunk in chunks:
+                if isinstance(chunk, array.array):
+                    if sys.byteorder == 'big':
+                        chunk = array.array(chunk.typecode, chunk)
+                        chunk.byteswap()
+                    chunk = chunk.tobytes()
+                payload += chunk
+            table.append(self.SECTION.pack(tag, start, offset + len(payload) - start))
+        table = b''.join(table)
+        header = self.HEADER.pack(self.MAGIC, self.VERSION, len(sections), zlib.crc32(payload, zlib.crc32(table)))
+        with open(file_path, 'wb') as f:
+            f.write(header)
+            f.write(table)
+            f.write(payload)
+
+    def read(self, file_path, graph):
+        """ Read a snapshot file into an empty DAG graph, and return the DAG state """
+        with open(file_path, 'rb') as f:
+            return self.read_buffer(memoryview(f.read()), graph, file_path)
+
+    def read_buffer(self, view, graph, file_path):
+        """ Read a snapshot from a buffer """
+        if len(view) < self.HEADER.size:
+            raise ValueError(f"Error: Invalid DAG snapshot '{file_path}': file too short")
+        magic, version, num_sections, crc = self.HEADER.unpack_from(view)
+        if magic != self.MAGIC:
+            raise ValueError(f"Error: Invalid DAG snapshot '{file_path}': bad magic")
+        if version != self.VERSION:
+            raise ValueError(f"Error: Unsupported DAG snapshot version {version} in '{file_path}', expected {self.VERSION}")
+        if zlib.crc32(view[self.HEADER.size:]) != crc:
+            raise ValueError(f"Error: Corrupted DAG snapshot '{file_path}': CRC mismatch")
+        sections = {}
+        for index in range(num_sections):
+            tag, offset, size = self.SECTION.unpack_from(view, self.HEADER.size + index * self.SECTION.size)
+            sections[tag] = (offset, size)
+        for tag in self.SECTION_TAGS:
+            if tag not in sections:
+                raise ValueError(f"Error: Invalid DAG snapshot '{file_path}': missing section {tag.decode()}")
+
+        def get_array(tag):
+            offset, size = sections[tag]
+            values = view[offset:offset + size - size % 4]
+            if sys.byteorder == 'big':
+                values = self.new_array(values.tobytes())
+                values.byteswap()
+                return values.tolist()
+            return values.cast('I').tolist()
+
+        # String table
+        string_table = get_array(b'STRS')
+        num_strings = string_table[0]
+        string_offsets = string_table[1:num_strings + 2]
+        blob_offset = sections[b'STRS'][0] + 4 * (num_strings + 2)
+        blob = view[blob_offset:blob_offset + string_offsets[num_strings]].tobytes()
+        strings = [blob[string_offsets[index]:string_offsets[index + 1]].decode('utf-8') for index in range(num_strings)]
+
+        meta = get_array(b'META')
+        ports = get_array(b'PORT')
+        num_in_ports, num_out_ports = ports[0], ports[1]
+        counters = get_array(b'CNTR')
+        num_gate_id_counters = counters[0]
+        counter_pairs = [(strings[counters[index]], counters[index + 1]) for index in range(2, len(counters), 2)]
+        state = {
+            'module_name': strings[meta[0]],
+            'pim_mode': strings[meta[1]],
+            'wire_segment_marker': strings[meta[2]],
+            'topo_sort_algorithm': meta[3],
+            'checkpoint_tag': strings[meta[4]],
+            'in_ports': [strings[string_id] for string_id in ports[2:2 + num_in_ports]],
+            'out_ports': [strings[string_id] for string_id in ports[2 + num_in_ports:2 + num_in_ports + num_out_ports]],
+            'gate_id_counters': dict(counter_pairs[:num_gate_id_counters]),
+            'wire_name_counters': dict(counter_pairs[num_gate_id_counters:]),
+        }
+
+        # Gates in node order
+        gates = get_array(b'GATE')
+        gate_refs = get_array(b'GREF')
+        gate_ids = []
+        ref = 0
+        for index in range(0, len(gates), 5):
+            gate_id = strings[gates[index]]
+            num_inputs, num_outputs, num_inverted = gates[index + 2], gates[index + 3], gates[index + 4]
+            refs = [strings[string_id] for string_id in gate_refs[ref:ref + num_inputs + num_outputs + num_inverted]]
+            ref += len(refs)
+            graph.add_node(gate_id, gate_id=gate_id, gate_func=strings[gates[index + 1]],
+                           inputs=refs[:num_inputs], outputs=refs[num_inputs:num_inputs + num_outputs],
+                           inverted=set(refs[num_inputs + num_outputs:]))
+            gate_ids.append(gate_id)
+
+        # Edges, in an order that respects both successor and predecessor orders
+        num_gates = len(gate_ids)
+        succ_array = get_array(b'SUCC')
+        pred_array = get_array(b'PRED')
+        succ_lists = []
+        pred_lists = []
+        succ_pos = num_gates
+        pred_pos = num_gates
+        for index in range(num_gates):
+            succ_lists.append(list(zip(succ_array[succ_pos:succ_pos + 2 * succ_array[index]:2],
+                                       succ_array[succ_pos + 1:succ_pos + 2 * succ_array[index]:2])))
+            succ_pos += 2 * succ_array[index]
+            pred_lists.append(list(pred_array[pred_pos:pred_pos + pred_array[index]]))
+            pred_pos += pred_array[index]
+        succ_heads = [0] * num_gates
+        pred_heads = [0] * num_gates
+
+        def is_pred_head(u, v):
+            return pred_heads[v] < len(pred_lists[v]) and pred_lists[v][pred_heads[v]] == u
+
+        def is_succ_head(u, v):
+            return succ_heads[u] < len(succ_lists[u]) and succ_lists[u][succ_heads[u]][0] == v
+
+        ready = [(u, succ_lists[u][0][0]) for u in range(num_gates) if succ_lists[u] and is_pred_head(u, succ_lists[u][0][0])]
+        num_edges = 0
+        while ready:
+            u, v = ready.pop()
+            graph.add_edge(gate_ids[u], gate_ids[v], wire_name=strings[succ_lists[u][succ_heads[u]][1]])
+            num_edges += 1
+            succ_heads[u] += 1
+            pred_heads[v] += 1
+            if succ_heads[u] < len(succ_lists[u]) and is_pred_head(u, succ_lists[u][succ_heads[u]][0]):
+                ready.append((u, succ_lists[u][succ_heads[u]][0]))
+            if pred_heads[v] < len(pred_lists[v]) and is_succ_head(pred_lists[v][pred_heads[v]], v):
+                ready.append((pred_lists[v][pred_heads[v]], v))
+        if num_edges != sum(len(succ) for succ in succ_lists) or num_edges != sum(len(pred) for pred in pred_lists):
+            raise ValueError(f"Error: Invalid DAG snapshot '{file_path}': inconsistent edge orders")
+        return state
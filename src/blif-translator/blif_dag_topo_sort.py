@@ -6,86 +6,165 @@ Description: Perform topological sort on the pre-scheduling IR to improve instru
 Author: Deyaun Guo <guodeyuan@gmail.com>
 """
 
-from collections import deque
-import networkx as nx
+import heapq
+
+
+def topological_sort(graph):
+    """ Kahn's topological sort by generations, same order as networkx topological_sort """
+    indegree = {}
+    zero_indegree = []
+    for node, degree in graph.in_degree():
+        if degree > 0:
+            indegree[node] = degree
+        else:
+            zero_indegree.append(node)
+    while zero_indegree:
+        generation = zero_indegree
+        zero_indegree = []
+        for node in generation:
+            for child in graph.successors(node):
+                indegree[child] -= 1
+                if indegree[child] == 0:
+                    zero_indegree.append(child)
+                    del indegree[child]
+            yield node
+    if indegree:
+        raise ValueError("Error: Topological sort failed: DAG contains a cycle")
+
+
+class ReadyQueue:
+    """ Max-priority queue of ready gates keyed by (score, -insertion sequence) with lazy invalidation """
+
+    def __init__(self, ready_score):
+        """ Init. ready_score is shared by all queues: gate_id -> current score of ready gates """
+        self.heap = []
+        self.ready_score = ready_score
+        self.size = 0
+
+    def push(self, gate_id, score, seq):
+        """ Push a gate or a higher score of a gate already in the queue """
+        heapq.heappush(self.heap, (-score, seq, gate_id))
+
+    def peek(self):
+        """ Get (score, gate_id) of the best gate, discarding stale entries """
+        heap = self.heap
+        while heap:
+            neg_score, _, gate_id = heap[0]
+            if self.ready_score.get(gate_id) == -neg_score:
+                return -neg_score, gate_id
+            heapq.heappop(heap)
+        return None
+
+    def pop(self):
+        """ Pop the best gate """
+        _, gate_id = self.peek()
+        heapq.heappop(self.heap)
+        del self.ready_score[gate_id]
+        self.size -= 1
+        return gate_id
 
 
 def priority_khan_topo_sort(dag):
-    """ Perform priority-aware topological sort based on Kahn's algorithm """
+    """ Perform priority-aware topological sort based on Kahn's algorithm
+
+    Ready gates are kept in heaps by tier, and the best tier is scheduled first:
+    - INT1: ready non-source non-copy gates, INT2/INT3: ready non-source copy gates
+    - SRC1/SRC3: ready in ports and port-copy gates, SRC2/SRC4: rest ready source gates
+    Within a tier the best gate has the highest score, then the earliest ready time.
+    A ready gate's score only increases, since its successors keep an in-degree of at least 1
+    until the gate itself is scheduled. So a score change simply pushes a new heap entry.
+    Expected orders of sample and generated DAGs are checked by tests/test_topo_sort.py.
+    """
     in_ports = dag.get_in_ports()
     if dag.debug_level >= 2:
         print("DEBUG: Performing priority-aware topological sort based on Khan's algorithm.")
-    orig_indeg = dict(dag.graph.in_degree(dag.graph))
-    indeg = dict(dag.graph.in_degree(dag.graph))
+    graph = dag.graph
+    nodes = graph.nodes
+    in_port_set = set(in_ports)
+    orig_indeg = dict(graph.in_degree(graph))
+    indeg = orig_indeg.copy()
     # Treat zero-degree and port-copy gates as sources
     def is_port_copy(gate_id):
-        if dag.graph.nodes[gate_id]['gate_func'] in ['copy', 'copy_inout']:
-            preds = list(dag.graph.predecessors(gate_id))
-            if len(preds) == 1 and preds[0] in in_ports:
+        if nodes[gate_id]['gate_func'] in ['copy', 'copy_inout']:
+            preds = list(graph.predecessors(gate_id))
+            if len(preds) == 1 and preds[0] in in_port_set:
                 return True
         return False
-    is_source = {gate_id: indeg[gate_id] == 0 or is_port_copy(gate_id) for gate_id in dag.graph.nodes}
-    ready_int = deque()
-    ready_src = deque(in_ports)  # add in ports first
-    ready_src += deque([gate_id for gate_id, degree in indeg.items() if degree == 0 and not gate_id in in_ports])
-    order = []
+    is_in_port = {gate_id: nodes[gate_id]['gate_func'] == 'in_port' for gate_id in nodes}
+    ready_score = {}
+    int_noncopy = ReadyQueue(ready_score)
+    int_copy = ReadyQueue(ready_score)
+    src_port = ReadyQueue(ready_score)
+    src_other = ReadyQueue(ready_score)
+    queue_of = {}
+    for gate_id in nodes:
+        if indeg[gate_id] == 0 or is_port_copy(gate_id):
+            queue_of[gate_id] = src_port if gate_id in in_port_set or is_port_copy(gate_id) else src_other
+        elif nodes[gate_id]['gate_func'] in ['copy', 'copy_inout']:
+            queue_of[gate_id] = int_copy
+        else:
+            queue_of[gate_id] = int_noncopy
+    seq_of = {}
 
-    def can_unlock_successor(gate_id):
-        return any(indeg[succ] == 1 for succ in dag.graph.successors(gate_id))
     def gate_score(gate_id):
         score = 0
-        for succ in dag.graph.successors(gate_id):
+        for succ in graph.successors(gate_id):
             if indeg[succ] == 1:
                 score += 1
                 # Optimization: Prioritize in_ports that drive ready multi-output successors
-                if orig_indeg[succ] > 1 and dag.is_in_port(gate_id):
+                if orig_indeg[succ] > 1 and is_in_port[gate_id]:
                     score += orig_indeg[succ]
         return score
-    def pick_most_critical(ready_list):
-        return max(ready_list, key=gate_score)
-
-    while ready_int or ready_src:
-        if ready_int:
-            # Prioritize INT1: non-copy gates
-            crit_int1 = [gate_id for gate_id in ready_int if dag.graph.nodes[gate_id]['gate_func'] not in ['copy', 'copy_inout']]
-            if crit_int1:
-                gate_id = pick_most_critical(crit_int1)
-            else:
-                # Prioritize INT2: Gates on critical paths
-                crit_int2 = [gate_id for gate_id in ready_int if can_unlock_successor(gate_id)]
-                if crit_int2:
-                    gate_id = pick_most_critical(crit_int2)
-                else:
-                    # Prioritize INT3: Rest non-source gates
-                    gate_id = ready_int[0]
-            ready_int.remove(gate_id)
+    def make_ready(gate_id):
+        seq_of[gate_id] = len(seq_of)
+        score = gate_score(gate_id)
+        ready_score[gate_id] = score
+        queue = queue_of[gate_id]
+        queue.push(gate_id, score, seq_of[gate_id])
+        queue.size += 1
+
+    # Add in ports first, then other zero-degree gates
+    for gate_id in in_ports:
+        make_ready(gate_id)
+    for gate_id, degree in indeg.items():
+        if degree == 0 and gate_id not in in_port_set:
+            make_ready(gate_id)
+
+    order = []
+    scheduled = set()
+    while ready_score:
+        if int_noncopy.size:
+            gate_id = int_noncopy.pop()
+        elif int_copy.size:
+            gate_id = int_copy.pop()
         else:
-            # Prioritize SRC1: In ports or port-copy gates on critical paths
-            crit_src1 = [gate_id for gate_id in ready_src if (gate_id in in_ports or is_port_copy(gate_id)) and can_unlock_successor(gate_id)]
-            if crit_src1:
-                gate_id = pick_most_critical(crit_src1)
+            best_port = src_port.peek()
+            best_other = src_other.peek()
+            if best_port and best_port[0] > 0:
+                gate_id = src_port.pop()
+            elif best_other and best_other[0] > 0:
+                gate_id = src_other.pop()
+            elif best_port:
+                gate_id = src_port.pop()
             else:
-                # Prioritize SRC2: Source gates on critical paths
-                crit_src2 = [gate_id for gate_id in ready_src if is_source[gate_id] and can_unlock_successor(gate_id)]
-                if crit_src2:
-                    gate_id = pick_most_critical(crit_src2)
-                else:
-                    # Prioritize SRC3: Rest in ports or port-copy gates
-                    crit_src3 = [gate_id for gate_id in ready_src if gate_id in in_ports or is_port_copy(gate_id)]
-                    if crit_src3:
-                        gate_id = pick_most_critical(crit_src3)
-                    else:
-                        # Prioritize SRC4: Rest source gates
-                        gate_id = ready_src[0]
-            ready_src.remove(gate_id)
+                gate_id = src_other.pop()
         order.append(gate_id)
-        for succ in dag.graph.successors(gate_id):
+        scheduled.add(gate_id)
+        for succ in graph.successors(gate_id):
             indeg[succ] -= 1
             if indeg[succ] == 0:
-                if is_source[succ]:
-                    ready_src.append(succ)
-                else:
-                    ready_int.append(succ)
+                make_ready(succ)
+            elif indeg[succ] == 1:
+                # The last unscheduled predecessor can now unlock succ
+                for pred in graph.predecessors(succ):
+                    if pred not in scheduled:
+                        break
+                if pred in ready_score:
+                    score = ready_score[pred] + 1
+                    if orig_indeg[succ] > 1 and is_in_port[pred]:
+                        score += orig_indeg[succ]
+                    ready_score[pred] = score
+                    queue_of[pred].push(pred, score, seq_of[pred])
     if len(order) != len(dag.graph):
         dag.raise_exception("Topological sort failed: not all nodes were processed.")
     return order
@@ -106,7 +185,7 @@ def source_insertion_topo_sort(dag):
         return False
     is_source = {gate_id: (indeg[gate_id] == 0 and not dag.is_in_port(gate_id)) or is_port_copy(gate_id) for gate_id in dag.graph.nodes}
     # Create original topological order
-    order = list(nx.topological_sort(dag.graph))
+    order = list(topological_sort(dag.graph))
     # Split into sources and internal gates
     src_gate_buffer = set()
     for gate_id in order:
@@ -138,13 +217,13 @@ def alsp_topo_sort(dag):
         dur[v] = 1
     # Compute ASAP
     asap = {}
-    for v in nx.topological_sort(dag.graph):
+    for v in topological_sort(dag.graph):
         preds = list(dag.graph.predecessors(v))
         asap[v] = 0 if not preds else max(asap[p] + 1 for p in preds)
     # Compute ALAP
     t_max = max(asap.values())
     alap = {}
-    for v in reversed(list(nx.topological_sort(dag.graph))):
+    for v in reversed(list(topological_sort(dag.graph))):
         succs = list(dag.graph.successors(v))
         alap[v] = t_max if not succs else min(alap[s] - 1 for s in succs)
     # Compute slack
@@ -158,53 +237,84 @@ def alsp_topo_sort(dag):
     return alap_order
 
 
-def register_pressure_topo_sort(dag):
-    """ Topological sort based on register pressure """
-    if dag.debug_level >= 2:
-        print("DEBUG: Performing topological sort with register pressure aware list scheduling.")
-    # Compute duration
+def get_asap_alap_slack(dag):
+    """ Compute ASAP, ALAP and slack of all gates with unit durations """
     dur = {}
     for v in dag.graph.nodes:
         dur[v] = 1
     # Compute ASAP
+    topo_order = list(topological_sort(dag.graph))
     asap = {}
-    for v in nx.topological_sort(dag.graph):
+    for v in topo_order:
         preds = list(dag.graph.predecessors(v))
         asap[v] = 0 if not preds else max(asap[p] + dur[v] for p in preds)
     # Compute ALAP
     t_max = max(asap.values())
     alap = {}
-    for v in reversed(list(nx.topological_sort(dag.graph))):
+    for v in reversed(topo_order):
         succs = list(dag.graph.successors(v))
         alap[v] = t_max if not succs else min(alap[s] - dur[v] for s in succs)
     # Compute slack
     slack = {n: alap[n] - asap[n] for n in dag.graph.nodes}
-    # Run register pressure aware list scheduling
-    indeg = dict(dag.graph.in_degree(dag.graph))
-    ready = deque([gate_id for gate_id in dag.graph.nodes if indeg[gate_id] == 0])
-    scheduled, live, order = set(), set(), []
-    t = 0
-    while ready:
-        def cost(n):
-            #if dag.graph.nodes[n]['gate_func'] in ['in_port']:
-            #    return (-10000, -10000)  # schedule in_port first
-            urgency = alap[n] - t
-            urgency = 0
-            delta = 1
-            delta -= sum(1 for p in dag.graph.predecessors(n) if p in live)
-            return (delta, urgency)
-        best = min(ready, key=cost)
-        ready.remove(best)
+    return dur, asap, alap, slack
+
+
+def register_pressure_list_schedule(dag, in_port_first):
+    """ Register pressure aware list scheduling
+
+    Pick the ready gate with the minimum register delta, i.e., 1 minus the number of its
+    operands that are still live, breaking ties by the earliest ready time.
+    A gate is live from its scheduling until any of its successors is scheduled.
+    Remaining predecessor counts and deltas of ready gates are maintained incrementally:
+    once a gate leaves the live set, the deltas of its ready successors go up by one.
+    """
+    graph = dag.graph
+    nodes = graph.nodes
+    ready_score = {}  # gate_id -> -delta of ready gates
+    ready = ReadyQueue(ready_score)
+    remaining = dict(graph.in_degree(graph))
+    seq_of = {}
+    live = set()
+
+    def make_ready(gate_id):
+        seq_of[gate_id] = len(seq_of)
+        if in_port_first and nodes[gate_id]['gate_func'] in ['in_port']:
+            score = 10000  # schedule in_port first
+        else:
+            score = sum(1 for p in graph.predecessors(gate_id) if p in live) - 1
+        ready_score[gate_id] = score
+        ready.push(gate_id, score, seq_of[gate_id])
+        ready.size += 1
+
+    for gate_id in graph.nodes:
+        if remaining[gate_id] == 0:
+            make_ready(gate_id)
+    order = []
+    while ready.size:
+        best = ready.pop()
         order.append(best)
-        scheduled.add(best)
-        for p in dag.graph.predecessors(best):
-            live.discard(p)
+        for p in graph.predecessors(best):
+            if p in live:
+                live.discard(p)
+                for succ in graph.successors(p):
+                    if succ in ready_score and ready_score[succ] != 10000:
+                        ready_score[succ] -= 1
+                        ready.push(succ, ready_score[succ], seq_of[succ])
         live.add(best)
-        for succ in dag.graph.successors(best):
-            if all(pred in scheduled for pred in dag.graph.predecessors(succ)):
-                ready.append(succ)
-        t += dur[best]
+        for succ in graph.successors(best):
+            remaining[succ] -= 1
+            if remaining[succ] == 0:
+                make_ready(succ)
+    return order
+
+
+def register_pressure_topo_sort(dag):
+    """ Topological sort based on register pressure """
+    if dag.debug_level >= 2:
+        print("DEBUG: Performing topological sort with register pressure aware list scheduling.")
+    order = register_pressure_list_schedule(dag, in_port_first=False)
     if dag.debug_level >= 3:
+        dur, asap, alap, slack = get_asap_alap_slack(dag)
         print("DEBUG: New order")
         for i, v in enumerate(order):
             print(f"    ASAP={asap[v]}, ALAP={alap[v]}, Slack={slack[v]}, Dur={dur[v]} : Gate {dag.get_gate_info_str(v)}")
@@ -215,48 +325,7 @@ def register_pressure_topo_sort2(dag):
     """ Topological sort based on register pressure """
     if dag.debug_level >= 2:
         print("DEBUG: Performing topological sort with register pressure aware list scheduling.")
-    # Compute duration
-    dur = {}
-    for v in dag.graph.nodes:
-        dur[v] = 1
-    # Compute ASAP
-    asap = {}
-    for v in nx.topological_sort(dag.graph):
-        preds = list(dag.graph.predecessors(v))
-        asap[v] = 0 if not preds else max(asap[p] + dur[v] for p in preds)
-    # Compute ALAP
-    t_max = max(asap.values())
-    alap = {}
-    for v in reversed(list(nx.topological_sort(dag.graph))):
-        succs = list(dag.graph.successors(v))
-        alap[v] = t_max if not succs else min(alap[s] - dur[v] for s in succs)
-    # Compute slack
-    slack = {n: alap[n] - asap[n] for n in dag.graph.nodes}
-    # Run register pressure aware list scheduling
-    indeg = dict(dag.graph.in_degree(dag.graph))
-    ready = deque([gate_id for gate_id in dag.graph.nodes if indeg[gate_id] == 0])
-    scheduled, live, order = set(), set(), []
-    t = 0
-    while ready:
-        def cost(n):
-            if dag.graph.nodes[n]['gate_func'] in ['in_port']:
-                return (-10000, -10000)  # schedule in_port first
-            urgency = alap[n] - t
-            urgency = 0
-            delta = 1
-            delta -= sum(1 for p in dag.graph.predecessors(n) if p in live)
-            return (delta, urgency)
-        best = min(ready, key=cost)
-        ready.remove(best)
-        order.append(best)
-        scheduled.add(best)
-        for p in dag.graph.predecessors(best):
-            live.discard(p)
-        live.add(best)
-        for succ in dag.graph.successors(best):
-            if all(pred in scheduled for pred in dag.graph.predecessors(succ)):
-                ready.append(succ)
-        t += dur[best]
+    order = register_pressure_list_schedule(dag, in_port_first=True)
     # Postpone in-ports
     new_order = []
     added_in_ports = set()
@@ -270,6 +339,7 @@ def register_pressure_topo_sort2(dag):
                     added_in_ports.add(pred)
             new_order.append(gate_id)
     if dag.debug_level >= 3:
+        dur, asap, alap, slack = get_asap_alap_slack(dag)
         print("DEBUG: New order")
         for i, v in enumerate(new_order):
             print(f"    ASAP={asap[v]}, ALAP={alap[v]}, Slack={slack[v]}, Dur={dur[v]} : Gate {dag.get_gate_info_str(v)}")
@@ -290,5 +360,5 @@ def get_topo_sorted_gate_id_list(dag):
     elif algorithm == 5:
         return register_pressure_topo_sort2(dag)
     else:
-        return list(nx.topological_sort(dag.graph))
+        return list(topological_sort(dag.graph))
 
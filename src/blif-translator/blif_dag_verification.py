@@ -7,50 +7,274 @@ Author: Deyaun Guo <guodeyuan@gmail.com>
 Date: 2025-06-12
 """
 
+import heapq
+import itertools
+import random
+import re
+
+
 class DagVerifier:
-    """ Base class for DAG verifiers """
+    """ Base class for DAG verifiers
+
+    Test vectors are bit-sliced: each wire holds a Python integer whose bit i is the
+    value of test vector i, so one topological pass simulates all test vectors.
+    """
 
-    def __init__(self, dag, debug_level=0):
+    MODES = ['auto', 'basic', 'exhaustive', 'random', 'corner']
+    BUS_PORT_PATTERN = re.compile(r'(.+)\[(\d+)\]')
+
+    BACKENDS = ['python', 'numpy']
+    max_exhaustive_inputs = 16  # Max number of inputs for exhaustive tests
+
+    def __init__(self, dag, debug_level=0, backend='python', mode='auto', budget=4096, seed=0):
+        """ Init
+            backend: simulation backend, see BACKENDS
+            mode: test vector generation mode, see MODES
+            budget: max number of test vectors of random and corner modes
+            seed: random seed of test vector generation
+        """
         self.dag = dag
         self.debug_level = debug_level
-        self.test_inputs = self.generate_test_inputs()
+        self.backend = backend
+        self.mode = mode
+        self.budget = budget
+        self.seed = seed
+        self.num_tests = 0
+        self.test_desc = ''
+        self.test_inputs = None  # Generated on first verification
         self.cached_outputs = []
 
     def verify(self, pim_mode='digital'):
         """ Verify the correctness of the DAG transformation """
-        test_outputs = []
-        for i, test_input in enumerate(self.test_inputs):
-            test_output = self.simulate(test_input, pim_mode)
-            test_outputs.append(test_output)
-            if self.debug_level >= 2:
-                print(f'DAG-Verification: Test {i} {pim_mode}, Outputs: {[int(o) for o in test_output]}, Inputs: {[int(i) for i in test_input]}')
+        if self.test_inputs is None:
+            self.test_inputs = self.generate_test_inputs()
+        test_outputs = self.simulate_bit_parallel(self.test_inputs, pim_mode)
+        if self.debug_level >= 2:
+            for i in range(min(self.num_tests, 4)):
+                outputs = [(word >> i) & 1 for word in test_outputs]
+                inputs = [(word >> i) & 1 for word in self.test_inputs]
+                print(f'DAG-Verification: Test {i} {pim_mode}, Outputs: {outputs}, Inputs: {inputs}')
+                if self.debug_level >= 3:
+                    # Cross-check with the single vector simulator
+                    reference = [int(o) for o in self.simulate([bool(v) for v in inputs], pim_mode)]
+                    if reference != outputs:
+                        raise ValueError(f'DAG-Verification: Bit-parallel simulation mismatch at test {i}')
         if not self.cached_outputs:
             self.cached_outputs = test_outputs
         else:
-            for i, cached_output in enumerate(self.cached_outputs):
-                if cached_output != test_outputs[i]:
-                    raise ValueError(f'DAG-Verification failed')
-        print(f'DAG-Verification: Passed')
+            mismatch = 0
+            for cached_output, test_output in zip(self.cached_outputs, test_outputs):
+                mismatch |= cached_output ^ test_output
+            if mismatch:
+                i = (mismatch & -mismatch).bit_length() - 1
+                if self.debug_level >= 2:
+                    print(f'DAG-Verification: Failed test {i}, Inputs: {[(word >> i) & 1 for word in self.test_inputs]}')
+                raise ValueError(f'DAG-Verification failed at test {i}')
+        print(f'DAG-Verification: Passed {self.num_tests} tests ({self.test_desc})')
 
     def generate_test_inputs(self):
-        """ Generate test inputs for the DAG """
+        """ Generate bit-sliced test inputs for the DAG, one integer per input port
+
+        Modes:
+            basic: all 0, all 1, alternative 0/1, alternative 1/0
+            exhaustive: all input combinations, up to max_exhaustive_inputs inputs
+            random: basic, then seeded random vectors up to the budget
+            corner: basic, then corner values of bus ports up to the budget
+            auto: exhaustive if there are few inputs, otherwise basic, corner and random
+        """
+        if self.mode not in self.MODES:
+            raise ValueError(f"Unsupported DAG verification mode: {self.mode}")
         in_ports = self.dag.get_in_ports()
         num_inputs = len(in_ports)
         if num_inputs == 0:
-            return [[]]
-        test_inputs = []
-        # Test 1: All 0
-        test_inputs.append([False] * num_inputs)
-        # Test 2: All 1
-        test_inputs.append([True] * num_inputs)
-        # Test 3: Alternative 0/1
-        test_inputs.append([i % 2 == 0 for i in range(num_inputs)])
-        # Test 4: Alternative 1/0
-        test_inputs.append([i % 2 == 1 for i in range(num_inputs)])
+            self.num_tests = 1
+            self.test_desc = 'no inputs'
+            return []
+
+        rng = random.Random(self.seed)
+        mode = self.mode
+        if mode == 'auto':
+            mode = 'exhaustive' if num_inputs <= self.max_exhaustive_inputs else 'basic+corner+random'
+        remaining = max(0, self.budget - 4)
+        if mode == 'basic':
+            test_groups = [self.get_basic_tests(num_inputs)]
+        elif mode == 'exhaustive':
+            if num_inputs > self.max_exhaustive_inputs:
+                raise ValueError(f"Exhaustive DAG verification supports up to {self.max_exhaustive_inputs} inputs, got {num_inputs}")
+            test_groups = [self.get_exhaustive_tests(num_inputs)]
+        elif mode == 'random':
+            test_groups = [self.get_basic_tests(num_inputs), self.get_random_tests(num_inputs, remaining, rng)]
+        elif mode == 'corner':
+            test_groups = [self.get_basic_tests(num_inputs), self.get_corner_tests(in_ports, remaining, rng)]
+        else:
+            corner_tests = self.get_corner_tests(in_ports, remaining // 2, rng)
+            random_tests = self.get_random_tests(num_inputs, remaining - corner_tests[1], rng)
+            test_groups = [self.get_basic_tests(num_inputs), corner_tests, random_tests]
+
+        # Concatenate test groups along the test vector bits
+        test_inputs = [0] * num_inputs
+        self.num_tests = 0
+        for words, num_tests in test_groups:
+            for i, word in enumerate(words):
+                test_inputs[i] |= word << self.num_tests
+            self.num_tests += num_tests
+        self.test_desc = f"{self.mode}: {mode}" if self.mode == 'auto' else mode
+        if mode != 'exhaustive' and mode != 'basic':
+            self.test_desc += f", seed {self.seed}"
         return test_inputs
 
+    def get_basic_tests(self, num_inputs):
+        """ Get 4 basic tests: all 0, all 1, alternative 0/1, alternative 1/0 """
+        return [0b0110 if i % 2 == 0 else 0b1010 for i in range(num_inputs)], 4
+
+    def get_exhaustive_tests(self, num_inputs):
+        """ Get all 2^N input combinations, where test t assigns bit i of t to input i """
+        num_tests = 1 << num_inputs
+        words = []
+        for i in range(num_inputs):
+            # Input i repeats 2^i zeros followed by 2^i ones
+            period = 2 << i
+            block = ((1 << (1 << i)) - 1) << (1 << i)
+            words.append(block * (((1 << num_tests) - 1) // ((1 << period) - 1)))
+        return words, num_tests
+
+    def get_random_tests(self, num_inputs, num_tests, rng):
+        """ Get seeded random tests """
+        return [rng.getrandbits(num_tests) if num_tests else 0 for _ in range(num_inputs)], num_tests
+
+    def get_corner_tests(self, in_ports, max_tests, rng):
+        """ Get corner tests of bus ports such as sign bits and carry chains
+
+        Input ports named <bus>[<bit>] are grouped into buses, and other ports are 1-bit buses.
+        Each bus takes corner values: 0, 1, all 1, max/min signed values, alternative bits,
+        and walking 1/0. Tests cover aligned corner values of all buses, carry and overflow
+        patterns of bus pairs, then random combinations of corner values.
+        """
+        buses = {}  # bus name -> list of (input index, bit index)
+        for i, port in enumerate(in_ports):
+            match = self.BUS_PORT_PATTERN.fullmatch(port)
+            if match:
+                buses.setdefault(match.group(1), []).append((i, int(match.group(2))))
+            else:
+                buses.setdefault(port, []).append((i, 0))
+        bus_names = list(buses)
+        corner_values = []
+        for name in bus_names:
+            width = max(bit for _, bit in buses[name]) + 1
+            mask = (1 << width) - 1
+            alternative = int('01' * width, 2) & mask
+            values = [0, 1, mask, mask >> 1, 1 << (width - 1), mask - 1, alternative, alternative ^ mask]
+            values += [1 << bit for bit in range(width)] + [mask ^ (1 << bit) for bit in range(width)]
+            corner_values.append(list(dict.fromkeys(values)))
+
+        tests = []
+        # Aligned corner values of all buses
+        for k in range(max(len(values) for values in corner_values)):
+            tests.append([values[k % len(values)] for values in corner_values])
+        # Carry chain and overflow patterns of bus pairs
+        for p, q in itertools.permutations(range(min(len(bus_names), 4)), 2):
+            for value_p, value_q in [(2, 1), (2, 2), (3, 1), (4, 4), (6, 1)]:
+                test = [0] * len(bus_names)
+                test[p] = corner_values[p][min(value_p, len(corner_values[p]) - 1)]
+                test[q] = corner_values[q][min(value_q, len(corner_values[q]) - 1)]
+                tests.append(test)
+        # Random combinations of corner values
+        while len(tests) < max_tests:
+            tests.append([rng.choice(values) for values in corner_values])
+        tests = tests[:max_tests]
+
+        words = [0] * len(in_ports)
+        for b, name in enumerate(bus_names):
+            for i, bit in buses[name]:
+                word = 0
+                for t, test in enumerate(tests):
+                    if (test[b] >> bit) & 1:
+                        word |= 1 << t
+                words[i] = word
+        return words, len(tests)
+
+    def simulate_bit_parallel(self, test_inputs, pim_mode):
+        """ Simulate the DAG with bit-sliced inputs and return bit-sliced outputs """
+        in_ports = self.dag.get_in_ports()
+        if len(test_inputs) != len(in_ports):
+            raise ValueError("Number of inputs does not match the number of input ports in the DAG.")
+        if self.backend == 'numpy':
+            simulator = NumpyDagSimulator(self.dag, pim_mode)
+            return simulator.simulate(test_inputs, self.num_tests)
+        mask = (1 << self.num_tests) - 1
+        symbol_table = dict(zip(in_ports, test_inputs))
+        get_wire_base_name = self.dag.get_wire_base_name
+        nodes = self.dag.graph.nodes
+        is_analog = pim_mode == 'analog'
+        for gate_id in self.dag.get_topo_sorted_gate_id_list():
+            gate = nodes[gate_id]
+            gate_func = gate['gate_func']
+
+            # Get input variables
+            inverted_wires = gate['inverted']
+            input_variables = []
+            input_inverted = []
+            input_values = []
+            for wire in gate['inputs']:
+                input_var = get_wire_base_name(wire)
+                if input_var not in symbol_table:
+                    raise ValueError(f"Variable '{input_var}' not found in symbol table.")
+                inverted = wire in inverted_wires
+                value = symbol_table[input_var]
+                input_variables.append(input_var)
+                input_inverted.append(inverted)
+                input_values.append(value ^ mask if inverted else value)
+
+            # Evalute the gate function
+            if gate_func == 'in_port':
+                output_value = symbol_table[gate_id]
+            elif gate_func in ['out_port', 'copy', 'copy_inout']:
+                output_value = input_values[0]
+            elif gate_func == 'inv1':
+                output_value = input_values[0] ^ mask
+            elif gate_func == 'and2':
+                output_value = input_values[0] & input_values[1]
+            elif gate_func == 'nand2':
+                output_value = (input_values[0] & input_values[1]) ^ mask
+            elif gate_func == 'or2':
+                output_value = input_values[0] | input_values[1]
+            elif gate_func == 'nor2':
+                output_value = (input_values[0] | input_values[1]) ^ mask
+            elif gate_func == 'xor2':
+                output_value = input_values[0] ^ input_values[1]
+            elif gate_func == 'xnor2':
+                output_value = input_values[0] ^ input_values[1] ^ mask
+            elif gate_func == 'mux2':
+                sel = input_values[0]
+                output_value = (input_values[2] & sel) | (input_values[1] & (sel ^ mask))
+            elif gate_func == 'maj3':
+                a, b, c = input_values
+                output_value = (a & b) | (a & c) | (b & c)
+            elif gate_func == 'zero':
+                output_value = 0
+            elif gate_func == 'one':
+                output_value = mask
+            else:
+                raise ValueError(f"Unsupported gate function: {gate_func}")
+
+            # Update output variables
+            for output_wire in gate['outputs']:
+                symbol_table[get_wire_base_name(output_wire)] = output_value
+
+            # Update input variables for analog PIM
+            if is_analog and gate_func in ['and2', 'or2', 'maj3']:
+                for input_var, inverted in zip(input_variables, input_inverted):
+                    symbol_table[input_var] = output_value ^ mask if inverted else output_value
+
+        outputs = []
+        for output_port in self.dag.get_out_ports():
+            if output_port not in symbol_table:
+                raise ValueError(f"Output port '{output_port}' not found in symbol table.")
+            outputs.append(symbol_table[output_port])
+        return outputs
+
     def simulate(self, test_input, pim_mode):
-        """ Simulate the DAG with given inputs and return outputs """
+        """ Simulate the DAG with a single boolean test vector and return outputs """
         if len(test_input) != len(self.dag.get_in_ports()):
             raise ValueError("Number of inputs does not match the number of input ports in the DAG.")
         symbol_table = {}
@@ -130,3 +354,200 @@ class DagVerifier:
                     value = output_value if not inverted else not output_value
                     symbol_table[input_var] = value
 
+
+
+class NumpyDagSimulator:
+    """ NumPy backend of bit-sliced DAG simulation
+
+    The topologically sorted gates are compiled once into levels of gate groups. A group
+    holds gates of the same level and opcode as opcode/operand slot index arrays, and is
+    evaluated with one gather, compute and scatter over packed uint64 words. Levels honor
+    read/write order of variables, including analog input-destroying gates. Variables
+    with disjoint live level ranges share a slot to keep the value array cache friendly.
+    """
+
+    BATCH_WORDS = 1024
+    INPUT_DESTROYING_GATE_FUNCS = ['and2', 'or2', 'maj3']
+
+    def __init__(self, dag, pim_mode):
+        """ Init. Compile the DAG into gate groups """
+        try:
+            import numpy
+        except ImportError:
+            raise ValueError("Error: DAG simulation backend 'numpy' requires the numpy package")
+        self.np = numpy
+        self.dag = dag
+        self.pim_mode = pim_mode
+        self.input_slots = []
+        self.output_slots = []
+        self.num_slots = 0
+        self.groups = []  # (gate_func, destroy_inputs, input slots, input inversion masks, output slots)
+        self.compile()
+
+    def compile(self):
+        """ Compile gates into levelized groups of index arrays """
+        np = self.np
+        get_wire_base_name = self.dag.get_wire_base_name
+        nodes = self.dag.graph.nodes
+        slot_of = {}  # var -> var ID, mapped to a physical slot at the end
+        def get_slot(var):
+            if var not in slot_of:
+                slot_of[var] = len(slot_of)
+            return slot_of[var]
+        input_var_ids = [get_slot(port) for port in self.dag.get_in_ports()]
+
+        last_write_level = {}  # var ID -> level of the last writer
+        last_read_level = {}  # var ID -> max level of readers
+        groups = {}  # (level, gate_func, num_inputs, num_outputs) -> list of (input slots, inverted, output slots)
+        for gate_id in self.dag.get_topo_sorted_gate_id_list():
+            gate = nodes[gate_id]
+            gate_func = gate['gate_func']
+            if gate_func == 'in_port':
+                inputs = [gate_id]
+                inverted = [False]
+            else:
+                inputs = [get_wire_base_name(wire) for wire in gate['inputs']]
+                inverted = [wire in gate['inverted'] for wire in gate['inputs']]
+            for var in inputs:
+                if var not in slot_of:
+                    raise ValueError(f"Variable '{var}' not found in symbol table.")
+            in_slots = [slot_of[var] for var in inputs]
+            out_slots = [get_slot(get_wire_base_name(wire)) for wire in gate['outputs']]
+            write_slots = out_slots
+            if self.pim_mode == 'analog' and gate_func in self.INPUT_DESTROYING_GATE_FUNCS:
+                write_slots = out_slots + in_slots
+
+            # A gate reads after the last writers, and writes after the last readers and writers
+            level = 0
+            for slot in in_slots:
+                level = max(level, last_write_level.get(slot, -1) + 1)
+            for slot in write_slots:
+                level = max(level, last_write_level.get(slot, -1) + 1, last_read_level.get(slot, -1) + 1)
+            for slot in in_slots:
+                last_read_level[slot] = max(last_read_level.get(slot, -1), level)
+            for slot in write_slots:
+                last_write_level[slot] = level
+            key = (level, gate_func, len(in_slots), len(out_slots))
+            groups.setdefault(key, []).append((in_slots, inverted, out_slots))
+
+        for port in self.dag.get_out_ports():
+            if port not in slot_of:
+                raise ValueError(f"Output port '{port}' not found in symbol table.")
+        output_var_ids = [slot_of[port] for port in self.dag.get_out_ports()]
+
+        # Linear scan over live level ranges to map var IDs to physical slots
+        num_levels = max([key[0] for key in groups], default=0) + 1
+        live_start = [last_write_level.get(var_id, 0) for var_id in range(len(slot_of))]
+        live_end = [max(last_write_level.get(var_id, -1), last_read_level.get(var_id, -1)) for var_id in range(len(slot_of))]
+        for var_id in input_var_ids:
+            live_start[var_id] = -1
+        for var_id in output_var_ids:
+            live_end[var_id] = num_levels
+        for levels in groups:
+            for gate in groups[levels]:
+                for var_id in gate[2]:
+                    live_start[var_id] = min(live_start[var_id], levels[0])
+        phys_slot = np.zeros(len(slot_of), dtype=np.intp)
+        free_slots = []
+        active = []  # heap of (live end, slot)
+        num_slots = 0
+        for var_id in sorted(range(len(slot_of)), key=lambda var_id: live_start[var_id]):
+            while active and active[0][0] < live_start[var_id]:
+                heapq.heappush(free_slots, heapq.heappop(active)[1])
+            if free_slots:
+                slot = heapq.heappop(free_slots)
+            else:
+                slot = num_slots
+                num_slots += 1
+            phys_slot[var_id] = slot
+            heapq.heappush(active, (live_end[var_id], slot))
+        self.input_slots = phys_slot[input_var_ids]
+        self.output_slots = phys_slot[output_var_ids]
+        self.num_slots = num_slots
+
+        all_ones = np.iinfo(np.uint64).max
+        self.groups = []
+        for key in sorted(groups, key=lambda key: key[0]):
+            _, gate_func, num_inputs, num_outputs = key
+            gates = groups[key]
+            in_slots = phys_slot[np.array([gate[0] for gate in gates], dtype=np.intp).reshape(len(gates), num_inputs)]
+            inv_masks = None
+            if any(any(gate[1]) for gate in gates):
+                inv_masks = np.array([[all_ones if inv else 0 for inv in gate[1]] for gate in gates], dtype=np.uint64).reshape(len(gates), num_inputs, 1)
+            out_slots = phys_slot[np.array([gate[2] for gate in gates], dtype=np.intp).reshape(len(gates), num_outputs)]
+            destroy_inputs = self.pim_mode == 'analog' and gate_func in self.INPUT_DESTROYING_GATE_FUNCS
+            self.groups.append((gate_func, destroy_inputs, in_slots, inv_masks, out_slots))
+
+    def simulate(self, test_inputs, num_tests):
+        """ Simulate bit-sliced integer inputs and return bit-sliced integer outputs """
+        np = self.np
+        num_words = max(1, (num_tests + 63) // 64)
+        packed_inputs = np.zeros((len(test_inputs), num_words), dtype=np.uint64)
+        for i, word in enumerate(test_inputs):
+            packed_inputs[i] = np.frombuffer(word.to_bytes(num_words * 8, 'little'), dtype='<u8')
+        packed_outputs = np.zeros((len(self.output_slots), num_words), dtype=np.uint64)
+        for start in range(0, num_words, self.BATCH_WORDS):
+            end = min(start + self.BATCH_WORDS, num_words)
+            packed_outputs[:, start:end] = self.simulate_batch(packed_inputs[:, start:end])
+        mask = (1 << num_tests) - 1
+        return [int.from_bytes(row.astype('<u8').tobytes(), 'little') & mask for row in packed_outputs]
+
+    def simulate_batch(self, packed_inputs):
+        """ Simulate a batch of packed uint64 words column-wise """
+        np = self.np
+        num_words = packed_inputs.shape[1]
+        values = np.zeros((self.num_slots, num_words), dtype=np.uint64)
+        values[self.input_slots] = packed_inputs
+        for gate_func, destroy_inputs, in_slots, inv_masks, out_slots in self.groups:
+            if len(in_slots) == 1:
+                # Single gate: operate on row views without gathering
+                x = [values[slot] for slot in in_slots[0]]
+                if inv_masks is not None:
+                    x = [~row if inv else row for row, inv in zip(x, inv_masks[0, :, 0])]
+                out = self.evaluate(gate_func, x, (num_words,))
+                for slot in out_slots[0]:
+                    values[slot] = out
+                if destroy_inputs:
+                    for i, slot in enumerate(in_slots[0]):
+                        values[slot] = out if inv_masks is None or not inv_masks[0, i, 0] else ~out
+                continue
+            x = values[in_slots]  # (gates, inputs, words)
+            if inv_masks is not None:
+                x ^= inv_masks
+            out = self.evaluate(gate_func, [x[:, i] for i in range(x.shape[1])], (len(in_slots), num_words))
+            for i in range(out_slots.shape[1]):
+                values[out_slots[:, i]] = out
+            # Update input variables for analog PIM
+            if destroy_inputs:
+                for i in range(in_slots.shape[1]):
+                    values[in_slots[:, i]] = out if inv_masks is None else out ^ inv_masks[:, i]
+        return values[self.output_slots]
+
+    def evaluate(self, gate_func, x, shape):
+        """ Evaluate a gate function on packed uint64 operands """
+        np = self.np
+        if gate_func in ['in_port', 'out_port', 'copy', 'copy_inout']:
+            return x[0]
+        elif gate_func == 'inv1':
+            return ~x[0]
+        elif gate_func == 'and2':
+            return x[0] & x[1]
+        elif gate_func == 'nand2':
+            return ~(x[0] & x[1])
+        elif gate_func == 'or2':
+            return x[0] | x[1]
+        elif gate_func == 'nor2':
+            return ~(x[0] | x[1])
+        elif gate_func == 'xor2':
+            return x[0] ^ x[1]
+        elif gate_func == 'xnor2':
+            return ~(x[0] ^ x[1])
+        elif gate_func == 'mux2':
+            return (x[2] & x[0]) | (x[1] & ~x[0])
+        elif gate_func == 'maj3':
+            return (x[0] & x[1]) | (x[0] & x[2]) | (x[1] & x[2])
+        elif gate_func == 'zero':
+            return np.zeros(shape, dtype=np.uint64)
+        elif gate_func == 'one':
+            return np.full(shape, np.iinfo(np.uint64).max, dtype=np.uint64)
+        raise ValueError(f"Unsupported gate function: {gate_func}")
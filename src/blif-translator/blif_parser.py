@@ -10,6 +10,7 @@ Date: 2024-09-03
 
 import itertools
 import pprint
+import re
 from lark import Lark, Transformer
 
 
@@ -107,13 +108,23 @@ BLIF_GRAMMAR = r"""
 class BlifParser:
     """ BLIF parser class: Parse a BLIF file """
 
+    # LALR parser shared by all instances. Lark caches its parser tables on disk
+    shared_lark_parser = None
+
     def __init__(self, module_name, debug_level=0):
         """ Initialize the BLIF parser """
-        self.lark_parser = Lark(BLIF_GRAMMAR, parser='lalr', transformer=BlifTransformer())
+        self.lark_parser = self.get_lark_parser()
         self.parse_tree = None
         self.module_name = module_name
         self.debug_level = debug_level
 
+    @classmethod
+    def get_lark_parser(cls):
+        """ Get the shared LALR parser. BlifTransformer is stateless so it is embedded """
+        if cls.shared_lark_parser is None:
+            cls.shared_lark_parser = Lark(BLIF_GRAMMAR, parser='lalr', transformer=BlifTransformer(), cache=True)
+        return cls.shared_lark_parser
+
     def parse(self, blif_content):
         """ Parse the input BLIF file content and create DAG """
         self.parse_tree = self.lark_parser.parse(blif_content)
@@ -173,3 +184,110 @@ class BlifParser:
 
         return gate_info_list
 
+
+
+class BlifReader:
+    """ Streaming BLIF reader: Read a BLIF file line by line without building a parse tree """
+
+    # Gate pins supported by the bit-serial genlibs. The last pin of a gate is its output
+    GATE_PINS = ('a', 'b', 'c', 's', 'O')
+    IDENTIFIER_PATTERN = re.compile(r'[a-zA-Z0-9_\[\]]+')
+
+    def __init__(self, module_name, debug_level=0):
+        """ Initialize the BLIF reader """
+        self.module_name = module_name
+        self.debug_level = debug_level
+        self.model_name = ''
+        self.in_ports = []
+        self.out_ports = []
+        self.gate_info_list = []
+
+    def read_file(self, file_name):
+        """ Read a BLIF file """
+        with open(file_name, 'r') as file:
+            self.read(file)
+
+    def read(self, lines):
+        """ Read BLIF from an iterable of lines, e.g. a file object """
+        self.gate_info_list = list(self.iter_gate_info(lines))
+        if not self.gate_info_list:
+            raise ValueError("Error: BLIF reader: No .gate found")
+        if self.debug_level >= 2:
+            print('BLIF GATE INFO:')
+            print('-' * 20)
+            for gate_info in self.gate_info_list:
+                print(gate_info)
+            print('-' * 20)
+
+    def iter_statements(self, lines):
+        """ Yield (line number, tokens) of each statement, joining backslash continuations """
+        tokens = []
+        start_line_no = 0
+        for line_no, line in enumerate(lines, 1):
+            line = line.split('#', 1)[0].rstrip()
+            if not tokens:
+                start_line_no = line_no
+            is_continued = line.endswith('\\')
+            if is_continued:
+                line = line[:-1]
+            tokens.extend(line.split())
+            if not is_continued and tokens:
+                yield start_line_no, tokens
+                tokens = []
+        if tokens:
+            yield start_line_no, tokens
+
+    def check_identifier(self, name, line_no):
+        """ Check if a wire or port name is a valid identifier """
+        if not self.IDENTIFIER_PATTERN.fullmatch(name):
+            raise ValueError(f"Error: BLIF reader: Invalid identifier '{name}' at line {line_no}")
+
+    def iter_gate_info(self, lines):
+        """ Yield GateInfo of each .gate while collecting model name and ports """
+        gate_count = 0
+        for line_no, tokens in self.iter_statements(lines):
+            keyword = tokens[0]
+            if keyword == '.gate':
+                if len(tokens) < 3:
+                    raise ValueError(f"Error: BLIF reader: Incomplete .gate at line {line_no}")
+                wires = []
+                for pin_assignment in tokens[2:]:
+                    pin, eq, wire = pin_assignment.partition('=')
+                    if not eq or pin not in self.GATE_PINS:
+                        raise ValueError(f"Error: BLIF reader: Unsupported gate pin '{pin_assignment}' at line {line_no}")
+                    self.check_identifier(wire, line_no)
+                    wires.append(wire)
+                # Note: Revisit this part if any gate has multiple outputs in BLIF file
+                yield GateInfo(
+                    gate_id=str(gate_count),
+                    gate_func=tokens[1],
+                    inputs=wires[:-1],
+                    outputs=wires[-1:]
+                )
+                gate_count += 1
+            elif keyword == '.inputs':
+                for name in tokens[1:]:
+                    self.check_identifier(name, line_no)
+                self.in_ports.extend(tokens[1:])
+            elif keyword == '.outputs':
+                for name in tokens[1:]:
+                    self.check_identifier(name, line_no)
+                self.out_ports.extend(tokens[1:])
+            elif keyword == '.model':
+                self.model_name = tokens[1] if len(tokens) > 1 else ''
+            elif keyword == '.end':
+                return
+            else:
+                raise ValueError(f"Error: BLIF reader: Unsupported statement '{keyword}' at line {line_no}")
+
+    def get_in_ports(self):
+        """ Get input ports """
+        return self.in_ports.copy()
+
+    def get_out_ports(self):
+        """ Get output ports """
+        return self.out_ports.copy()
+
+    def get_gate_info_list(self):
+        """ Get gate info list """
+        return self.gate_info_list
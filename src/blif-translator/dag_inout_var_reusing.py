@@ -15,10 +15,17 @@ from dag_transformer_base import DagTransformer
 class InoutVarReusing(DagTransformer):
     """ InoutVarReusing class """
 
-    def apply(self, dag):
-        """ Apply the variable reuse transformation to the DAG """
+    name = 'inout_var_reuse'
+    invalidates = ['wire_copy']
+    digital_semantics = False  # Reused inout wires hold values of input-destroying gates
+    shares_topo_order = True
+
+    def apply(self, dag, gate_ids=None):
+        """ Apply the variable reuse transformation to the DAG, or to a worklist of gate IDs in topological order """
+        if gate_ids is None:
+            gate_ids = dag.get_topo_sorted_gate_id_list()
         total_reuse = 0
-        for gate_id in dag.get_topo_sorted_gate_id_list():
+        for gate_id in gate_ids:
             if self.is_target_gate(dag, gate_id):
                 total_reuse += self.run_xform_inout_var_reusing(dag, gate_id)
         if self.debug_level >= 1:
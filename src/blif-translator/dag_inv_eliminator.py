@@ -13,10 +13,16 @@ from dag_transformer_base import DagTransformer
 class InvEliminator(DagTransformer):
     """ Eliminates inverters in the DAG for analog PIM with dual-contact cells (DCC) capability """
 
-    def apply(self, dag):
-        """ Apply inverter elimination in the DAG """
+    name = 'inv_elim'
+    invalidates = ['wire_copy']  # Fanouts of inverters are merged
+    shares_topo_order = True  # Removed inverters are skipped by later passes
+
+    def apply(self, dag, gate_ids=None):
+        """ Apply inverter elimination in the DAG, or to a worklist of gate IDs in topological order """
+        if gate_ids is None:
+            gate_ids = dag.get_topo_sorted_gate_id_list()
         total_inv = 0
-        for gate_id in dag.get_topo_sorted_gate_id_list():
+        for gate_id in gate_ids:
             if self.is_target_gate(dag, gate_id):
                 total_inv += self.run_xform_inv_elimination(dag, gate_id)
         if self.debug_level >= 1:
@@ -14,15 +14,20 @@ from dag_transformer_base import DagTransformer
 class MajNormalizer(DagTransformer):
     """ Normalizes other gates to majority gates in the DAG """
 
+    name = 'maj_norm'
+    shares_topo_order = True  # Inserted zero/one gates are never targets of later passes
+
     def __init__(self):
         """ Initialize """
         self.solution = 0  # 0: separate zero/one gates; 1: single zero/one gate
 
-    def apply(self, dag):
-        """ Apply the majority normalization transformation to the DAG """
+    def apply(self, dag, gate_ids=None):
+        """ Apply the majority normalization transformation to the DAG, or to a worklist of gate IDs in topological order """
+        if gate_ids is None:
+            gate_ids = dag.get_topo_sorted_gate_id_list()
         total_and = 0
         total_or = 0
-        for gate_id in dag.get_topo_sorted_gate_id_list():
+        for gate_id in gate_ids:
             gate = dag.graph.nodes[gate_id]
             if gate['gate_func'] == "and2":
                 total_and += self.run_xform_and_to_maj(dag, gate_id)
@@ -51,7 +56,7 @@ class MajNormalizer(DagTransformer):
         if self.debug_level >= 2:
             print(f'DAG-Transform: AND to MAJ: {gate_id} -> {zero_gate_id}, {gate_id}')
         # Update the original gate
-        orig_gate['gate_func'] = "maj3"
+        dag.set_gate_func(gate_id, "maj3")
         orig_gate['inputs'].append(zero_wire)
         return 1
 
@@ -75,7 +80,7 @@ class MajNormalizer(DagTransformer):
         if self.debug_level >= 2:
             print(f'DAG-Transform: OR to MAJ: {gate_id} -> {one_gate_id}, {gate_id}')
         # Update the original gate
-        gate['gate_func'] = "maj3"
+        dag.set_gate_func(gate_id, "maj3")
         gate['inputs'].append(one_wire)
         return 1
 
@@ -14,15 +14,22 @@ from dag_transformer_base import DagTransformer
 class MultiDestOptimizer(DagTransformer):
     """ MultiDestOptimizer class """
 
+    name = 'multi_dest_opt'
+    invalidates = ['wire_copy']
+    digital_semantics = False
+    shares_topo_order = True
+
     def __init__(self, num_regs):
         """ Initialize """
         self.num_regs = num_regs  # Determine the max number of packing
         self.max_outputs = 3  # Max number of outputs for AAP
 
-    def apply(self, dag):
-        """ Apply the multi-destination optimization to the DAG """
+    def apply(self, dag, gate_ids=None):
+        """ Apply the multi-destination optimization to the DAG, or to a worklist of gate IDs in topological order """
+        if gate_ids is None:
+            gate_ids = dag.get_topo_sorted_gate_id_list()
         total_packed = 0
-        for gate_id in dag.get_topo_sorted_gate_id_list():
+        for gate_id in gate_ids:
             if self.is_target_gate(dag, gate_id):
                 total_packed += self.run_xform_multi_dest_opt(dag, gate_id)
         if self.debug_level >= 1:
@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+File: dag_pass_manager.py
+Description: Pass manager for DAG transformers with timing, dependency tracking and checks
+Author: Deyuan Guo <guodeyuan@gmail.com>
+Date: 2026-10-17
+"""
+
+import time
+
+from dag_transformer_base import DagTransformer
+
+
+class DagPassManager:
+    """ Run registered DAG transformers in order
+
+    Each pass declares requires and invalidates by pass names. A pass is skipped if its
+    result is still valid and the DAG has not changed since it ran. After each pass, a
+    checkpoint callback runs sanity checks at a chosen granularity:
+        pass: check after every pass
+        sampled: check after every N-th pass
+        end: no per-pass checks, leave checks to the final checkpoint
+    With verify_passes, checked passes are also verified by simulation in the mode from
+    get_checkpoint_verify_mode. By default, only the initial and final DAG are verified.
+    Consecutive passes that share a topological order get the same gate ID list, sorted
+    once before the first of them, instead of sorting the DAG again.
+    A run can resume after a pass of a DAG checkpoint, and stop after a pass.
+    """
+
+    CHECK_GRANULARITIES = ['pass', 'sampled', 'end']
+
+    def __init__(self, checkpoint, check_granularity='pass', check_interval=2, debug_level=0, verify_passes=False):
+        """ Init with a checkpoint callback: checkpoint(dag, tag, check, verify_mode) """
+        if check_granularity not in self.CHECK_GRANULARITIES:
+            raise ValueError(f"Error: Unsupported DAG check granularity '{check_granularity}'")
+        self.checkpoint = checkpoint
+        self.check_granularity = check_granularity
+        self.check_interval = max(1, check_interval)
+        self.debug_level = debug_level
+        self.verify_passes = verify_passes
+        self.passes = []
+        self.topo_order = None  # topological order shared by consecutive passes
+        self.valid_passes = {}  # pass name -> DAG version after the pass
+        self.stats = []  # (pass name, seconds, gates before, gates after, wires before, wires after)
+        self.check_seconds = 0.0
+
+    def add_pass(self, dag_pass: DagTransformer):
+        """ Register a pass """
+        if not dag_pass.name:
+            raise ValueError(f"Error: DAG pass {type(dag_pass).__name__} has no name")
+        self.passes.append(dag_pass)
+        return self
+
+    def get_pass_names(self):
+        """ Get names of registered passes in order """
+        return [dag_pass.name for dag_pass in self.passes]
+
+    def get_checkpoint_verify_mode(self, tag, pim_mode):
+        """ Get the PIM mode to simulate a DAG checkpoint, or None if it has no valid semantics
+            The DAG keeps digital semantics until a pass without them, and has pim_mode
+            semantics again after the last pass.
+        """
+        if tag == 'initial':
+            return 'digital'
+        if tag == 'final':
+            return pim_mode
+        names = self.get_pass_names()
+        name = tag[len('post_'):] if tag.startswith('post_') else ''
+        if name not in names:
+            return None
+        index = names.index(name)
+        if index == len(names) - 1:
+            return pim_mode
+        if all(dag_pass.digital_semantics for dag_pass in self.passes[:index + 1]):
+            return 'digital'
+        return None
+
+    def run(self, dag, start_after=None, stop_after=None):
+        """ Run registered passes on the DAG, optionally only passes after start_after until stop_after """
+        names = self.get_pass_names()
+        for name in [start_after, stop_after]:
+            if name is not None and name not in names:
+                raise ValueError(f"Error: Unknown DAG pass '{name}', expected one of: {', '.join(names)}")
+        start_index = names.index(start_after) + 1 if start_after is not None else 0
+        if stop_after is not None and names.index(stop_after) < start_index:
+            raise ValueError(f"Error: DAG pass '{stop_after}' is already done in the checkpoint after '{start_after}'")
+
+        # Passes done before the checkpoint satisfy requirements
+        for dag_pass in self.passes[:start_index]:
+            self.valid_passes[dag_pass.name] = None
+        for index in range(start_index, len(self.passes)):
+            self.run_pass(dag, self.passes[index], index)
+            if self.passes[index].name == stop_after:
+                break
+        if self.debug_level >= 1:
+            self.report()
+
+    def run_pass(self, dag, dag_pass, index):
+        """ Run a pass with dependency tracking, timing and checks """
+        name = dag_pass.name
+        if self.valid_passes.get(name) == dag.get_version():
+            if self.debug_level >= 1:
+                print(f'DAG-Pass: Skip {name}, DAG unchanged since last run')
+            return
+        for required in dag_pass.requires:
+            if required not in self.valid_passes:
+                raise ValueError(f"Error: DAG pass {name} requires {required}")
+
+        num_gates = dag.graph.number_of_nodes()
+        num_wires = dag.graph.number_of_edges()
+        start = time.perf_counter()
+        if dag_pass.shares_topo_order:
+            if self.topo_order is None:
+                self.topo_order = dag.get_topo_sorted_gate_id_list()
+            else:
+                # Earlier sharing passes may remove gates
+                self.topo_order = [gate_id for gate_id in self.topo_order if dag.graph.has_node(gate_id)]
+            dag_pass.apply(dag, self.topo_order)
+        else:
+            self.topo_order = None
+            dag_pass.apply(dag)
+        seconds = time.perf_counter() - start
+        self.stats.append((name, seconds, num_gates, dag.graph.number_of_nodes(), num_wires, dag.graph.number_of_edges()))
+
+        for invalidated in dag_pass.invalidates:
+            self.valid_passes.pop(invalidated, None)
+        self.valid_passes[name] = dag.get_version()
+
+        if self.check_granularity == 'pass':
+            check = True
+        elif self.check_granularity == 'sampled':
+            check = (index + 1) % self.check_interval == 0
+        else:
+            check = False
+        tag = f"post_{name}"
+        verify_mode = self.get_checkpoint_verify_mode(tag, dag.pim_mode) if self.verify_passes else None
+        start = time.perf_counter()
+        self.checkpoint(dag, tag, check, verify_mode)
+        self.check_seconds += time.perf_counter() - start
+
+    def report(self):
+        """ Print per-pass wall time and DAG size deltas """
+        total_seconds = 0.0
+        for name, seconds, gates_before, gates_after, wires_before, wires_after in self.stats:
+            total_seconds += seconds
+            print(f'DAG-Pass: {name:<16} {seconds:8.3f} s, gates {gates_before} -> {gates_after} ({gates_after - gates_before:+d}),'
+                  f' wires {wires_before} -> {wires_after} ({wires_after - wires_before:+d})')
+        print(f'DAG-Pass: Total {total_seconds:.3f} s in {len(self.stats)} passes, {self.check_seconds:.3f} s in checkpoints ({self.check_granularity})')
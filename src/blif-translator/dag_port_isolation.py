@@ -15,11 +15,15 @@ from dag_transformer_base import DagTransformer
 class PortIsolation(DagTransformer):
     """ Inserts copy gates for input ports and output ports """
 
-    def apply(self, dag):
-        """ Apply the port isolation transformation to the DAG """
+    name = 'port_isolation'
+
+    def apply(self, dag, gate_ids=None):
+        """ Apply the port isolation transformation to the DAG, or to a worklist of gate IDs in topological order """
+        if gate_ids is None:
+            gate_ids = dag.get_topo_sorted_gate_id_list()
         num_in_copy = 0
         num_out_copy = 0
-        for gate_id in dag.get_topo_sorted_gate_id_list():
+        for gate_id in gate_ids:
             if dag.is_in_port(gate_id):
                 num_in_copy += self.run_xform_copy_input_port(dag, gate_id)
             elif dag.is_out_port(gate_id):
@@ -78,7 +82,7 @@ class PortIsolation(DagTransformer):
         new_wire = dag.uniqufy_wire_name(f"cp_{self.sanitize_name(out_port_gate_id)}")
         dag.replace_output_wire(fanin_gate_id, orig_wire, new_wire)
         for fanout_gate_id in fanouts:
-            dag.graph[fanin_gate_id][fanout_gate_id]['wire_name'] = new_wire
+            dag.rename_wire(fanin_gate_id, fanout_gate_id, new_wire)
             dag.replace_input_wire(fanout_gate_id, orig_wire, new_wire)
 
         # Then insert a copy gate to isolate the output port
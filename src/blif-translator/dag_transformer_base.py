@@ -15,6 +15,13 @@ class DagTransformer:
     # A common debug level for all transformers
     debug_level = 0
 
+    # Pass metadata for DagPassManager
+    name = ''  # Pass name used by requires, invalidates and checkpoint tags
+    requires = []  # Passes that must run before this pass
+    invalidates = []  # Passes whose results are invalidated by this pass
+    digital_semantics = True  # Whether the DAG still simulates correctly in digital mode after this pass
+    shares_topo_order = False  # Whether apply(dag, gate_ids) can take the topological order of an earlier pass
+
     def apply(self, dag: DAG):
         """ Apply a transformation to the input DAG """
         raise NotImplementedError("Subclasses must implement the apply() method.")
@@ -16,10 +16,15 @@ from collections import deque
 class WireCopyInserter(DagTransformer):
     """ FanoutNormalizer class """
 
-    def apply(self, dag):
-        """ Apply the wire copy insertion transformation to the DAG """
+    name = 'wire_copy'
+    requires = ['port_isolation']  # Input ports must not drive input-destroying gates
+
+    def apply(self, dag, wire_names=None):
+        """ Apply the wire copy insertion transformation to the DAG, or to a worklist of wire names """
+        if wire_names is None:
+            wire_names = dag.get_wire_name_list(merge_segments=False)
         total_copy = 0
-        wire_queue = deque(dag.get_wire_name_list(merge_segments=False))
+        wire_queue = deque(wire_names)
         while wire_queue:
             wire = wire_queue.popleft()
             if self.is_target_wire(dag, wire):
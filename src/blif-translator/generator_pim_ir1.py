@@ -97,17 +97,34 @@ class GeneratorPimIr1():
             encoding += f"__n{inv_str}"
         return encoding
 
-    def generate_instruction(self, gate_id):
-        """ Generate a single IR-1 instruction line """
+    def get_instruction(self, gate_id):
+        """ Get a single IR-1 instruction as (opcode, outputs, inputs), or None for ports """
         gate = self.dag.graph.nodes[gate_id]
         gate_func = gate['gate_func']
         if gate_func in ['in_port', 'out_port']:
-            return ""
+            return None
 
         opcode = self.get_gate_func_encoding(gate_id)
         outputs = self.sanitize_token_list(gate['outputs'])
         inputs = self.sanitize_token_list(gate['inputs'])
+        return opcode, outputs, inputs
+
+    def get_instruction_list(self):
+        """ Get all IR-1 instructions as (opcode, outputs, inputs) in topological order """
+        instructions = []
+        for gate_id in self.dag.get_topo_sorted_gate_id_list():
+            instruction = self.get_instruction(gate_id)
+            if instruction is not None:
+                instructions.append(instruction)
+        return instructions
+
+    def generate_instruction(self, gate_id):
+        """ Generate a single IR-1 instruction line """
+        instruction = self.get_instruction(gate_id)
+        if instruction is None:
+            return ""
 
+        opcode, outputs, inputs = instruction
         if len(inputs) == 0:
             return f"{opcode} {' '.join(outputs)}\n"
         dest_str = ' '.join(outputs)
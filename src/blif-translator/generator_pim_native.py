@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+File: generator_pim_native.py
+Description: Generator for PIMeval API C++ with native scheduling and register allocation
+Author: Deyuan Guo <guodeyuan@gmail.com>
+Date: 2026-10-17
+"""
+
+import os
+import sys
+
+from pim_scheduler import PimScheduler
+
+# Shared modules in the parent directory
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+import pim_target
+from stats_generator import StatsGenerator
+from cost_estimator import CostEstimator
+from code_gen_pimeval_digital import PimEvalAPIDigitalCodeGenerator
+from code_gen_pimeval_analog import PimEvalAPIAnalogCodeGenerator
+
+
+class GeneratorPimNative():
+    """ Generator for PIMeval API C++ with native scheduling and register allocation
+
+    This bypasses clang/LLVM and the RISC-V assembly parser. PIM IR-1 instructions are
+    scheduled and register-allocated by PimScheduler, and the resulting bit-serial
+    instruction sequence is passed to the same PIMeval API code generators.
+    """
+
+    def __init__(self, instructions, inputs, outputs, module_name, pim_mode, num_regs, debug_level=0,
+                 tck_ns=pim_target.TCK_NS, energy_table_file=''):
+        """ Init
+            instructions: list of (opcode, outputs, inputs) in PIM IR-1 format
+            energy_table_file: optional JSON file of pim_target opcode -> energy in pJ
+        """
+        self.instructions = instructions
+        self.inputs = inputs
+        self.outputs = outputs
+        self.module_name = module_name
+        self.pim_mode = pim_mode
+        self.num_regs = num_regs
+        self.debug_level = debug_level
+        self.tck_ns = tck_ns
+        self.energy_table_file = energy_table_file
+        self.stats = ''
+
+    def generate_code(self):
+        """ Generate PIMeval API C++ code """
+        scheduler = PimScheduler(self.instructions, self.inputs, self.outputs, self.pim_mode, self.num_regs, self.debug_level)
+        bit_serial_asm = scheduler.run()
+
+        stats_generator = StatsGenerator(bit_serial_asm)
+        self.stats = stats_generator.generateStats()
+        print("Info: ", self.stats)
+        energy_table = CostEstimator.load_energy_table(self.energy_table_file) if self.energy_table_file else None
+        CostEstimator(bit_serial_asm, self.pim_mode, self.tck_ns, energy_table).estimate().report()
+
+        generator_class_map = {
+            "analog": PimEvalAPIAnalogCodeGenerator,
+            "digital": PimEvalAPIDigitalCodeGenerator,
+        }
+        if self.pim_mode not in generator_class_map:
+            raise ValueError(f"Error: Unsupported PIM mode: {self.pim_mode}")
+        ports = set(self.inputs + self.outputs)
+        code_generator = generator_class_map[self.pim_mode](bit_serial_asm, self.module_name, ports)
+        return f"//{self.stats}\n" + code_generator.generateCode()
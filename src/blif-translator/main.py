@@ -12,12 +12,14 @@ import sys
 import argparse
 import os
 import traceback
-import networkx as nx
 
 import blif_parser
 from blif_dag import DAG
+from blif_dag_verification import DagVerifier
+from blif_dag_equivalence import DagEquivChecker
 
 from dag_transformer_base import DagTransformer
+from dag_pass_manager import DagPassManager
 from dag_port_isolation import PortIsolation
 from dag_maj_normalizer import MajNormalizer
 from dag_inv_eliminator import InvEliminator
@@ -28,10 +30,13 @@ from dag_wire_copy_inserter import WireCopyInserter
 from generator_asm import GeneratorAsm
 from generator_bitwise import GeneratorBitwise
 from generator_pim_ir1 import GeneratorPimIr1
+from generator_pim_native import GeneratorPimNative
+from pim_ir1_reader import PimIr1Reader
 
 # TODO: avoid importing util from parent directory
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 import util
+import pim_target
 
 
 class BlifTranslator:
@@ -47,19 +52,47 @@ class BlifTranslator:
         self.pim_mode = ''
         self.visualize = False
         self.debug_level = 0
+        self.blif_parser = ''
+        self.verify_backend = ''
+        self.verify_mode = ''
+        self.verify_budget = 0
+        self.verify_seed = 0
+        self.equiv_check = False
+        self.check_granularity = ''
+        self.check_interval = 0
+        self.verify_passes = False
+        self.snapshot_dir = ''
+        self.from_checkpoint = ''
+        self.stop_after = ''
+        self.tck_ns = 0
+        self.energy_table = ''
 
 
     def parse_args(self, input_args):
         """ Parse command line arguments """
         arg_parser = argparse.ArgumentParser(description='BLIF Translator')
-        arg_parser.add_argument('--input-file', '-i', type=str, required=True, help='Input circuit in BLIF format')
+        arg_parser.add_argument('--input-file', '-i', type=str, default='', help='Input circuit in BLIF format, or PIM IR-1 format with .pim_ir1 suffix. Not needed with --from-checkpoint')
         arg_parser.add_argument('--module-name', '-m', type=str, required=True, help='Bit-serial compiler module name')
         arg_parser.add_argument('--output-file-prefix', '-o', type=str, required=True, help='Bit-serial compiler output file name prefix')
-        arg_parser.add_argument('--output-formats', '-f', type=str, required=True, help='Output formats: comma-separated: asm, bitwise, pim_ir1')
+        arg_parser.add_argument('--output-formats', '-f', type=str, required=True, help='Output formats: comma-separated: asm, bitwise, pim_ir1, native')
         arg_parser.add_argument('--num-regs', '-r', type=int, default=4, choices=range(2, 16), help='Number of registers 2~16')
         arg_parser.add_argument('--pim-mode', '-p', type=str, default='digital', choices=['digital', 'analog'], help='PIM architecture mode: digital, analog')
         arg_parser.add_argument('--visualize', action='store_true', default=False, help='Enable visualization of the DAG')
         arg_parser.add_argument('--debug_level', type=int, default=1, help='Enable debug messages')
+        arg_parser.add_argument('--verify-backend', type=str, default='python', choices=DagVerifier.BACKENDS, help='DAG verification simulation backend: python (default), numpy')
+        arg_parser.add_argument('--verify-mode', type=str, default='auto', choices=DagVerifier.MODES, help='DAG verification test vectors: auto (default, exhaustive up to 16 inputs), basic, exhaustive, random, corner')
+        arg_parser.add_argument('--verify-budget', type=int, default=4096, help='Max number of DAG verification test vectors of random and corner tests')
+        arg_parser.add_argument('--verify-seed', type=int, default=0, help='Random seed of DAG verification test vectors')
+        arg_parser.add_argument('--equiv-check', action='store_true', default=False, help='Prove the final DAG is equivalent to the initial DAG with a SAT solver')
+        arg_parser.add_argument('--check-granularity', type=str, default='pass', choices=DagPassManager.CHECK_GRANULARITIES, help='DAG sanity checks after: pass (default, every pass), sampled, end (final DAG only)')
+        arg_parser.add_argument('--check-interval', type=int, default=2, help='Check after every N passes with --check-granularity sampled')
+        arg_parser.add_argument('--verify-passes', action='store_true', default=False, help='Also verify the DAG by simulation at --check-granularity, not only the initial and final DAG')
+        arg_parser.add_argument('--snapshot-dir', type=str, default='', help='Save a binary DAG snapshot at each checkpoint into this directory')
+        arg_parser.add_argument('--from-checkpoint', type=str, default='', help='Resume from a DAG snapshot saved with --snapshot-dir, skipping BLIF parsing and done passes')
+        arg_parser.add_argument('--stop-after', type=str, default='', help='Stop after this DAG pass, skipping remaining passes and code generation')
+        arg_parser.add_argument('--tck-ns', type=float, default=pim_target.TCK_NS, help='DRAM tCK in ns for native cost estimation')
+        arg_parser.add_argument('--energy-table', type=str, default='', help='JSON file of per-opcode energy in pJ for native cost estimation')
+        arg_parser.add_argument('--blif-parser', type=str, default='stream', choices=['stream', 'lark'], help='BLIF parser: stream (default), lark')
 
         args = arg_parser.parse_args(input_args)
 
@@ -71,27 +104,56 @@ class BlifTranslator:
         self.pim_mode = args.pim_mode
         self.visualize = args.visualize
         self.debug_level = args.debug_level
+        self.blif_parser = args.blif_parser
+        self.verify_backend = args.verify_backend
+        self.verify_mode = args.verify_mode
+        self.verify_budget = args.verify_budget
+        self.verify_seed = args.verify_seed
+        self.equiv_check = args.equiv_check
+        self.check_granularity = args.check_granularity
+        self.check_interval = args.check_interval
+        self.verify_passes = args.verify_passes
+        self.snapshot_dir = args.snapshot_dir
+        self.from_checkpoint = args.from_checkpoint
+        self.stop_after = args.stop_after
+        self.tck_ns = args.tck_ns
+        self.energy_table = args.energy_table
 
         if self.debug_level >= 2 and 'asm' in self.output_formats:
             self.visualize = True
 
         success = True
-        if not os.path.isfile(self.input_file):
+        if self.from_checkpoint and not os.path.isfile(self.from_checkpoint):
+            print(f"Error: DAG checkpoint file '{self.from_checkpoint}' does not exist.")
+            success = False
+        if not self.from_checkpoint and not os.path.isfile(self.input_file):
             print(f"Error: Input file '{self.input_file}' does not exist.")
             success = False
+        if self.check_interval < 1:
+            print(f"Error: DAG check interval {self.check_interval} must be positive.")
+            success = False
+        if self.verify_budget < 4:
+            print(f"Error: DAG verification budget {self.verify_budget} is less than 4 basic tests.")
+            success = False
 
         if not success:
             raise ValueError("Invalid command line arguments")
 
-    def debug_checkpoint(self, dag, tag):
-        """ Print or visualizer the DAG for debugging """
+    def debug_checkpoint(self, dag, tag, check=True, verify_mode=None):
+        """ Print or visualizer the DAG for debugging. Run sanity check and verification if enabled """
         if self.debug_level >= 1:
             print("Info: BLIF translator DAG checkpoint", tag)
-            dag.sanity_check()
-            if tag == 'initial':
-                dag.verify_dag(pim_mode='digital')
-            elif tag == 'final':
-                dag.verify_dag(pim_mode=self.pim_mode)
+            if check:
+                dag.sanity_check()
+                if verify_mode:
+                    dag.verify_dag(pim_mode=verify_mode)
+
+        if self.snapshot_dir:
+            os.makedirs(self.snapshot_dir, exist_ok=True)
+            snapshot_file = os.path.join(self.snapshot_dir, f"{self.module_name}_{tag}.dagsnap")
+            DAG.save_dag_snapshot(dag, snapshot_file, tag)
+            if self.debug_level >= 1:
+                print(f"Info: Saved DAG snapshot {snapshot_file}")
 
         if self.visualize:
             DAG.save_dag_as_json(dag, f"dag_{tag}.json")
@@ -113,39 +175,34 @@ class BlifTranslator:
         #self.debug_checkpoint(dag, "post_maj_norm")
 
 
-    def run_analog_optimization(self, dag):
-        """ Run optimizations for analog PIM mode """
-        print("Info: Optimizing DAG for analog PIM")
+    def create_analog_pass_manager(self):
+        """ Create the pass manager of analog PIM optimizations """
+        pass_manager = DagPassManager(self.debug_checkpoint, self.check_granularity, self.check_interval,
+                                      self.debug_level, self.verify_passes)
 
         # Analog PIM: Copy external inputs to register rows
-        port_isolation = PortIsolation()
-        port_isolation.apply(dag)
-        self.debug_checkpoint(dag, "post_port_isolation")
+        pass_manager.add_pass(PortIsolation())
 
         # Analog PIM: Normalize majority gates
-        maj_normalizer = MajNormalizer()
-        maj_normalizer.apply(dag)
-        self.debug_checkpoint(dag, "post_maj_norm")
+        pass_manager.add_pass(MajNormalizer())
 
         # Analog PIM: Eliminate inverters
-        inv_eliminator = InvEliminator()
-        inv_eliminator.apply(dag)
-        self.debug_checkpoint(dag, "post_inv_elim")
+        pass_manager.add_pass(InvEliminator())
 
         ## Analog PIM: Reuse TRA inputs to drive next stage gates
-        inout_var_reuse = InoutVarReusing()
-        inout_var_reuse.apply(dag)
-        self.debug_checkpoint(dag, "post_inout_var_reuse")
+        pass_manager.add_pass(InoutVarReusing())
 
         ## Analog PIM: Utilize multi-destination gates
-        multi_dest_optimizer = MultiDestOptimizer(self.num_regs)
-        multi_dest_optimizer.apply(dag)
-        self.debug_checkpoint(dag, "post_multi_dest_opt")
+        pass_manager.add_pass(MultiDestOptimizer(self.num_regs))
 
         ## Analog PIM: Copy wires that drives multiple input-destroying gates
-        wire_copy_inserter = WireCopyInserter()
-        wire_copy_inserter.apply(dag)
-        self.debug_checkpoint(dag, "post_wire_copy")
+        pass_manager.add_pass(WireCopyInserter())
+        return pass_manager
+
+    def run_analog_optimization(self, dag, start_after=None):
+        """ Run optimizations for analog PIM mode, optionally only passes after start_after """
+        print("Info: Optimizing DAG for analog PIM")
+        self.create_analog_pass_manager().run(dag, start_after, self.stop_after or None)
 
 
     def run_code_generation(self, dag):
@@ -176,17 +233,123 @@ class BlifTranslator:
             if os.path.isfile(out_file):
                 print(f"Warning: Output file '{out_file}' already exists and will be overwritten.")
             util.writeToFile(out_file, code)
+        if 'native' in self.output_formats:
+            ir1_generator = GeneratorPimIr1(dag, self.pim_mode, self.num_regs)
+            self.run_native_code_generation(ir1_generator.get_instruction_list(),
+                    ir1_generator.sanitize_token_list(dag.get_in_ports()),
+                    ir1_generator.sanitize_token_list(dag.get_out_ports()))
+
+    def run_native_code_generation(self, instructions, inputs, outputs):
+        """ Run native scheduling and PIMeval API code generation from IR-1 instructions """
+        print("Info: Generating PIMeval API with native scheduling")
+        generator = GeneratorPimNative(instructions, inputs, outputs,
+                self.module_name, self.pim_mode, self.num_regs, self.debug_level,
+                self.tck_ns, self.energy_table)
+        code = generator.generate_code()
+        out_file = self.output_file_prefix + '.hpp'
+        if os.path.isfile(out_file):
+            print(f"Warning: Output file '{out_file}' already exists and will be overwritten.")
+        util.writeToFile(out_file, code)
+
+    def run_from_pim_ir1(self):
+        """ Run native code generation from a PIM IR-1 file, skipping BLIF parsing and DAG passes """
+        formats = [fmt for fmt in self.output_formats.split(',') if fmt]
+        if formats != ['native']:
+            raise ValueError(f"Error: PIM IR-1 input only supports output format 'native', got '{self.output_formats}'")
+        reader = PimIr1Reader(self.debug_level)
+        reader.read_file(self.input_file)
+        print(f"Info: Read {len(reader.instructions)} PIM IR-1 instructions of module {reader.module_name}")
+        if reader.pim_mode != self.pim_mode:
+            print(f"Warning: Using PIM mode '{reader.pim_mode}' from PIM IR-1 instead of '{self.pim_mode}'")
+            self.pim_mode = reader.pim_mode
+        if reader.num_regs != self.num_regs:
+            print(f"Info: PIM IR-1 was generated for {reader.num_regs} registers, scheduling for {self.num_regs}")
+        self.run_native_code_generation(reader.get_instruction_list(), reader.inputs, reader.outputs)
+
+
+    def load_checkpoint(self):
+        """ Load a DAG checkpoint. Return the DAG and the checkpoint tag """
+        dag, tag = DAG.load_dag_snapshot(self.from_checkpoint, self.debug_level, self.get_verifier_options())
+        print(f"Info: Resuming from DAG checkpoint '{tag}' of module {dag.module_name} in {self.from_checkpoint}")
+        if tag != 'initial' and tag != 'final' and not tag.startswith('post_'):
+            raise ValueError(f"Error: Cannot resume from unknown DAG checkpoint '{tag}'")
+        if dag.pim_mode != self.pim_mode:
+            print(f"Warning: Using PIM mode '{dag.pim_mode}' from DAG checkpoint instead of '{self.pim_mode}'")
+            self.pim_mode = dag.pim_mode
+        if self.debug_level >= 1:
+            dag.sanity_check()
+            verify_mode = self.get_checkpoint_verify_mode(tag)
+            if verify_mode:
+                dag.verify_dag(pim_mode=verify_mode)
+        return dag, tag
+
+    def get_verifier_options(self):
+        """ Get DAG verification settings from command line arguments """
+        return {'backend': self.verify_backend, 'mode': self.verify_mode, 'budget': self.verify_budget, 'seed': self.verify_seed}
 
+    def get_checkpoint_verify_mode(self, tag):
+        """ Get the PIM mode to simulate a DAG checkpoint, or None if it has no valid semantics """
+        return self.create_analog_pass_manager().get_checkpoint_verify_mode(tag, self.pim_mode)
 
     def run(self, input_args):
         """ Run the BLIF parser """
         self.parse_args(input_args)
         DagTransformer.debug_level = self.debug_level
 
+        if self.input_file.endswith('.pim_ir1'):
+            self.run_from_pim_ir1()
+            return
+
+        if self.from_checkpoint:
+            dag, tag = self.load_checkpoint()
+        else:
+            dag = self.create_dag()
+            tag = 'initial'
+            self.debug_checkpoint(dag, tag, verify_mode='digital')
+        if self.stop_after and (self.pim_mode != 'analog' or tag == 'final'):
+            raise ValueError(f"Error: No DAG pass '{self.stop_after}' to run after checkpoint '{tag}' in {self.pim_mode} PIM mode")
+
+        # Encode the initial or resumed DAG as the reference of equivalence checking
+        equiv_checker = None
+        if self.equiv_check:
+            reference_mode = self.get_checkpoint_verify_mode(tag)
+            if reference_mode:
+                equiv_checker = DagEquivChecker(self.debug_level)
+                equiv_checker.add_reference(dag, pim_mode=reference_mode)
+            else:
+                print(f"Warning: Skip equivalence check from DAG checkpoint '{tag}' without valid semantics")
+
+        # Run ananlog optimizations if needed
+        if tag != 'final':
+            start_after = tag[len('post_'):] if tag.startswith('post_') else None
+            if self.pim_mode == "analog":
+                self.run_analog_optimization(dag, start_after)
+            elif self.pim_mode == "digital":
+                self.run_digital_optimization(dag)
+
+        if self.stop_after:
+            print(f"Info: Stopped after DAG pass {self.stop_after}")
+            return
+
+        self.debug_checkpoint(dag, "final", verify_mode=self.pim_mode)
+
+        if equiv_checker:
+            print(f"Info: Checking equivalence of the {tag} and final DAG")
+            equiv_checker.check(dag, pim_mode=self.pim_mode)
+
+        # Generate code into the output file
+        self.run_code_generation(dag)
+
+    def create_dag(self):
+        """ Parse the BLIF file and create the DAG """
         # Run BLIF parser
-        parser = blif_parser.BlifParser(self.module_name, self.debug_level)
-        file_content = util.getContent(self.input_file)
-        parser.parse(file_content)
+        if self.blif_parser == 'lark':
+            parser = blif_parser.BlifParser(self.module_name, self.debug_level)
+            file_content = util.getContent(self.input_file)
+            parser.parse(file_content)
+        else:
+            parser = blif_parser.BlifReader(self.module_name, self.debug_level)
+            parser.read_file(self.input_file)
         in_ports = parser.get_in_ports()
         out_ports = parser.get_out_ports()
         gate_info_list = parser.get_gate_info_list()
@@ -198,21 +361,10 @@ class BlifTranslator:
             out_ports=out_ports,
             gate_info_list=gate_info_list,
             pim_mode=self.pim_mode,
-            debug_level=self.debug_level
+            debug_level=self.debug_level,
+            verifier_options=self.get_verifier_options()
         )
-
-        self.debug_checkpoint(dag, "initial")
-
-        # Run ananlog optimizations if needed
-        if self.pim_mode == "analog":
-            self.run_analog_optimization(dag)
-        elif self.pim_mode == "digital":
-            self.run_digital_optimization(dag)
-
-        self.debug_checkpoint(dag, "final")
-
-        # Generate code into the output file
-        self.run_code_generation(dag)
+        return dag
 
 
 # Main entry point
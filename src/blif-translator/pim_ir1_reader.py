@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+File: pim_ir1_reader.py
+Description: Reader for PIM IR-1 intermediate representation
+Author: Deyuan Guo <guodeyuan@gmail.com>
+Date: 2026-10-17
+"""
+
+import os
+import sys
+
+# Shared modules in the parent directory
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+import pim_target
+
+
+class PimIr1Reader:
+    """ Reader for PIM IR-1 text written by GeneratorPimIr1
+
+    Header directives are stored as attributes. Instructions are stored as a compact
+    list of (opcode, outputs, inputs) tuples in file order, with interned names, which
+    is the same format as GeneratorPimIr1.get_instruction_list().
+    """
+
+    HEADER_DIRECTIVES = ('.module', '.mode', '.num_regs', '.inputs', '.outputs', '.temps')
+
+    def __init__(self, debug_level=0):
+        """ Initialize the PIM IR-1 reader """
+        self.debug_level = debug_level
+        self.module_name = ''
+        self.pim_mode = ''
+        self.num_regs = 0
+        self.inputs = []
+        self.outputs = []
+        self.temps = []
+        self.instructions = []
+
+    def read_file(self, file_name):
+        """ Read a PIM IR-1 file """
+        with open(file_name, 'r') as file:
+            self.read(file)
+
+    def read(self, lines):
+        """ Read PIM IR-1 from an iterable of lines, e.g. a file object """
+        directives = {}
+        instructions = []
+        intern = sys.intern
+        for line_no, line in enumerate(lines, 1):
+            line = line.split('#', 1)[0].strip()
+            if not line:
+                continue
+            if line[0] == '.':
+                tokens = line.split()
+                if tokens[0] not in self.HEADER_DIRECTIVES:
+                    raise ValueError(f"Error: PIM IR-1 reader: Unknown directive '{tokens[0]}' at line {line_no}")
+                if instructions:
+                    raise ValueError(f"Error: PIM IR-1 reader: Directive '{tokens[0]}' after instructions at line {line_no}")
+                directives[tokens[0]] = tokens[1:]
+                continue
+            opcode, _, operands = line.partition(' ')
+            dest_str, _, src_str = operands.partition(',')
+            outputs = tuple(intern(name) for name in dest_str.split())
+            inputs = tuple(intern(name.strip()) for name in src_str.split(',')) if src_str else ()
+            self.check_instruction(opcode, outputs, inputs, line_no)
+            instructions.append((intern(opcode), outputs, inputs))
+
+        for directive in self.HEADER_DIRECTIVES[:3]:
+            if len(directives.get(directive, [])) != 1:
+                raise ValueError(f"Error: PIM IR-1 reader: Missing or invalid '{directive}' directive")
+        self.module_name = directives['.module'][0]
+        self.pim_mode = directives['.mode'][0]
+        if self.pim_mode not in ['digital', 'analog']:
+            raise ValueError(f"Error: PIM IR-1 reader: Unsupported PIM mode '{self.pim_mode}'")
+        if not directives['.num_regs'][0].isdigit():
+            raise ValueError(f"Error: PIM IR-1 reader: Invalid number of registers '{directives['.num_regs'][0]}'")
+        self.num_regs = int(directives['.num_regs'][0])
+        self.inputs = directives.get('.inputs', [])
+        self.outputs = directives.get('.outputs', [])
+        self.temps = directives.get('.temps', [])
+        self.instructions = instructions
+
+        if self.debug_level >= 2:
+            print('PIM IR-1 INSTRUCTIONS:')
+            print('-' * 20)
+            for instruction in self.instructions:
+                print(instruction)
+            print('-' * 20)
+
+    def check_instruction(self, opcode, outputs, inputs, line_no):
+        """ Check opcode, negation suffix and operand count of an instruction """
+        base, _, inv_bits = opcode.partition('__n')
+        if base not in pim_target.OPCODES:
+            raise ValueError(f"Error: PIM IR-1 reader: Unknown opcode '{opcode}' at line {line_no}")
+        if inv_bits and (len(inv_bits) != len(inputs) or inv_bits.strip('01')):
+            raise ValueError(f"Error: PIM IR-1 reader: Invalid negation suffix '{opcode}' at line {line_no}")
+        num_operands = len(pim_target.OPCODES[base]['operands'])
+        if len(outputs) + len(inputs) != num_operands or not outputs or '' in inputs:
+            raise ValueError(f"Error: PIM IR-1 reader: Opcode '{base}' expects {num_operands} operands at line {line_no}")
+
+    def get_instruction_list(self):
+        """ Get all IR-1 instructions as (opcode, outputs, inputs) """
+        return self.instructions
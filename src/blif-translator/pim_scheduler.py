@@ -0,0 +1,402 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+File: pim_scheduler.py
+Description: Native list scheduler and register allocator for PIM IR-1 instructions
+Author: Deyuan Guo <guodeyuan@gmail.com>
+Date: 2026-10-17
+"""
+
+import bisect
+import os
+import sys
+
+from blif_dag_topo_sort import ReadyQueue
+
+# Shared modules in the parent directory
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+import pim_target
+from asm_instruction import LinkedInstruction, TempManager
+
+
+# Analog IR-1 opcode -> gate function used by the bit-serial instruction sequence
+ANALOG_GATE_FUNCS = {
+    'inv1a': 'inv1',
+    'and2a': 'and2',
+    'or2a': 'or2',
+    'maj3a_o1': 'maj3',
+    'maj3a_o2': 'maj3',
+    'maj3a_o3': 'maj3',
+    'copy_a': 'copy',
+    'copy_inout_a': 'copy_inout',
+    'zero_a': 'zero',
+    'one_a': 'one',
+}
+
+
+class PimOp:
+    """ A decoded PIM IR-1 instruction """
+
+    __slots__ = ['index', 'opcode', 'outputs', 'inputs', 'uses', 'defs', 'inouts', 'gate_func']
+
+    def __init__(self, index, opcode, outputs, inputs, pim_mode):
+        """ Init. Decode def/use operands from pim_target operand kinds """
+        self.index = index
+        self.opcode = opcode
+        self.outputs = list(outputs)
+        self.inputs = list(inputs)
+        base = pim_target.get_base_opcode(opcode)
+        if base not in pim_target.OPCODES:
+            raise ValueError(f"Error: Unknown PIM IR-1 opcode '{opcode}'")
+        kinds = pim_target.OPCODES[base]['operands']
+        operands = self.outputs + self.inputs
+        if len(kinds) != len(operands):
+            raise ValueError(f"Error: PIM IR-1 opcode '{opcode}' expects {len(kinds)} operands but got {len(operands)}")
+        self.uses = list(dict.fromkeys(v for v, k in zip(operands, kinds) if k.endswith('_in') or k.endswith('_inout')))
+        self.defs = list(dict.fromkeys(v for v, k in zip(operands, kinds) if k.endswith('_out') or k.endswith('_inout')))
+        self.inouts = list(dict.fromkeys(v for v, k in zip(operands, kinds) if k.endswith('_inout')))
+        if pim_mode == 'analog':
+            self.gate_func = ANALOG_GATE_FUNCS.get(base, base) + opcode[len(base):]
+        else:
+            self.gate_func = opcode
+
+    def __str__(self):
+        return f"{self.opcode} {' '.join(self.outputs)}, {', '.join(self.inputs)}"
+
+
+class PimScheduler:
+    """ Native list scheduler and register allocator for PIM IR-1 instructions
+
+    IR-1 operands are mutable variables: an analog row_inout operand is read and then
+    overwritten by the gate result. The scheduler reorders instructions by register
+    pressure under RAW/WAR/WAW dependencies, then allocates registers with furthest
+    next-use eviction and spill read/write through temp rows. When all registers hold
+    operands of an instruction, an output takes the register of an input. Both the
+    IR-1 order and the list-scheduled order are allocated, and the one with fewer
+    estimated cycles based on pim_target TIMING is kept.
+
+    The result is the same bit-serial instruction sequence that the ASM translator
+    produces from RISC-V assembly, so it can feed the PIMeval API code generators.
+    """
+
+    def __init__(self, instructions, inputs, outputs, pim_mode, num_regs, debug_level=0):
+        """ Init
+            instructions: list of (opcode, outputs, inputs) in IR-1 order
+        """
+        self.pim_mode = pim_mode
+        self.num_regs = num_regs
+        self.debug_level = debug_level
+        self.inputs = list(inputs)
+        self.outputs = list(outputs)
+        self.all_regs = ([f't{i}' for i in range(7)] + [f's{i}' for i in range(12)])[:num_regs]
+        self.ops = [PimOp(i, opcode, outs, ins, pim_mode) for i, (opcode, outs, ins) in enumerate(instructions)]
+        self.bit_serial_asm = []
+        self.cycles = 0
+
+    def run(self):
+        """ Schedule and allocate registers. Return the bit-serial instruction list """
+        print("INFO: Running native scheduler and register allocator for PIM IR-1 ...")
+        orders = [('IR-1 order', list(range(len(self.ops)))), ('list schedule', self.list_schedule())]
+        best = None
+        for name, order in orders:
+            bit_serial_asm, cycles = self.allocate_registers(order)
+            print(f"INFO: Native scheduler: {name}: {len(bit_serial_asm)} instructions, {cycles} cycles")
+            if best is None or cycles < best[2]:
+                best = (name, bit_serial_asm, cycles)
+        name, self.bit_serial_asm, self.cycles = best
+        print(f"INFO: Native scheduler: Selected {name}")
+        if self.debug_level >= 2:
+            for i, inst in enumerate(self.bit_serial_asm):
+                print(f"DEBUG: [{i}] {inst}")
+        return self.bit_serial_asm
+
+    def list_schedule(self):
+        """ Reorder instructions by register pressure while keeping all dependencies
+
+        Score of a ready instruction: number of values it uses for the last time,
+        minus number of new values it defines that are used later. Ties prefer the
+        IR-1 order.
+        """
+        num_ops = len(self.ops)
+        succs = [[] for _ in range(num_ops)]
+        num_preds = [0] * num_ops
+        value_readers = []  # value id -> reader op indices
+        op_used_values = [[] for _ in range(num_ops)]  # op index -> used value ids
+        op_values = [[] for _ in range(num_ops)]  # op index -> used value ids, excluding inout
+        op_new_values = [[] for _ in range(num_ops)]  # op index -> defined value ids, excluding inout
+        current_value = {}
+        last_def = {}
+        readers = {}
+
+        def add_dep(src, dst):
+            if src != dst:
+                succs[src].append(dst)
+                num_preds[dst] += 1
+        def new_value():
+            value_readers.append([])
+            return len(value_readers) - 1
+
+        for op in self.ops:
+            i = op.index
+            for var in op.uses:
+                if var in last_def:
+                    add_dep(last_def[var], i)
+                if var not in current_value:
+                    current_value[var] = new_value()
+                value = current_value[var]
+                value_readers[value].append(i)
+                op_used_values[i].append(value)
+                if var not in op.inouts:
+                    op_values[i].append(value)
+                readers.setdefault(var, []).append(i)
+            for var in op.defs:
+                if var in last_def:
+                    add_dep(last_def[var], i)
+                for reader in readers.get(var, []):
+                    add_dep(reader, i)
+                last_def[var] = i
+                readers[var] = []
+                current_value[var] = new_value()
+                if var not in op.inouts:
+                    op_new_values[i].append(current_value[var])
+
+        remaining = [len(r) for r in value_readers]
+        scheduled = [False] * num_ops
+        ready_score = {}
+        ready = ReadyQueue(ready_score)
+
+        def make_ready(i):
+            frees = sum(1 for value in op_values[i] if remaining[value] == 1)
+            allocs = sum(1 for value in op_new_values[i] if value_readers[value])
+            ready_score[i] = frees - allocs
+            ready.push(i, ready_score[i], i)
+            ready.size += 1
+
+        for i in range(num_ops):
+            if num_preds[i] == 0:
+                make_ready(i)
+        order = []
+        while ready.size:
+            i = ready.pop()
+            order.append(i)
+            scheduled[i] = True
+            for value in op_used_values[i]:
+                remaining[value] -= 1
+                if remaining[value] == 1:
+                    last_reader = next(r for r in value_readers[value] if not scheduled[r])
+                    if last_reader in ready_score and value in op_values[last_reader]:
+                        ready_score[last_reader] += 1
+                        ready.push(last_reader, ready_score[last_reader], last_reader)
+            for succ in succs[i]:
+                num_preds[succ] -= 1
+                if num_preds[succ] == 0:
+                    make_ready(succ)
+        if len(order) != num_ops:
+            raise ValueError("Error: Native scheduler failed: dependency cycle in PIM IR-1 instructions")
+        return order
+
+    def allocate_registers(self, order):
+        """ Allocate registers for instructions in the given order
+            Return the bit-serial instruction list and its estimated cycles
+        """
+        # Use/def positions of each variable in this order
+        use_pos = {}
+        def_pos = {}
+        final_def = {}
+        for pos, i in enumerate(order):
+            op = self.ops[i]
+            for var in op.uses:
+                use_pos.setdefault(var, []).append(pos)
+            for var in op.defs:
+                if var not in op.inouts:
+                    def_pos.setdefault(var, []).append(pos)
+                final_def[var] = pos
+        output_set = set(self.outputs)
+
+        def next_pos(pos_list, pos):
+            idx = bisect.bisect_right(pos_list, pos)
+            return pos_list[idx] if idx < len(pos_list) else None
+        def is_live_after(var, pos):
+            """ Check if the current value of a variable is used after a position """
+            next_use = next_pos(use_pos.get(var, []), pos)
+            if next_use is None:
+                return False
+            next_def = next_pos(def_pos.get(var, []), pos)
+            return next_def is None or next_use <= next_def
+
+        bit_serial_asm = []
+        cycles = [0]
+        reg_of = {}  # var -> reg
+        var_of = {}  # reg -> var
+        home = {var: var for var in self.inputs}  # var -> memory row holding its current value
+        slot_of = {}  # var -> temp row owned by the var
+        dirty = set()  # vars whose register value is not in memory
+        temp_manager = TempManager()
+
+        def emit(opcode, operands, line, latency_opcode):
+            bit_serial_asm.append(LinkedInstruction(opcode, operands, line))
+            cycles[0] += pim_target.get_latency(latency_opcode)
+        def bind(var, reg):
+            reg_of[var] = reg
+            var_of[reg] = var
+        def unbind(var):
+            if var in reg_of:
+                del var_of[reg_of.pop(var)]
+        def free_slot(var):
+            if var in slot_of:
+                temp_manager.freeTemp(slot_of.pop(var))
+        def kill_value(var):
+            """ The current value of a variable is dead or overwritten """
+            unbind(var)
+            free_slot(var)
+            home.pop(var, None)
+            dirty.discard(var)
+        def spill(var, pos, line):
+            # Note: The value may still be used by a later operand of the current instruction
+            reg = reg_of[var]
+            if var in dirty and is_live_after(var, pos - 1):
+                slot = f"temp{temp_manager.newTemp()}"
+                emit('write', [reg, slot], line, 'write')
+                slot_of[var] = slot
+                home[var] = slot
+                dirty.discard(var)
+            unbind(var)
+        def alloc_reg(pos, line, locked):
+            for reg in self.all_regs:
+                if reg not in var_of and reg not in locked:
+                    return reg
+            candidates = [reg for reg in self.all_regs if reg not in locked]
+            if not candidates:
+                raise ValueError(f"Error: Native scheduler needs more than {self.num_regs} registers at IR-1 line {line}")
+            def evict_key(reg):
+                var = var_of[reg]
+                next_use = next_pos(use_pos.get(var, []), pos - 1)
+                return (next_use is None, next_use or 0, var not in dirty)
+            victim = max(candidates, key=evict_key)
+            spill(var_of[victim], pos, line)
+            return victim
+        def load(var, pos, line, locked):
+            if var in reg_of:
+                return reg_of[var]
+            if var not in home:
+                raise ValueError(f"Error: Variable '{var}' is used before defined at IR-1 line {line}")
+            reg = alloc_reg(pos, line, locked)
+            emit('read', [reg, home[var]], line, 'read')
+            bind(var, reg)
+            return reg
+        def share_input_reg(op, pos, line, shared):
+            """ All registers are locked: let an output take the register of an input
+                An input-destroying analog operand shares the gate result with the output,
+                so it must not be inverted. Other inputs are saved first if still needed.
+            """
+            func = op.gate_func.split('__n', 1)[0]
+            inverted = op.gate_func.split('__n', 1)[1] if '__n' in op.gate_func else ''
+            candidates = []
+            for k, var in enumerate(op.inputs):
+                if var not in reg_of or var in op.outputs:
+                    continue
+                destroyed = self.pim_mode == 'analog' and var in op.inouts and func != 'copy_inout'
+                if destroyed and inverted[k:k + 1] == '1':
+                    continue
+                live = is_live_after(var, pos)
+                candidates.append(((live and (destroyed or var in dirty), live), var, destroyed))
+            if not candidates:
+                raise ValueError(f"Error: Native scheduler needs more than {self.num_regs} registers at IR-1 line {line}")
+            _, var, destroyed = min(candidates, key=lambda c: c[0])
+            reg = reg_of[var]
+            if destroyed:
+                shared[var] = reg
+                unbind(var)
+            else:
+                spill(var, pos + 1, line)
+            return reg
+        def define(var, op, pos, line, locked, shared):
+            if var in reg_of and (self.pim_mode == 'digital' or var not in op.inputs):
+                reg = reg_of[var]
+            else:
+                unbind(var)
+                if all(reg in locked for reg in self.all_regs):
+                    reg = share_input_reg(op, pos, line, shared)
+                else:
+                    reg = alloc_reg(pos, line, locked)
+            kill_value(var)
+            bind(var, reg)
+            dirty.add(var)
+            locked.add(reg)
+            return reg
+
+        for pos, i in enumerate(order):
+            op = self.ops[i]
+            line = i + 1
+            locked = set()
+            shared = {}  # input-destroying var -> register shared with an output
+            func = op.gate_func.split('__n', 1)[0]
+            src = op.inputs[0] if op.inputs else None
+            if func in ['copy', 'copy_inout'] and src not in reg_of and src in home:
+                # Copy from a memory row directly
+                reg = define(op.outputs[0], op, pos, line, locked, shared)
+                emit('read', [reg, home[src]], line, 'read')
+            else:
+                src_regs = []
+                for var in op.inputs:
+                    reg = load(var, pos, line, locked)
+                    locked.add(reg)
+                    src_regs.append(reg)
+                if self.pim_mode == 'digital':
+                    # Output may reuse the register of a dying input
+                    for var in op.inputs:
+                        if var in reg_of and var not in op.defs and not is_live_after(var, pos):
+                            locked.discard(reg_of[var])
+                            kill_value(var)
+                dest_regs = [define(var, op, pos, line, locked, shared) for var in op.outputs]
+                if func == 'mux2':
+                    # Same operand order as the inline assembly generator
+                    src_regs = [src_regs[0], src_regs[2], src_regs[1]]
+                emit(op.gate_func, dest_regs + src_regs, line, op.opcode)
+            # Update variable states after the instruction
+            for var, reg in shared.items():
+                # The shared register holds the new value of the input-destroying operand
+                if var in output_set and final_def[var] == pos:
+                    emit('write', [reg, var], line, 'write')
+                    free_slot(var)
+                    home[var] = var
+                elif is_live_after(var, pos):
+                    free_slot(var)
+                    slot = f"temp{temp_manager.newTemp()}"
+                    emit('write', [reg, slot], line, 'write')
+                    slot_of[var] = slot
+                    home[var] = slot
+                else:
+                    kill_value(var)
+                    continue
+                dirty.discard(var)
+            if func != 'copy_inout':
+                for var in op.inouts:
+                    if var in shared:
+                        continue
+                    # Input-destroying gate: the register now holds the new value
+                    free_slot(var)
+                    home.pop(var, None)
+                    dirty.add(var)
+            for var in op.defs:
+                if var in output_set and final_def[var] == pos and var in reg_of:
+                    emit('write', [reg_of[var], var], line, 'write')
+                    free_slot(var)
+                    home[var] = var
+                    dirty.discard(var)
+            for var in dict.fromkeys(op.inputs + op.outputs):
+                if not is_live_after(var, pos):
+                    if var in output_set and final_def.get(var) == pos:
+                        unbind(var)  # keep the output row as its home
+                    else:
+                        kill_value(var)
+
+        # Outputs without defining instructions, e.g., output ports driven by input ports
+        for var in self.outputs:
+            if var not in final_def:
+                if var not in home:
+                    raise ValueError(f"Error: Output '{var}' is never defined")
+                if home[var] != var:
+                    reg = load(var, len(order), len(self.ops), set())
+                    emit('write', [reg, var], len(self.ops), 'write')
+        return bit_serial_asm, cycles[0]
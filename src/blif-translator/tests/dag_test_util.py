@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+File: dag_test_util.py
+Description: Shared helpers of BLIF translator tests
+Author: Deyuan Guo <guodeyuan@gmail.com>
+Date: 2026-10-17
+"""
+
+import contextlib
+import io
+import os
+
+import blif_parser
+from blif_parser import GateInfo
+from blif_dag import DAG
+from main import BlifTranslator
+
+DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'data')
+
+# Sample BLIF netlists from ABC, and whether they are supported in analog PIM mode
+SAMPLE_BLIFS = {
+    'add4': True,
+    'add32_maj': True,
+    'add8_xor': True,
+    'random_tra': True,
+    'random_mixed': False,
+}
+
+
+def get_data_file(file_name):
+    """ Get the path of a test data file """
+    return os.path.join(DATA_DIR, file_name)
+
+
+def create_translator(blif_file, pim_mode, extra_args=None):
+    """ Create a BLIF translator with parsed command line arguments """
+    translator = BlifTranslator()
+    args = ['-i', blif_file, '-m', 'top', '-o', os.devnull, '-f', 'bitwise', '-p', pim_mode]
+    translator.parse_args(args + (extra_args or []))
+    return translator
+
+
+def load_blif_dag(name, pim_mode='digital', optimize=False):
+    """ Create a DAG from a sample BLIF file, and optionally run analog optimizations """
+    blif_file = get_data_file(f'{name}.blif')
+    with contextlib.redirect_stdout(io.StringIO()):
+        parser = blif_parser.BlifReader('top')
+        parser.read_file(blif_file)
+        dag = DAG('top', parser.get_in_ports(), parser.get_out_ports(), parser.get_gate_info_list(), pim_mode=pim_mode)
+        if optimize and pim_mode == 'analog':
+            create_translator(blif_file, pim_mode).run_analog_optimization(dag)
+    return dag
+
+
+class Lcg:
+    """ Small linear congruential generator, stable across Python versions """
+
+    def __init__(self, seed):
+        """ Init """
+        self.state = seed
+
+    def randint(self, upper):
+        """ Get a random integer in [0, upper) """
+        self.state = (self.state * 1103515245 + 12345) % (1 << 31)
+        return (self.state >> 8) % upper
+
+
+def create_generated_dag(in_ports, out_ports, gates, pim_mode='digital'):
+    """ Create a DAG from (gate_func, inputs, output) tuples """
+    gate_info_list = [GateInfo(f'g{index}', gate_func, inputs, [output])
+                      for index, (gate_func, inputs, output) in enumerate(gates)]
+    with contextlib.redirect_stdout(io.StringIO()):
+        return DAG('top', in_ports, out_ports, gate_info_list, pim_mode=pim_mode)
+
+
+def create_wide_dag(width):
+    """ One level of two-input gates over many inputs, all driving outputs """
+    in_ports = [f'x[{index}]' for index in range(width + 1)]
+    out_ports = [f'y[{index}]' for index in range(width)]
+    gate_funcs = ['and2', 'or2', 'xor2', 'nand2']
+    gates = [(gate_funcs[index % 4], [in_ports[index], in_ports[index + 1]], out_ports[index]) for index in range(width)]
+    return create_generated_dag(in_ports, out_ports, gates)
+
+
+def create_flat_dag(width):
+    """ Every gate reads the same shared inputs, so that all gates are ready at once """
+    in_ports = ['a', 'b', 'c']
+    out_ports = [f'y[{index}]' for index in range(width)]
+    gates = []
+    for index in range(width):
+        if index % 3 == 0:
+            gates.append(('maj3', ['a', 'b', 'c'], out_ports[index]))
+        elif index % 3 == 1:
+            gates.append(('and2', ['c', 'a'], out_ports[index]))
+        else:
+            gates.append(('inv1', ['b'], out_ports[index]))
+    return create_generated_dag(in_ports, out_ports, gates)
+
+
+def create_random_dag(num_inputs, num_gates, seed):
+    """ Random layered DAG of two- and three-input gates """
+    rng = Lcg(seed)
+    in_ports = [f'x[{index}]' for index in range(num_inputs)]
+    wires = list(in_ports)
+    gates = []
+    for index in range(num_gates):
+        gate_func = ['and2', 'or2', 'xor2', 'maj3', 'inv1'][rng.randint(5)]
+        num_fanins = {'inv1': 1, 'maj3': 3}.get(gate_func, 2)
+        inputs = []
+        while len(inputs) < num_fanins:
+            wire = wires[len(wires) - 1 - rng.randint(min(len(wires), 8))]
+            if wire not in inputs:
+                inputs.append(wire)
+        output = f'n{index}'
+        gates.append((gate_func, inputs, output))
+        wires.append(output)
+    # Gates without fanouts drive output ports
+    used = {wire for _, inputs, _ in gates for wire in inputs}
+    out_ports = [output for _, _, output in gates if output not in used]
+    return create_generated_dag(in_ports, out_ports, gates)
+
+
+GENERATED_DAGS = {
+    'wide64': lambda: create_wide_dag(64),
+    'flat48': lambda: create_flat_dag(48),
+    'random200': lambda: create_random_dag(12, 200, 1),
+    'random500': lambda: create_random_dag(24, 500, 7),
+}
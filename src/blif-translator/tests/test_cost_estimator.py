@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+File: test_cost_estimator.py
+Description: Tests of the latency and energy estimator of bit-serial code
+Author: Deyuan Guo <guodeyuan@gmail.com>
+Date: 2026-10-17
+"""
+
+import os
+import sys
+
+import pytest
+
+# Shared modules in the src directory
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+from asm_instruction import LinkedInstruction
+from cost_estimator import CostEstimator
+
+
+def create_sequence(instructions):
+    """ Create a bit-serial instruction sequence of (opcode, operands) """
+    return [LinkedInstruction(opcode, operands, line) for line, (opcode, operands) in enumerate(instructions, 1)]
+
+
+DIGITAL_SEQUENCE = create_sequence([
+    ('read', ['t0', 'a']),
+    ('read', ['t1', 'b']),
+    ('nand2', ['t2', 't0', 't1']),
+    ('maj3', ['t0', 't0', 't1', 't2']),
+    ('write', ['t0', 'y']),
+])
+
+ANALOG_SEQUENCE = create_sequence([
+    ('read', ['t0', 'a']),
+    ('mv', ['t1', 't2', 't0']),
+    ('maj3', ['t3', 't0', 't1', 't2']),
+    ('maj3__n010', ['t3', 't4', 't0', 't1', 't2']),
+    ('and2__n01', ['t0', 't0', 't1']),
+    ('inv1', ['t1', 't0']),
+    ('write', ['t1', 'y']),
+])
+
+
+def estimate(sequence, pim_mode, energy_table=None):
+    """ Run the cost estimator on an instruction sequence """
+    return CostEstimator(sequence, pim_mode, tck_ns=0.5, energy_table=energy_table).estimate()
+
+
+def test_digital_cycles():
+    """ Digital compute ops cost tCCD and row accesses cost tRC """
+    estimator = estimate(DIGITAL_SEQUENCE, 'digital')
+    assert estimator.counts == {'read': 2, 'nand2': 1, 'maj3': 1, 'write': 1}
+    assert estimator.get_cycles('read') == 148
+    assert estimator.get_cycles() == 3 * 74 + 2 * 4
+    assert estimator.get_energy_pj() is None
+    assert estimator.generate_summary() == 'Estimated cycles: 230, 115.00 ns at tCK 0.5 ns'
+
+
+def test_analog_opcode_mapping():
+    """ Analog ops map to pim_target opcodes by maj3 arity, mv as copy, without negation suffix """
+    estimator = estimate(ANALOG_SEQUENCE, 'analog')
+    assert estimator.counts == {'read': 1, 'copy_a': 1, 'maj3a_o1': 1, 'maj3a_o2': 1, 'and2a': 1,
+                                'inv1a': 1, 'write': 1}
+    assert estimator.get_cycles() == 7 * 74
+
+
+def test_unknown_opcode():
+    """ Opcodes without a pim_target opcode are rejected """
+    with pytest.raises(ValueError, match="Unknown opcode 'nand3__n100' in digital mode"):
+        estimate(create_sequence([('nand3__n100', ['t0', 't1', 't2', 't3'])]), 'digital')
+
+
+def test_energy_table_default():
+    """ Opcodes without an energy table entry use the default energy """
+    estimator = estimate(ANALOG_SEQUENCE, 'analog', {'maj3a_o1': 10, 'maj3a_o2': 12.5, 'default': 2})
+    assert estimator.get_energy_pj('maj3a_o2') == 12.5
+    assert estimator.get_energy_pj('read') == 2
+    assert estimator.get_energy_pj() == 10 + 12.5 + 5 * 2
+    assert estimator.generate_summary().endswith(', 0.033 nJ')
+
+
+def test_energy_table_missing_entry():
+    """ Opcodes without an energy table entry are rejected without a default """
+    estimator = estimate(DIGITAL_SEQUENCE, 'digital', {'read': 20, 'write': 20, 'nand2': 1})
+    assert estimator.get_energy_pj('nand2') == 1
+    with pytest.raises(ValueError, match="Energy table has no entry for 'maj3'"):
+        estimator.get_energy_pj()
+
+
+def test_load_energy_table(tmp_path):
+    """ Energy tables must map opcodes to numbers """
+    table_file = tmp_path / 'energy.json'
+    table_file.write_text('{"read": 20, "default": 1.5}')
+    assert CostEstimator.load_energy_table(str(table_file)) == {'read': 20, 'default': 1.5}
+    table_file.write_text('{"read": "20"}')
+    with pytest.raises(ValueError, match='must map opcodes to numbers'):
+        CostEstimator.load_energy_table(str(table_file))
+
+
+def test_report(capsys):
+    """ The report prints the summary and a breakdown sorted by cycles """
+    estimate(DIGITAL_SEQUENCE, 'digital').report()
+    lines = capsys.readouterr().out.splitlines()
+    assert lines[0] == 'Info: Estimated cycles: 230, 115.00 ns at tCK 0.5 ns'
+    assert [line.split()[1] for line in lines[1:]] == ['read', 'write', 'maj3', 'nand2']
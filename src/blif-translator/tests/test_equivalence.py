@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+File: test_equivalence.py
+Description: Tests of the built-in SAT solver and DAG equivalence checker
+Author: Deyuan Guo <guodeyuan@gmail.com>
+Date: 2026-10-17
+"""
+
+import copy
+import itertools
+
+import pytest
+
+from blif_dag_equivalence import SatSolver, DagEquivChecker
+from dag_test_util import Lcg, load_blif_dag
+
+
+def create_random_cnf(rng, num_vars, num_clauses, clause_len=3):
+    """ Create a random CNF as a list of clauses of distinct variables """
+    clauses = []
+    for _ in range(num_clauses):
+        clause = []
+        while len(clause) < clause_len:
+            var = 1 + rng.randint(num_vars)
+            if var not in clause and -var not in clause:
+                clause.append(var if rng.randint(2) else -var)
+        clauses.append(clause)
+    return clauses
+
+
+def is_satisfied(clauses, assignment):
+    """ Check clauses under an assignment: var -> bool """
+    return all(any(assignment[abs(lit)] == (lit > 0) for lit in clause) for clause in clauses)
+
+
+def brute_force_sat(clauses, num_vars, assumptions=()):
+    """ Check satisfiability by enumerating all assignments """
+    for bits in itertools.product([False, True], repeat=num_vars):
+        assignment = dict(enumerate(bits, start=1))
+        if all(assignment[abs(lit)] == (lit > 0) for lit in assumptions) and is_satisfied(clauses, assignment):
+            return True
+    return False
+
+
+def create_solver(clauses, num_vars):
+    """ Create a solver with clauses """
+    solver = SatSolver()
+    for _ in range(num_vars):
+        solver.new_var()
+    for clause in clauses:
+        solver.add_clause(clause)
+    return solver
+
+
+def get_model(solver, num_vars):
+    """ Get the satisfying assignment of the last solve call: var -> bool """
+    return {var: solver.model[var] == 1 for var in range(1, num_vars + 1)}
+
+
+@pytest.mark.parametrize('seed', range(40))
+def test_sat_solver_matches_brute_force(seed):
+    """ SAT/UNSAT results agree with brute force, and models satisfy all clauses """
+    rng = Lcg(seed)
+    num_vars = 4 + rng.randint(7)
+    # Around the 3-SAT phase transition, so that both results show up
+    clauses = create_random_cnf(rng, num_vars, int(num_vars * 4.3))
+    solver = create_solver(clauses, num_vars)
+    expected = brute_force_sat(clauses, num_vars)
+    assert solver.solve() is expected
+    if expected:
+        assert is_satisfied(clauses, get_model(solver, num_vars))
+
+
+def test_sat_solver_pigeonhole_unsat():
+    """ Four pigeons do not fit into three holes """
+    num_pigeons, num_holes = 4, 3
+    var = lambda pigeon, hole: 1 + pigeon * num_holes + hole
+    clauses = [[var(pigeon, hole) for hole in range(num_holes)] for pigeon in range(num_pigeons)]
+    for hole in range(num_holes):
+        for p1, p2 in itertools.combinations(range(num_pigeons), 2):
+            clauses.append([-var(p1, hole), -var(p2, hole)])
+    solver = create_solver(clauses, num_pigeons * num_holes)
+    assert solver.solve() is False
+    assert solver.ok is False
+
+
+@pytest.mark.parametrize('seed', range(10))
+def test_sat_solver_incremental_assumptions(seed):
+    """ Repeated solve calls under assumptions, with clauses added in between """
+    rng = Lcg(100 + seed)
+    num_vars = 8
+    clauses = create_random_cnf(rng, num_vars, 20)
+    solver = create_solver(clauses, num_vars)
+    for _ in range(6):
+        for _ in range(5):
+            assumptions = []
+            for var in range(1, num_vars + 1):
+                if rng.randint(3) == 0:
+                    assumptions.append(var if rng.randint(2) else -var)
+            expected = brute_force_sat(clauses, num_vars, assumptions)
+            assert solver.solve(assumptions) is expected
+            if expected:
+                model = get_model(solver, num_vars)
+                assert is_satisfied(clauses, model)
+                assert all(model[abs(lit)] == (lit > 0) for lit in assumptions)
+        # Assumptions are not permanent
+        assert solver.solve() is brute_force_sat(clauses, num_vars)
+        new_clauses = create_random_cnf(rng, num_vars, 3)
+        for clause in new_clauses:
+            solver.add_clause(clause)
+        clauses += new_clauses
+
+
+def simulate_dag(dag, inputs):
+    """ Simulate a digital DAG: in_port -> bool, and return output values in port order """
+    values = dict(inputs)
+    for gate_id in dag.get_topo_sorted_gate_id_list():
+        gate = dag.graph.nodes[gate_id]
+        args = [values[wire] for wire in gate['inputs']]
+        gate_func = gate['gate_func']
+        if gate_func == 'in_port':
+            continue
+        if gate_func == 'out_port':
+            values[gate_id] = args[0]
+            continue
+        result = {
+            'copy': lambda: args[0],
+            'inv1': lambda: not args[0],
+            'and2': lambda: args[0] and args[1],
+            'or2': lambda: args[0] or args[1],
+            'maj3': lambda: sum(args) >= 2,
+        }[gate_func]()
+        for wire in gate['outputs']:
+            values[wire] = result
+    return [values[port] for port in dag.get_out_ports()]
+
+
+def is_functionally_equal(dag1, dag2):
+    """ Compare two digital DAGs exhaustively """
+    in_ports = dag1.get_in_ports()
+    for bits in itertools.product([False, True], repeat=len(in_ports)):
+        inputs = dict(zip(in_ports, bits))
+        if simulate_dag(dag1, inputs) != simulate_dag(dag2, inputs):
+            return False
+    return True
+
+
+def test_equiv_check_self():
+    """ A DAG is equivalent to itself, structurally """
+    dag = load_blif_dag('add4')
+    checker = DagEquivChecker()
+    checker.add_reference(dag)
+    checker.check(copy.deepcopy(dag))
+
+
+@pytest.mark.parametrize('name', ['add4', 'random_tra'])
+def test_equiv_check_analog_optimization(name):
+    """ Analog optimizations preserve the function of the initial DAG """
+    checker = DagEquivChecker()
+    checker.add_reference(load_blif_dag(name, 'digital'))
+    checker.check(load_blif_dag(name, 'analog', optimize=True), pim_mode='analog')
+
+
+MUTATIONS = {'and2': 'or2', 'or2': 'and2', 'maj3': 'and2', 'inv1': 'copy'}
+
+
+@pytest.mark.parametrize('name', ['add4', 'random_tra'])
+def test_equiv_check_mutated_gate(name):
+    """ The miter fails exactly when a mutated gate changes the DAG function """
+    dag = load_blif_dag(name)
+    mutants = [gate_id for gate_id in dag.get_topo_sorted_gate_id_list()
+               if dag.graph.nodes[gate_id]['gate_func'] in MUTATIONS]
+    assert mutants
+    num_detected = 0
+    for gate_id in mutants:
+        mutant = copy.deepcopy(dag)
+        gate = mutant.graph.nodes[gate_id]
+        gate['gate_func'] = MUTATIONS[gate['gate_func']]
+        checker = DagEquivChecker()
+        checker.add_reference(dag)
+        if is_functionally_equal(dag, mutant):
+            checker.check(mutant)
+        else:
+            num_detected += 1
+            with pytest.raises(ValueError, match='Equivalence-Check failed'):
+                checker.check(mutant)
+    assert num_detected > 0
@@ -0,0 +1,67 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+File: test_pim_ir1_reader.py
+Description: Tests of the PIM IR-1 reader
+Author: Deyuan Guo <guodeyuan@gmail.com>
+Date: 2026-10-17
+"""
+
+import pytest
+
+from dag_test_util import SAMPLE_BLIFS, load_blif_dag
+from generator_pim_ir1 import GeneratorPimIr1
+from pim_ir1_reader import PimIr1Reader
+
+# Analog IR-1 of add8_xor has xor2a, which is not a pim_target opcode
+IR1_CASES = [(name, pim_mode) for name, analog in SAMPLE_BLIFS.items()
+             for pim_mode in ['digital', 'analog'] if pim_mode == 'digital' or (analog and name != 'add8_xor')]
+
+HEADER = '.module top\n.mode digital\n.num_regs 4\n.inputs a b\n.outputs y\n'
+
+
+def read_ir1(text):
+    """ Read PIM IR-1 text """
+    reader = PimIr1Reader()
+    reader.read(text.splitlines())
+    return reader
+
+
+@pytest.mark.parametrize('name, pim_mode', IR1_CASES)
+def test_ir1_round_trip(name, pim_mode):
+    """ Generated IR-1 text reads back to the generator instruction list """
+    dag = load_blif_dag(name, pim_mode, optimize=True)
+    generator = GeneratorPimIr1(dag, pim_mode, 4)
+    reader = read_ir1(generator.generate_code())
+    expected = [(opcode, tuple(outputs), tuple(inputs)) for opcode, outputs, inputs in generator.get_instruction_list()]
+    assert reader.get_instruction_list() == expected
+    assert reader.module_name == 'top'
+    assert reader.pim_mode == pim_mode
+    assert reader.num_regs == 4
+    assert reader.inputs == generator.sanitize_token_list(dag.get_in_ports())
+    assert reader.outputs == generator.sanitize_token_list(dag.get_out_ports())
+
+
+def test_ir1_read_instructions():
+    """ Operands are split into outputs and inputs, and comments are ignored """
+    reader = read_ir1(HEADER + '.temps n\n# comment\nnand2__n10 n, a, b\nzero z  # constant\ninv1 y, n\n')
+    assert reader.get_instruction_list() == [('nand2__n10', ('n',), ('a', 'b')), ('zero', ('z',), ()),
+                                             ('inv1', ('y',), ('n',))]
+    assert reader.temps == ['n']
+
+
+@pytest.mark.parametrize('text, message', [
+    (HEADER + 'nand3 y, a, b\n', "Unknown opcode 'nand3' at line 6"),
+    (HEADER + 'and2__n1 y, a, b\n', "Invalid negation suffix 'and2__n1' at line 6"),
+    (HEADER + 'and2__n12 y, a, b\n', "Invalid negation suffix 'and2__n12' at line 6"),
+    (HEADER + 'and2 y, a\n', "Opcode 'and2' expects 3 operands at line 6"),
+    (HEADER + '.wires n\n', "Unknown directive '.wires' at line 6"),
+    (HEADER + 'inv1 y, a\n.temps n\n', "Directive '.temps' after instructions at line 7"),
+    ('.module top\n.mode digital\n', "Missing or invalid '.num_regs' directive"),
+    (HEADER.replace('digital', 'hybrid'), "Unsupported PIM mode 'hybrid'"),
+    (HEADER.replace('4', 'four'), "Invalid number of registers 'four'"),
+])
+def test_ir1_read_errors(text, message):
+    """ Malformed IR-1 text is rejected """
+    with pytest.raises(ValueError, match=message):
+        read_ir1(text)
@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+File: test_pim_scheduler.py
+Description: Tests of native scheduling and register allocation by bit-serial simulation
+Author: Deyuan Guo <guodeyuan@gmail.com>
+Date: 2026-10-17
+"""
+
+import contextlib
+import io
+
+import pytest
+
+from dag_test_util import SAMPLE_BLIFS, Lcg, create_generated_dag, load_blif_dag
+from generator_pim_ir1 import GeneratorPimIr1
+from generator_pim_native import GeneratorPimNative
+from pim_scheduler import PimScheduler
+
+# Native analog scheduling has no xor2a opcode in pim_target
+NATIVE_CASES = [(name, pim_mode) for name, analog in SAMPLE_BLIFS.items()
+                for pim_mode in ['digital', 'analog'] if pim_mode == 'digital' or (analog and name != 'add8_xor')]
+
+NUM_SOURCES = {'zero': 0, 'one': 0, 'inv1': 1, 'copy': 1, 'copy_inout': 1, 'mv': 1, 'mux2': 3, 'maj3': 3}
+
+
+def get_native_inputs(dag, pim_mode, num_regs):
+    """ Get IR-1 instructions and sanitized ports of a DAG """
+    generator = GeneratorPimIr1(dag, pim_mode, num_regs)
+    return (generator.get_instruction_list(),
+            generator.sanitize_token_list(dag.get_in_ports()),
+            generator.sanitize_token_list(dag.get_out_ports()))
+
+
+def schedule(dag, pim_mode, num_regs):
+    """ Run the native scheduler on a DAG """
+    instructions, inputs, outputs = get_native_inputs(dag, pim_mode, num_regs)
+    scheduler = PimScheduler(instructions, inputs, outputs, pim_mode, num_regs)
+    with contextlib.redirect_stdout(io.StringIO()):
+        bit_serial_asm = scheduler.run()
+    return bit_serial_asm, inputs, outputs
+
+
+def simulate_bit_serial(bit_serial_asm, rows, pim_mode):
+    """ Simulate a bit-serial instruction sequence on one test vector of memory rows """
+    regs = {}
+    for inst in bit_serial_asm:
+        func, _, suffix = inst.opCode.partition('__n')
+        operands = inst.operandsList
+        if func == 'read':
+            regs[operands[0]] = rows[operands[1]]
+            continue
+        if func == 'write':
+            rows[operands[1]] = regs[operands[0]]
+            continue
+        num_srcs = NUM_SOURCES.get(func, 2)
+        dests = operands[:len(operands) - num_srcs]
+        srcs = operands[len(operands) - num_srcs:]
+        inverted = [int(suffix[k:k + 1] == '1') for k in range(num_srcs)]
+        values = [regs[reg] ^ inv for reg, inv in zip(srcs, inverted)]
+        if func in ['zero', 'one']:
+            result = int(func == 'one')
+        elif func in ['copy', 'copy_inout', 'mv']:
+            result = values[0]
+        elif func == 'inv1':
+            result = 1 - values[0]
+        elif func == 'mux2':
+            result = values[1] if values[0] else values[2]
+        elif func == 'maj3':
+            result = int(sum(values) >= 2)
+        else:
+            a, b = values
+            result = {'and2': a & b, 'nand2': 1 - (a & b), 'or2': a | b, 'nor2': 1 - (a | b),
+                      'xor2': a ^ b, 'xnor2': 1 - (a ^ b)}[func]
+        if pim_mode == 'analog' and func in ['and2', 'or2', 'maj3']:
+            # Triple-row activation overwrites all source rows, through DCC for inverted ones
+            for reg, inv in zip(srcs, inverted):
+                regs[reg] = result ^ inv
+        for reg in dests:
+            regs[reg] = result
+    return rows
+
+
+def check_native_schedule(dag, pim_mode, num_regs, num_tests=16):
+    """ Simulate the native bit-serial sequence against the DAG on random test vectors """
+    bit_serial_asm, inputs, outputs = schedule(dag, pim_mode, num_regs)
+    all_regs = ([f't{i}' for i in range(7)] + [f's{i}' for i in range(12)])[:num_regs]
+    for inst in bit_serial_asm:
+        reg_operands = inst.operandsList[:1] if inst.opCode in ['read', 'write'] else inst.operandsList
+        assert all(reg in all_regs for reg in reg_operands), f"Unexpected register in {inst}"
+    rng = Lcg(num_regs)
+    for index in range(num_tests):
+        test_input = [index % 2 if index < 2 else rng.randint(2) for _ in inputs]
+        rows = simulate_bit_serial(bit_serial_asm, dict(zip(inputs, test_input)), pim_mode)
+        expected = [int(value) for value in dag.verifier.simulate(test_input, pim_mode)]
+        assert [rows.get(var) for var in outputs] == expected, f"Mismatch on test vector {test_input}"
+
+
+@pytest.mark.parametrize('name, pim_mode', NATIVE_CASES)
+@pytest.mark.parametrize('num_regs', [3, 4, 8])
+def test_native_schedule_sample(name, pim_mode, num_regs):
+    """ Native bit-serial sequences of sample netlists match DAG simulation """
+    dag = load_blif_dag(name, pim_mode, optimize=True)
+    check_native_schedule(dag, pim_mode, num_regs)
+
+
+def create_nand_adder(width):
+    """ Ripple-carry adder of NAND gates only """
+    in_ports = [f'a{i}' for i in range(width)] + [f'b{i}' for i in range(width)]
+    out_ports = [f's{i}' for i in range(width)] + ['cout']
+    gates = []
+    carry = None
+    for i in range(width):
+        a, b = f'a{i}', f'b{i}'
+        gates += [('nand2', [a, b], f'p{i}'), ('nand2', [a, f'p{i}'], f'q{i}'),
+                  ('nand2', [b, f'p{i}'], f'r{i}'), ('nand2', [f'q{i}', f'r{i}'], f'h{i}' if carry else f's{i}')]
+        if carry is None:
+            gates.append(('nand2', [f'p{i}', f'p{i}'], f'c{i}'))
+        else:
+            h = f'h{i}'
+            gates += [('nand2', [h, carry], f'u{i}'), ('nand2', [h, f'u{i}'], f'v{i}'),
+                      ('nand2', [carry, f'u{i}'], f'w{i}'), ('nand2', [f'v{i}', f'w{i}'], f's{i}'),
+                      ('nand2', [f'u{i}', f'p{i}'], f'c{i}')]
+        carry = f'c{i}'
+    gates.append(('inv1', [carry], 'nc'))
+    gates.append(('inv1', ['nc'], 'cout'))
+    return create_generated_dag(in_ports, out_ports, gates)
+
+
+def create_two_input_dag(num_gates, seed, pim_mode):
+    """ Random DAG of one- and two-input gates """
+    gate_funcs = ['and2', 'or2', 'inv1'] if pim_mode == 'analog' else ['nand2', 'nor2', 'xor2', 'inv1']
+    rng = Lcg(seed)
+    in_ports = [f'x{i}' for i in range(4)]
+    wires = list(in_ports)
+    gates = []
+    for index in range(num_gates):
+        gate_func = gate_funcs[rng.randint(len(gate_funcs))]
+        inputs = [wires[-1 - rng.randint(min(len(wires), 6))]]
+        if gate_func != 'inv1':
+            inputs.append(next(wire for wire in reversed(wires) if wire != inputs[0]))
+        gates.append((gate_func, inputs, f'n{index}'))
+        wires.append(f'n{index}')
+    used = {wire for _, inputs, _ in gates for wire in inputs}
+    out_ports = [output for _, _, output in gates if output not in used]
+    return create_generated_dag(in_ports, out_ports, gates, pim_mode=pim_mode)
+
+
+@pytest.mark.parametrize('num_regs', [2, 3, 4, 8])
+def test_native_schedule_nand_adder(num_regs):
+    """ A NAND-only adder needs two registers """
+    check_native_schedule(create_nand_adder(4), 'digital', num_regs)
+
+
+@pytest.mark.parametrize('pim_mode', ['digital', 'analog'])
+@pytest.mark.parametrize('num_regs', [2, 3, 4, 8])
+@pytest.mark.parametrize('seed', [1, 2, 3])
+def test_native_schedule_two_input(pim_mode, num_regs, seed):
+    """ Netlists of one- and two-input gates need two registers """
+    check_native_schedule(create_two_input_dag(40, seed, pim_mode), pim_mode, num_regs)
+
+
+@pytest.mark.parametrize('pim_mode', ['digital', 'analog'])
+def test_native_schedule_too_few_registers(pim_mode):
+    """ A three-input gate cannot be scheduled with two registers """
+    dag = load_blif_dag('add4', pim_mode, optimize=True)
+    with pytest.raises(ValueError, match='needs more than 2 registers'):
+        schedule(dag, pim_mode, 2)
+
+
+@pytest.mark.parametrize('name', ['add4', 'add32_maj'])
+def test_native_code_generation_three_registers(name):
+    """ Analog maj3 with an output sharing a source register generates PIMeval code """
+    dag = load_blif_dag(name, 'analog', optimize=True)
+    instructions, inputs, outputs = get_native_inputs(dag, 'analog', 3)
+    generator = GeneratorPimNative(instructions, inputs, outputs, 'top', 'analog', 3)
+    with contextlib.redirect_stdout(io.StringIO()):
+        code = generator.generate_code()
+    assert 'pimOpAP(3,' in code
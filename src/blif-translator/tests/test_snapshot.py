@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+File: test_snapshot.py
+Description: Tests of binary DAG snapshots
+Author: Deyuan Guo <guodeyuan@gmail.com>
+Date: 2026-10-17
+"""
+
+import struct
+import zlib
+
+import networkx as nx
+import pytest
+
+from blif_dag import DAG
+from blif_dag_snapshot import DagSnapshot
+from dag_test_util import load_blif_dag
+
+
+def get_dag_structure(dag):
+    """ Get everything a snapshot must restore, in graph order """
+    graph = dag.graph
+    nodes = [(gate_id, data['gate_func'], list(data['inputs']), list(data['outputs']), sorted(data['inverted']))
+             for gate_id, data in graph.nodes(data=True)]
+    succ = [[(fanout, graph[gate_id][fanout]['wire_name']) for fanout in graph.successors(gate_id)] for gate_id in graph.nodes]
+    pred = [list(graph.predecessors(gate_id)) for gate_id in graph.nodes]
+    return {
+        'module_name': dag.module_name,
+        'pim_mode': dag.pim_mode,
+        'in_ports': dag.get_in_ports(),
+        'out_ports': dag.get_out_ports(),
+        'nodes': nodes,
+        'succ': succ,
+        'pred': pred,
+        'topo_order': dag.get_topo_sorted_gate_id_list(),
+    }
+
+
+def get_next_names(dag):
+    """ Get the next unique names, which depend on the saved counters """
+    return [dag.uniqufy_gate_id('copy'), dag.uniqufy_gate_id('zero'), dag.uniqufy_wire_name('new')]
+
+
+@pytest.mark.parametrize('name', ['add4', 'random_tra'])
+def test_snapshot_round_trip(name, tmp_path):
+    """ A restored DAG has the same ports, gates, edges, edge orders and counters """
+    dag = load_blif_dag(name, 'analog', optimize=True)
+    # Analog optimizations create inverted wires and wire segments
+    assert any(data['inverted'] for _, data in dag.graph.nodes(data=True))
+    assert any(dag.wire_segment_marker in wire for _, _, wire in dag.graph.edges(data='wire_name'))
+
+    snapshot_file = tmp_path / f'{name}.dagsnap'
+    DAG.save_dag_snapshot(dag, snapshot_file, 'post_wire_copy')
+    restored, tag = DAG.load_dag_snapshot(snapshot_file)
+    assert tag == 'post_wire_copy'
+    assert get_dag_structure(restored) == get_dag_structure(dag)
+    assert get_next_names(restored) == get_next_names(dag)
+
+
+def read_snapshot(data):
+    """ Read snapshot bytes into an empty graph """
+    return DagSnapshot().read_buffer(memoryview(bytes(data)), nx.DiGraph(), 'test.dagsnap')
+
+
+def rewrite_header(data, version):
+    """ Rewrite the version of snapshot bytes, and update the CRC """
+    header = DagSnapshot.HEADER
+    data = bytearray(data)
+    magic, _, num_sections, _ = header.unpack_from(data)
+    header.pack_into(data, 0, magic, version, num_sections, zlib.crc32(data[header.size:]))
+    return data
+
+
+@pytest.fixture
+def snapshot_bytes(tmp_path):
+    """ Bytes of a valid snapshot """
+    snapshot_file = tmp_path / 'add4.dagsnap'
+    DAG.save_dag_snapshot(load_blif_dag('add4'), snapshot_file, 'initial')
+    return snapshot_file.read_bytes()
+
+
+def test_snapshot_read_valid(snapshot_bytes):
+    """ The unmodified bytes are accepted """
+    assert read_snapshot(snapshot_bytes)['checkpoint_tag'] == 'initial'
+
+
+def test_snapshot_reject_bad_magic(snapshot_bytes):
+    """ Bad magic """
+    data = bytearray(snapshot_bytes)
+    data[0:8] = b'NOTADAG\0'
+    with pytest.raises(ValueError, match='bad magic'):
+        read_snapshot(data)
+
+
+@pytest.mark.parametrize('size', [0, 8, DagSnapshot.HEADER.size - 1])
+def test_snapshot_reject_short_header(snapshot_bytes, size):
+    """ Truncated before the end of the header """
+    with pytest.raises(ValueError, match='file too short'):
+        read_snapshot(snapshot_bytes[:size])
+
+
+@pytest.mark.parametrize('ratio', [0.25, 0.5, 0.99])
+def test_snapshot_reject_truncated(snapshot_bytes, ratio):
+    """ Truncated sections """
+    with pytest.raises(ValueError, match='CRC mismatch'):
+        read_snapshot(snapshot_bytes[:int(len(snapshot_bytes) * ratio)])
+
+
+@pytest.mark.parametrize('position', [DagSnapshot.HEADER.size, -1])
+def test_snapshot_reject_crc_mismatch(snapshot_bytes, position):
+    """ A flipped bit in the section table or payload """
+    data = bytearray(snapshot_bytes)
+    data[position] ^= 0x10
+    with pytest.raises(ValueError, match='CRC mismatch'):
+        read_snapshot(data)
+
+
+def test_snapshot_reject_unsupported_version(snapshot_bytes):
+    """ Versions other than the reader version """
+    with pytest.raises(ValueError, match='Unsupported DAG snapshot version 2'):
+        read_snapshot(rewrite_header(snapshot_bytes, 2))
+
+
+def test_snapshot_reject_missing_section(snapshot_bytes):
+    """ A section table without all required sections """
+    data = bytearray(snapshot_bytes)
+    struct.pack_into('<4s', data, DagSnapshot.HEADER.size, b'XXXX')
+    with pytest.raises(ValueError, match='missing section STRS'):
+        read_snapshot(rewrite_header(data, DagSnapshot.VERSION))
@@ -0,0 +1,71 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+File: test_topo_sort.py
+Description: Golden order tests of the priority-aware topological sort
+Author: Deyuan Guo <guodeyuan@gmail.com>
+Date: 2026-10-17
+"""
+
+import json
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from blif_dag_topo_sort import priority_khan_topo_sort
+from dag_test_util import SAMPLE_BLIFS, GENERATED_DAGS, get_data_file, load_blif_dag
+
+# Expected orders are checked in. After an intended change of the scheduling heuristic,
+# regenerate them with: python3 test_topo_sort.py --update
+GOLDEN_FILE = get_data_file('topo_sort_golden.json')
+
+
+def get_golden_cases():
+    """ Get case name -> DAG factory of all golden order cases """
+    cases = {}
+    for name, analog in SAMPLE_BLIFS.items():
+        cases[f'{name}_digital'] = lambda name=name: load_blif_dag(name, 'digital')
+        if analog:
+            cases[f'{name}_analog_final'] = lambda name=name: load_blif_dag(name, 'analog', optimize=True)
+    for name, factory in GENERATED_DAGS.items():
+        cases[name] = factory
+    return cases
+
+
+def load_golden_orders():
+    """ Load expected orders """
+    with open(GOLDEN_FILE) as f:
+        return json.load(f)
+
+
+@pytest.mark.parametrize('case', sorted(get_golden_cases()))
+def test_priority_khan_golden_order(case):
+    """ Topological order matches the checked-in order """
+    golden = load_golden_orders()
+    assert case in golden, f"Missing golden order of {case}, regenerate {GOLDEN_FILE}"
+    dag = get_golden_cases()[case]()
+    assert priority_khan_topo_sort(dag) == golden[case]
+
+
+def test_golden_cases_are_current():
+    """ No stale golden orders """
+    assert sorted(load_golden_orders()) == sorted(get_golden_cases())
+
+
+def test_dag_topo_sort_uses_priority_khan():
+    """ The default algorithm of DAG is the golden one """
+    dag = load_blif_dag('add4')
+    assert dag.get_topo_sorted_gate_id_list() == priority_khan_topo_sort(dag)
+
+
+if __name__ == '__main__':
+    if '--update' not in sys.argv:
+        print("Usage: python3 test_topo_sort.py --update")
+        sys.exit(1)
+    orders = {case: priority_khan_topo_sort(factory()) for case, factory in sorted(get_golden_cases().items())}
+    with open(GOLDEN_FILE, 'w') as f:
+        json.dump(orders, f, indent=1)
+        f.write('\n')
+    print(f"Info: Updated {len(orders)} golden orders in {GOLDEN_FILE}")
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+File: test_verification.py
+Description: Tests of DAG verification settings
+Author: Deyuan Guo <guodeyuan@gmail.com>
+Date: 2026-10-17
+"""
+
+import copy
+
+from blif_dag import DAG
+from dag_test_util import create_translator, get_data_file, load_blif_dag
+
+
+def test_verifier_options_per_dag():
+    """ Verification settings of one DAG do not leak into another DAG """
+    dag = load_blif_dag('add32_maj')
+    other = DAG('top', dag.get_in_ports(), dag.get_out_ports(), [],
+                verifier_options={'mode': 'random', 'budget': 64, 'seed': 3})
+    assert (other.verifier.mode, other.verifier.budget, other.verifier.seed) == ('random', 64, 3)
+    assert (dag.verifier.mode, dag.verifier.budget, dag.verifier.seed) == ('auto', 4096, 0)
+    dag.verify_dag()
+    assert dag.verifier.num_tests == 4096
+
+
+def test_verifier_options_copied(tmp_path):
+    """ Verification settings survive deepcopy and snapshot loading """
+    options = {'mode': 'corner', 'budget': 32, 'seed': 7}
+    dag = DAG('top', ['a'], ['y'], [], verifier_options=options)
+    assert copy.deepcopy(dag).verifier.mode == 'corner'
+    snapshot_file = tmp_path / 'top.dagsnap'
+    DAG.save_dag_snapshot(dag, snapshot_file)
+    restored, _ = DAG.load_dag_snapshot(snapshot_file, verifier_options=options)
+    assert (restored.verifier.mode, restored.verifier.budget, restored.verifier.seed) == ('corner', 32, 7)
+
+
+def test_translator_runs_do_not_share_verifier_options():
+    """ Sequential in-process translator runs keep their own verification settings """
+    blif_file = get_data_file('add32_maj.blif')
+    first = create_translator(blif_file, 'digital', ['--verify-mode', 'random', '--verify-budget', '100', '--verify-seed', '5'])
+    second = create_translator(blif_file, 'digital')
+    assert first.create_dag().verifier.mode == 'random'
+    dag = second.create_dag()
+    assert (dag.verifier.mode, dag.verifier.budget, dag.verifier.seed) == ('auto', 4096, 0)
+
+
+def count_verifications(monkeypatch, extra_args):
+    """ Run analog optimizations on a sample netlist and count DAG verification runs """
+    modes = []
+    monkeypatch.setattr(DAG, 'verify_dag', lambda dag, pim_mode='digital': modes.append(pim_mode))
+    translator = create_translator(get_data_file('add4.blif'), 'analog', extra_args)
+    translator.run_analog_optimization(translator.create_dag())
+    return modes
+
+
+def test_passes_not_verified_by_default(monkeypatch):
+    """ By default, passes only get sanity checks """
+    assert count_verifications(monkeypatch, []) == []
+
+
+def test_verify_passes(monkeypatch):
+    """ With --verify-passes, passes are verified while the DAG has valid semantics """
+    assert count_verifications(monkeypatch, ['--verify-passes']) == ['digital', 'digital', 'digital', 'analog']
+
+
+def test_checkpoint_verify_mode():
+    """ Checkpoint verification modes follow digital semantics of the analog passes """
+    translator = create_translator(get_data_file('add4.blif'), 'analog')
+    modes = {tag: translator.get_checkpoint_verify_mode(tag)
+             for tag in ['initial', 'post_maj_norm', 'post_inout_var_reuse', 'post_wire_copy', 'final', 'unknown']}
+    assert modes == {'initial': 'digital', 'post_maj_norm': 'digital', 'post_inout_var_reuse': None,
+                     'post_wire_copy': 'analog', 'final': 'analog', 'unknown': None}
@@ -10,9 +10,6 @@ Date: 2025-05-17
 
 import re
 import math
-import sys
-import os
-sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 from util import *
 from code_gen_pimeval_base import PimEvalAPICodeGeneratorBase
 
@@ -139,26 +136,17 @@ class PimEvalAPIAnalogCodeGenerator(PimEvalAPICodeGeneratorBase):
         sources = [operand_src0, operand_src1, operand_src2]
 
         # Prepare destination operands
-        if num_operands == 4:
-            operand_dest0 = self.mapPimAsmRegToPimEvalAPI(instruction.operandsList[0])
-            dests = [operand_dest0]
-        elif num_operands == 5:
-            operand_dest0 = self.mapPimAsmRegToPimEvalAPI(instruction.operandsList[0])
-            operand_dest1 = self.mapPimAsmRegToPimEvalAPI(instruction.operandsList[1])
-            dests = [operand_dest0, operand_dest1]
-        elif num_operands == 6:
-            operand_dest0 = self.mapPimAsmRegToPimEvalAPI(instruction.operandsList[0])
-            operand_dest1 = self.mapPimAsmRegToPimEvalAPI(instruction.operandsList[1])
-            operand_dest2 = self.mapPimAsmRegToPimEvalAPI(instruction.operandsList[2])
-            dests = [operand_dest0, operand_dest1, operand_dest2]
+        # A destination that is also a non-inverted source receives the TRA result in place
+        in_place = [operand for operand, inv in zip(instruction.operandsList[-3:], [inv0, inv1, inv2]) if not inv]
+        dest_operands = [operand for operand in instruction.operandsList[:-3] if operand not in in_place]
+        dests = [self.mapPimAsmRegToPimEvalAPI(operand) for operand in dest_operands]
 
         # Safety check
         if len(set(sources)) != len(sources):
             raise ValueError(f"Error: maj3 instruction {instruction.opCode} has duplicate source operands.")
         if len(set(dests)) != len(dests):
             raise ValueError(f"Error: maj3 instruction {instruction.opCode} has duplicate destination operands.")
-        # TODO: If allowing same src and dest in BLIF translator, update here
-        if len(set(sources + dests)) != len(sources + dests):
+        if set(dest_operands) & set(instruction.operandsList[-3:]):
             raise ValueError(f"Error: maj3 instruction {instruction.opCode} has source and destination operands that overlap.")
 
         # Generate code
@@ -9,9 +9,6 @@ Date: 2025-05-17
 
 import re
 import math
-import sys
-import os
-sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 from util import *
 
 
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+File: cost_estimator.py
+Description: Latency and energy estimator of bit-serial code based on pim_target
+Author: Deyuan Guo <guodeyuan@gmail.com>
+Date: 2026-10-17
+"""
+
+import json
+
+import pim_target
+
+
+# Bit-serial analog opcode -> pim_target opcode
+ANALOG_OPCODES = {
+    'inv1': 'inv1a',
+    'and2': 'and2a',
+    'or2': 'or2a',
+    'copy': 'copy_a',
+    'mv': 'copy_a',
+    'copy_inout': 'copy_inout_a',
+    'zero': 'zero_a',
+    'one': 'one_a',
+}
+
+
+class CostEstimator:
+    """ Estimate latency and energy of a bit-serial instruction sequence
+
+    Each instruction is mapped to a pim_target opcode, with the __n### input negation
+    suffix stripped, and costs TIMING[latency] DRAM cycles. An optional energy table
+    is a JSON object of pim_target opcode -> energy per instruction in pJ, where key
+    'default' applies to opcodes not in the table.
+    """
+
+    DEFAULT_TCK_NS = pim_target.TCK_NS
+
+    def __init__(self, instruction_sequence, pim_mode, tck_ns=DEFAULT_TCK_NS, energy_table=None):
+        """ Init """
+        self.instruction_sequence = instruction_sequence
+        self.pim_mode = pim_mode
+        self.tck_ns = tck_ns
+        self.energy_table = energy_table
+        self.counts = {}  # pim_target opcode -> instruction count
+
+    @staticmethod
+    def load_energy_table(file_name):
+        """ Load an energy table JSON file """
+        with open(file_name, 'r') as file:
+            energy_table = json.load(file)
+        if not isinstance(energy_table, dict) or not all(isinstance(v, (int, float)) for v in energy_table.values()):
+            raise ValueError(f"Error: Energy table '{file_name}' must map opcodes to numbers")
+        return energy_table
+
+    def get_target_opcode(self, instruction):
+        """ Map a bit-serial instruction to a pim_target opcode """
+        opcode = pim_target.get_base_opcode(instruction.opCode)
+        if self.pim_mode == 'analog':
+            if opcode == 'maj3':
+                return f"maj3a_o{len(instruction.get_dest_operands())}"
+            opcode = ANALOG_OPCODES.get(opcode, opcode)
+        if opcode not in pim_target.OPCODES:
+            raise ValueError(f"Error: Cost estimator: Unknown opcode '{instruction.opCode}' in {self.pim_mode} mode")
+        return opcode
+
+    def estimate(self):
+        """ Count instructions per pim_target opcode """
+        self.counts = {}
+        for instruction in self.instruction_sequence:
+            opcode = self.get_target_opcode(instruction)
+            self.counts[opcode] = self.counts.get(opcode, 0) + 1
+        return self
+
+    def get_cycles(self, opcode=None):
+        """ Get DRAM cycles of an opcode, or of all instructions """
+        if opcode is not None:
+            return self.counts.get(opcode, 0) * pim_target.get_latency(opcode)
+        return sum(self.get_cycles(opcode) for opcode in self.counts)
+
+    def get_energy_pj(self, opcode=None):
+        """ Get energy in pJ of an opcode, or of all instructions. Return None without energy table """
+        if self.energy_table is None:
+            return None
+        if opcode is not None:
+            if opcode in self.energy_table:
+                return self.counts.get(opcode, 0) * self.energy_table[opcode]
+            if 'default' in self.energy_table:
+                return self.counts.get(opcode, 0) * self.energy_table['default']
+            raise ValueError(f"Error: Cost estimator: Energy table has no entry for '{opcode}'")
+        return sum(self.get_energy_pj(opcode) for opcode in self.counts)
+
+    def generate_summary(self):
+        """ Generate a one-line cost summary """
+        cycles = self.get_cycles()
+        summary = f"Estimated cycles: {cycles}, {cycles * self.tck_ns:.2f} ns at tCK {self.tck_ns} ns"
+        energy_pj = self.get_energy_pj()
+        if energy_pj is not None:
+            summary += f", {energy_pj / 1000:.3f} nJ"
+        return summary
+
+    def generate_breakdown(self):
+        """ Generate per-opcode cost lines, sorted by cycles """
+        lines = []
+        for opcode in sorted(self.counts, key=lambda opcode: (-self.get_cycles(opcode), opcode)):
+            cycles = self.get_cycles(opcode)
+            line = f"{opcode:<14} count {self.counts[opcode]:>8}  cycles {cycles:>10}  ns {cycles * self.tck_ns:>12.2f}"
+            energy_pj = self.get_energy_pj(opcode)
+            if energy_pj is not None:
+                line += f"  pJ {energy_pj:>12.2f}"
+            lines.append(line)
+        return lines
+
+    def report(self):
+        """ Print the cost summary and per-opcode breakdown """
+        print(f"Info: {self.generate_summary()}")
+        for line in self.generate_breakdown():
+            print(f"Info:   {line}")
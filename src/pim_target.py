@@ -8,6 +8,8 @@ Date: 2026-03-29
 """
 
 # Costs are in DRAM cycles; a typical cycle is tCK = 0.63ns
+TCK_NS = 0.63
+
 TIMING = {
     'tCCD': 4,
     'tRC': 74,
@@ -26,6 +28,7 @@ OPCODES = {
     'maj3':  { 'latency': 'tCCD', 'operands': ['reg_out', 'reg_in', 'reg_in', 'reg_in'] },
     'zero':  { 'latency': 'tCCD', 'operands': ['reg_out'] },
     'one':   { 'latency': 'tCCD', 'operands': ['reg_out'] },
+    'mv':    { 'latency': 'tCCD', 'operands': ['reg_out', 'reg_in'] },  # Note: from RISC-V assembly
 
     # -- Digital spill ops (latency: tRC) --
     'read':  { 'latency': 'tRC', 'operands': ['reg_out', 'row_in'] },
@@ -45,3 +48,13 @@ OPCODES = {
     'zero_a':       { 'latency': 'tRC', 'operands': ['row_out'] },
     'one_a':        { 'latency': 'tRC', 'operands': ['row_out'] },
 }
+
+
+def get_base_opcode(opcode):
+    """ Strip the optional __n### input negation suffix of an IR-1 opcode """
+    return opcode.split('__n', 1)[0]
+
+
+def get_latency(opcode):
+    """ Get the latency of an IR-1 opcode in DRAM cycles """
+    return TIMING[OPCODES[get_base_opcode(opcode)]['latency']]
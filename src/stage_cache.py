@@ -0,0 +1,197 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+File: stage_cache.py
+Description: Content-addressed artifact cache for bit-serial compiler stages
+Author: Deyuan Guo <guodeyuan@gmail.com>
+Date: 2026-10-17
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+
+
+class StageCache:
+    """ Content-addressed artifact cache for bit-serial compiler stages
+
+    Cache layout:
+        <cache_dir>/tools.json                     memoized tool binary hashes
+        <cache_dir>/<stage>/<key[:2]>/<key>/       one entry per stage key
+            manifest.json                          stage, flags and output suffixes
+            <suffix files>                         cached output artifacts
+
+    A stage key is the SHA-256 of the stage name, the hashes of all input files,
+    the hashes of all tool files and the stage flags. Output files are stored by
+    suffix (e.g. '.blif'), so a hit can be restored under any output name.
+    """
+
+    def __init__(self, cache_dir, link=False):
+        """ Init """
+        self.cache_dir = os.path.abspath(cache_dir)
+        self.link = link
+        self.file_hashes = {}  # (path, size, mtime_ns) -> sha256
+        self.tool_hashes_file = os.path.join(self.cache_dir, 'tools.json')
+        self.tool_hashes = None
+
+    def create_cache_dir_if_needed(self):
+        """ Create the cache directory if needed """
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+        except Exception as e:
+            print("Error: Failed to create cache dir '%s': %s" % (self.cache_dir, e))
+            return False
+        return True
+
+    @staticmethod
+    def get_file_stat_key(path):
+        """ Get a key that changes whenever a file is modified """
+        st = os.stat(path)
+        return "%s:%d:%d" % (os.path.abspath(path), st.st_size, st.st_mtime_ns)
+
+    def hash_file(self, path):
+        """ Get SHA-256 of a file content """
+        stat_key = self.get_file_stat_key(path)
+        if stat_key in self.file_hashes:
+            return self.file_hashes[stat_key]
+        sha = hashlib.sha256()
+        with open(path, 'rb') as file:
+            for chunk in iter(lambda: file.read(1 << 20), b''):
+                sha.update(chunk)
+        digest = sha.hexdigest()
+        self.file_hashes[stat_key] = digest
+        return digest
+
+    def hash_tool(self, path):
+        """ Get SHA-256 of a tool binary, memoized on disk by path, size and mtime """
+        if self.tool_hashes is None:
+            self.tool_hashes = {}
+            if os.path.isfile(self.tool_hashes_file):
+                try:
+                    with open(self.tool_hashes_file, 'r') as file:
+                        self.tool_hashes = json.load(file)
+                except (OSError, ValueError):
+                    self.tool_hashes = {}
+        stat_key = self.get_file_stat_key(path)
+        if stat_key in self.tool_hashes:
+            return self.tool_hashes[stat_key]
+        digest = self.hash_file(path)
+        self.tool_hashes[stat_key] = digest
+        self.write_json_atomic(self.tool_hashes_file, self.tool_hashes)
+        return digest
+
+    def hash_tool_dir(self, path):
+        """ Get a combined hash of the top-level Python sources of a directory
+            Subdirectories such as tests/ are not part of the tool
+        """
+        sha = hashlib.sha256()
+        for name in sorted(os.listdir(path)):
+            file_path = os.path.join(path, name)
+            if name.endswith('.py') and os.path.isfile(file_path):
+                sha.update(name.encode())
+                sha.update(self.hash_file(file_path).encode())
+        return sha.hexdigest()
+
+    def make_key(self, stage, input_files, tool_hashes, flags):
+        """ Compute the content-addressed key of a stage """
+        sha = hashlib.sha256()
+        sha.update(("stage=%s\n" % stage).encode())
+        for path in input_files:
+            sha.update(("input=%s\n" % self.hash_file(path)).encode())
+        for digest in tool_hashes:
+            sha.update(("tool=%s\n" % digest).encode())
+        for flag in flags:
+            sha.update(("flag=%s\n" % flag).encode())
+        return sha.hexdigest()
+
+    def get_entry_dir(self, stage, key):
+        """ Get the cache entry directory of a stage key """
+        return os.path.join(self.cache_dir, stage, key[:2], key)
+
+    def restore(self, stage, key, outputs):
+        """ Restore cached outputs of a stage. Return True on a cache hit
+            outputs: dict of suffix -> destination path
+        """
+        entry_dir = self.get_entry_dir(stage, key)
+        manifest_file = os.path.join(entry_dir, 'manifest.json')
+        if not os.path.isfile(manifest_file):
+            return False
+        try:
+            with open(manifest_file, 'r') as file:
+                manifest = json.load(file)
+        except (OSError, ValueError):
+            return False
+        if sorted(manifest.get('outputs', [])) != sorted(outputs.keys()):
+            return False
+        for suffix, dest in outputs.items():
+            src = os.path.join(entry_dir, 'out' + suffix)
+            if not os.path.isfile(src):
+                return False
+            self.place_file(src, dest)
+        return True
+
+    def store(self, stage, key, outputs, flags):
+        """ Store outputs of a stage into the cache
+            outputs: dict of suffix -> source path
+        """
+        entry_dir = self.get_entry_dir(stage, key)
+        if os.path.isdir(entry_dir):
+            return True
+        for src in outputs.values():
+            if not os.path.isfile(src):
+                print("Warning: Skip caching stage '%s': missing output '%s'" % (stage, src))
+                return False
+        parent_dir = os.path.dirname(entry_dir)
+        try:
+            os.makedirs(parent_dir, exist_ok=True)
+            tmp_dir = tempfile.mkdtemp(prefix='.tmp_', dir=parent_dir)
+            for suffix, src in outputs.items():
+                shutil.copyfile(src, os.path.join(tmp_dir, 'out' + suffix))
+                os.chmod(os.path.join(tmp_dir, 'out' + suffix), 0o444)
+            manifest = {'stage': stage, 'flags': flags, 'outputs': sorted(outputs.keys())}
+            with open(os.path.join(tmp_dir, 'manifest.json'), 'w') as file:
+                json.dump(manifest, file, indent=2)
+            # Publish atomically. Another process may have stored the same key concurrently.
+            try:
+                os.rename(tmp_dir, entry_dir)
+            except OSError:
+                shutil.rmtree(tmp_dir, ignore_errors=True)
+        except Exception as e:
+            print("Warning: Failed to cache stage '%s': %s" % (stage, e))
+            return False
+        return True
+
+    def remove_outputs(self, outputs):
+        """ Remove existing outputs before running a stage, so that the stage never writes
+            through a hardlink into a read-only cache entry
+            outputs: dict of suffix -> destination path
+        """
+        for dest in outputs.values():
+            if os.path.lexists(dest):
+                os.remove(dest)
+
+    def place_file(self, src, dest):
+        """ Copy or hardlink a cached file to its destination """
+        if os.path.lexists(dest):
+            os.remove(dest)  # never write through an existing hardlink
+        if self.link:
+            try:
+                os.link(src, dest)
+                return
+            except OSError:
+                pass  # e.g. cross-device, fall back to copy
+        shutil.copyfile(src, dest)
+
+    @staticmethod
+    def write_json_atomic(path, data):
+        """ Write a JSON file atomically """
+        dir_name = os.path.dirname(path)
+        try:
+            fd, tmp_path = tempfile.mkstemp(prefix='.tmp_', dir=dir_name)
+            with os.fdopen(fd, 'w') as file:
+                json.dump(data, file, indent=2)
+            os.replace(tmp_path, path)
+        except OSError as e:
+            print("Warning: Failed to write '%s': %s" % (path, e))
@@ -39,6 +39,9 @@ class FunctionSignatureTransformer(Transformer):
 
 
 class FunctionSignatureParser:
+    # LALR parser shared by all instances. Lark caches its parser tables on disk
+    lark_parser = None
+
     def __init__(self):
         self.grammar = """
             start: "void" IDENTIFIER "(" [param_list] ")"
@@ -65,9 +68,14 @@ class FunctionSignatureParser:
         return golden_function_content[start_index:end_index].strip()
 
 
+    def __get_lark_parser(self):
+        if FunctionSignatureParser.lark_parser is None:
+            FunctionSignatureParser.lark_parser = Lark(self.grammar, parser="lalr", cache=True)
+        return FunctionSignatureParser.lark_parser
+
     def parse(self, golden_function_content):
-        parser = Lark(self.grammar, parser="lalr", transformer=FunctionSignatureTransformer())
-        input_operands, output_operands, function_name = \
-            parser.parse(self.__extract_signature_block(golden_function_content))
+        # Note: The transformer is stateful, so use a new one per parse instead of embedding it in the cached parser
+        tree = self.__get_lark_parser().parse(self.__extract_signature_block(golden_function_content))
+        input_operands, output_operands, function_name = FunctionSignatureTransformer().transform(tree)
         return input_operands, output_operands, function_name
 
@@ -0,0 +1,359 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+File: run_sweep.py
+Description: Parallel design-space sweep driver for PIMsynth compiler tasks.
+  Takes the same task list format as run_regressions.sh. Each line: isa num_regs mode benchmark
+  Outputs go to testbench/outputs/<isa>__<regs>__<mode>__<benchmark>/
+  Tech-Independent-BLIF from yosys is generated once per (benchmark, mode) into the
+  shared yosys store testbench/outputs/_yosys_store/ and reused by all tasks using
+  the same Verilog. Yosys logs go to testbench/outputs/_yosys/.
+  With --batch-abc, the same job also maps all genlibs of a (benchmark, mode) group in a
+  single ABC session, and tasks start from the mapped BLIF files.
+Author: Deyuan Guo <guodeyuan@gmail.com>
+"""
+
+import argparse
+import concurrent.futures
+import os
+import shutil
+import subprocess
+import sys
+import time
+import traceback
+
+TESTBENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJ_ROOT = os.path.dirname(TESTBENCH_DIR)
+sys.path.append(PROJ_ROOT)
+from bit_serial_compiler import bitSerialCompiler
+from collect_results import collect_results, format_table, print_summary
+
+# Note: Keep in sync with common.sh
+VERILOG_DIRS = [
+    os.path.join(PROJ_ROOT, 'src-verilog/benchmarks'),
+    os.path.join(PROJ_ROOT, 'src-verilog/misc'),
+]
+GENLIB_DIR = os.path.join(PROJ_ROOT, 'src-genlib')
+SUBMODULE_LIST = os.path.join(PROJ_ROOT, 'src-verilog/submodule_list.txt')
+SUBMODULE_DIR = os.path.join(PROJ_ROOT, 'src-verilog/submodules')
+
+# Compiler options set per task by the task list and the sweep runner
+TASK_OPTIONS = ['--verilog', '--blif', '--genlib', '--num-regs', '--pim-mode', '--output', '--outdir',
+                '--from-stage', '--to-stage', '--yosys-only', '--yosys-store', '--num-tests']
+
+
+def read_task_list(task_file):
+    """ Read task list. Return a list of (isa, num_regs, mode, benchmark) """
+    tasks = []
+    with open(task_file, 'r') as file:
+        for line in file:
+            line = line.split('#', 1)[0].strip()
+            if not line:
+                continue
+            fields = line.split()
+            if len(fields) != 4:
+                raise ValueError(f"Invalid task line '{line}' in '{task_file}'")
+            tasks.append(tuple(fields))
+    return tasks
+
+
+def read_submodule_files():
+    """ Read the list of Verilog submodule files """
+    files = []
+    with open(SUBMODULE_LIST, 'r') as file:
+        for line in file:
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+            path = os.path.join(SUBMODULE_DIR, line)
+            if not os.path.isfile(path):
+                raise ValueError(f"Verilog submodule file '{path}' not found.")
+            files.append(path)
+    return files
+
+
+def locate_verilog_top(benchmark):
+    """ Locate top-level Verilog file of a benchmark """
+    for verilog_dir in VERILOG_DIRS:
+        path = os.path.join(verilog_dir, benchmark + '.v')
+        if os.path.isfile(path):
+            return path
+    return ''
+
+
+def log_has_stats(log_file):
+    """ Check if a task log contains #R/#W/#L stats """
+    try:
+        with open(log_file, 'r') as file:
+            return any('Info:  #R' in line for line in file)
+    except FileNotFoundError:
+        return False
+
+
+def run_compiler(args, log_file):
+    """ Run bit-serial compiler in this process with stdout/stderr redirected to a log file """
+    sys.stdout.flush()
+    sys.stderr.flush()
+    saved_fds = (os.dup(1), os.dup(2))
+    try:
+        with open(log_file, 'a') as log:
+            os.dup2(log.fileno(), 1)
+            os.dup2(log.fileno(), 2)
+            try:
+                success = bitSerialCompiler(args).run()
+            except Exception:
+                traceback.print_exc()
+                success = False
+            sys.stdout.flush()
+            sys.stderr.flush()
+    finally:
+        os.dup2(saved_fds[0], 1)
+        os.dup2(saved_fds[1], 2)
+        os.close(saved_fds[0])
+        os.close(saved_fds[1])
+    return success
+
+
+def get_batch_blif_file(outdir, benchmark, isas, isa):
+    """ Get the mapped BLIF file of an ISA generated by a batched ABC run """
+    if len(isas) > 1:
+        return os.path.join(outdir, f"{benchmark}.{isa}.blif")
+    return os.path.join(outdir, benchmark + '.blif')
+
+
+def run_yosys_job(verilog_files, benchmark, pim_mode, outdir, yosys_store, batch_isas):
+    """ Worker: generate shared Tech-Independent-BLIF of a benchmark, and optionally map it
+        with all genlibs in batch_isas using a single ABC session. Return (success, seconds)
+    """
+    start = time.time()
+    shutil.rmtree(outdir, ignore_errors=True)
+    os.makedirs(outdir)
+    if batch_isas:
+        stage_args = ['--to-stage', 'blif', '--genlib'] + [os.path.join(GENLIB_DIR, isa + '.genlib') for isa in batch_isas]
+    else:
+        stage_args = ['--yosys-only']
+    args = ['--verilog'] + verilog_files + stage_args + [
+        '--yosys-store', yosys_store,
+        '--output', benchmark,
+        '--outdir', outdir,
+        '--pim-mode', pim_mode,
+    ]
+    success = run_compiler(args, os.path.join(outdir, benchmark + '.log'))
+    return success, time.time() - start
+
+
+def run_task_job(task, verilog_files, yosys_store, blif_file, outdir, compile_only, extra_args):
+    """ Worker: compile, build and test one task. Return (status, seconds)
+        extra_args go first, so that the task matrix always wins
+    """
+    start = time.time()
+    isa, num_regs, pim_mode, benchmark = task
+    target = f"{isa}__{num_regs}__{pim_mode}__{benchmark}"
+    log_file = os.path.join(outdir, target + '.log')
+
+    if blif_file:
+        stage_args = ['--from-stage', 'blif', '--blif', blif_file]
+    else:
+        stage_args = ['--verilog'] + verilog_files + [
+            '--yosys-store', yosys_store,
+            '--genlib', os.path.join(GENLIB_DIR, isa + '.genlib'),
+        ]
+    args = extra_args + stage_args + [
+        '--num-regs', num_regs,
+        '--output', target,
+        '--outdir', outdir,
+        '--num-tests', '10',
+        '--pim-mode', pim_mode,
+    ]
+    if not run_compiler(args, log_file):
+        return 'Compilation failed', time.time() - start
+    if compile_only:
+        return 'Compiled', time.time() - start
+
+    with open(log_file, 'a') as log:
+        if subprocess.run(['make', '-C', outdir], stdout=log, stderr=subprocess.STDOUT).returncode != 0:
+            return 'Build failed', time.time() - start
+        for suffix in ['.test.out', '.test_bitwise.out']:
+            exe = os.path.join(outdir, target + suffix)
+            if os.path.isfile(exe):
+                subprocess.run([exe], stdout=log, stderr=subprocess.STDOUT)
+
+    with open(log_file, 'r') as log:
+        content = log.read()
+    if 'PIM test: SOME FAILED' in content or 'Bitwise test: NOT OK' in content:
+        return 'FAILED (test failure)', time.time() - start
+    return 'PASSED', time.time() - start
+
+
+class SweepRunner:
+    """ Parallel sweep runner over a task matrix """
+
+    def __init__(self, task_file, output_root, jobs, compile_only, continue_mode, batch_abc, extra_args):
+        """ Init """
+        self.task_file = task_file
+        self.batch_abc = batch_abc
+        self.output_root = output_root
+        self.jobs = jobs
+        self.compile_only = compile_only
+        self.continue_mode = continue_mode
+        self.extra_args = extra_args
+        self.num_done = 0
+        self.num_tasks = 0
+        self.passed = 0
+        self.failed = 0
+        self.skipped = 0
+
+    def report(self, target, status, seconds=None):
+        """ Report the status of a finished task """
+        self.num_done += 1
+        if seconds is None:
+            print(f"[{self.num_done}/{self.num_tasks}] {target}: {status}")
+        else:
+            print(f"[{self.num_done}/{self.num_tasks}] {target}: {status} ({seconds:.1f}s)")
+        sys.stdout.flush()
+        if status in ['PASSED', 'Compiled']:
+            self.passed += 1
+        elif status.startswith('Skipping'):
+            self.skipped += 1
+        else:
+            self.failed += 1
+
+    def run(self):
+        """ Run all tasks. Return True if no task failed """
+        tasks = read_task_list(self.task_file)
+        self.num_tasks = len(tasks)
+        if not tasks:
+            print(f"Error: No tasks found in '{self.task_file}'.")
+            return False
+        submodule_files = read_submodule_files()
+
+        print("===============================================================================")
+        print("PIMsynth Sweep Runner")
+        print("Task file:    ", self.task_file)
+        print("Tasks:        ", self.num_tasks)
+        print("Jobs:         ", self.jobs)
+        print("Compile only: ", self.compile_only)
+        print("Continue:     ", self.continue_mode)
+        print("Batch ABC:    ", self.batch_abc)
+        print("Output root:  ", self.output_root)
+        print("===============================================================================")
+        os.makedirs(self.output_root, exist_ok=True)
+
+        # Group tasks by (benchmark, mode): yosys output does not depend on genlib or num_regs
+        groups = {}
+        targets = []
+        for task in tasks:
+            isa, num_regs, pim_mode, benchmark = task
+            target = f"{isa}__{num_regs}__{pim_mode}__{benchmark}"
+            targets.append(target)
+            outdir = os.path.join(self.output_root, target)
+            if self.continue_mode and log_has_stats(os.path.join(outdir, target + '.log')):
+                self.report(target, 'Skipping (already completed)')
+                continue
+            # Clean output directory
+            shutil.rmtree(outdir, ignore_errors=True)
+            os.makedirs(outdir)
+            log_file = os.path.join(outdir, target + '.log')
+            verilog_top = locate_verilog_top(benchmark)
+            if not verilog_top:
+                self.write_log(log_file, f"Error: Verilog file '{benchmark}.v' not found.")
+                self.report(target, f"ERROR: Verilog file '{benchmark}.v' not found.")
+                continue
+            if not os.path.isfile(os.path.join(GENLIB_DIR, isa + '.genlib')):
+                self.write_log(log_file, f"Error: GenLib file '{isa}.genlib' not found.")
+                self.report(target, f"ERROR: GenLib file '{isa}.genlib' not found.")
+                continue
+            groups.setdefault((benchmark, pim_mode, verilog_top), []).append(task)
+
+        yosys_store = os.path.join(self.output_root, '_yosys_store')
+        with concurrent.futures.ProcessPoolExecutor(max_workers=self.jobs) as executor:
+            # Phase 1: shared yosys runs. Tasks of a group are submitted as soon as its yosys run finishes
+            yosys_futures = {}
+            for key in groups:
+                benchmark, pim_mode, verilog_top = key
+                yosys_outdir = os.path.join(self.output_root, '_yosys', f"{pim_mode}__{benchmark}")
+                batch_isas = self.get_batch_isas(groups[key])
+                future = executor.submit(run_yosys_job, submodule_files + [verilog_top], benchmark, pim_mode,
+                                         yosys_outdir, yosys_store, batch_isas)
+                yosys_futures[future] = key
+
+            # Phase 2: ABC mapping (unless batched in phase 1) and the rest of the flow per task
+            task_futures = {}
+            for future in concurrent.futures.as_completed(yosys_futures):
+                key = yosys_futures[future]
+                benchmark, pim_mode, verilog_top = key
+                yosys_outdir = os.path.join(self.output_root, '_yosys', f"{pim_mode}__{benchmark}")
+                success, seconds = future.result()
+                batch_isas = self.get_batch_isas(groups[key])
+                for task in groups[key]:
+                    target = '__'.join(task)
+                    outdir = os.path.join(self.output_root, target)
+                    if not success:
+                        self.write_log(os.path.join(outdir, target + '.log'),
+                                       f"Error: Shared yosys/ABC run failed. See {yosys_outdir}")
+                        self.report(target, 'ERROR: Shared yosys/ABC run failed.')
+                        continue
+                    blif_file = ''
+                    if batch_isas:
+                        blif_file = get_batch_blif_file(yosys_outdir, benchmark, batch_isas, task[0])
+                    task_future = executor.submit(run_task_job, task, submodule_files + [verilog_top], yosys_store,
+                                                  blif_file, outdir, self.compile_only, self.extra_args)
+                    task_futures[task_future] = target
+
+            for future in concurrent.futures.as_completed(task_futures):
+                status, seconds = future.result()
+                self.report(task_futures[future], status, seconds)
+
+        print("")
+        print("===============================================================================")
+        print(f"Run complete: {self.passed} passed, {self.failed} failed, {self.skipped} skipped (of {self.num_tasks})")
+        print("===============================================================================")
+
+        # Print summary table for tasks just run
+        results = collect_results(self.output_root, targets)
+        if results:
+            print(format_table(results))
+            print_summary(results)
+        return self.failed == 0
+
+    def get_batch_isas(self, tasks):
+        """ Get the sorted unique ISAs of a task group for batched ABC mapping """
+        if not self.batch_abc:
+            return []
+        return sorted(set(task[0] for task in tasks))
+
+    @staticmethod
+    def write_log(log_file, message):
+        """ Write an error message into a task log """
+        with open(log_file, 'a') as log:
+            log.write(message + '\n')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Parallel sweep runner for PIMsynth compiler tasks.')
+    parser.add_argument('task_file', type=str, help='File with one task per line: isa num_regs mode benchmark')
+    parser.add_argument('--compile-only', action='store_true', help='Skip make + test execution (compile and collect stats only)')
+    parser.add_argument('--continue', dest='continue_mode', action='store_true', help='Resume from previous run (skip completed tasks)')
+    parser.add_argument('--jobs', '-j', type=int, default=os.cpu_count(), help='Number of parallel jobs, default number of CPUs')
+    parser.add_argument('--batch-abc', action='store_true', help='Map all genlibs of a benchmark in a single ABC session')
+    parser.add_argument('--outdir', type=str, default=os.path.join(TESTBENCH_DIR, 'outputs'), help='Output root')
+    parser.add_argument('--compiler-args', type=str, default='', help='Extra arguments passed to bit_serial_compiler.py')
+    args = parser.parse_args()
+
+    if not os.path.isfile(args.task_file):
+        print(f"Error: Task list file '{args.task_file}' not found.")
+        sys.exit(1)
+    compiler_args = args.compiler_args.split()
+    for arg in compiler_args:
+        if arg.split('=', 1)[0] in TASK_OPTIONS:
+            print(f"Error: --compiler-args cannot set {arg.split('=', 1)[0]}, which is controlled by the task list and sweep runner.")
+            sys.exit(1)
+
+    runner = SweepRunner(args.task_file, os.path.abspath(args.outdir), max(1, args.jobs),
+                         args.compile_only, args.continue_mode, args.batch_abc, compiler_args)
+    success = runner.run()
+    sys.exit(0 if success else 1)
+
+
+if __name__ == '__main__':
+    main()